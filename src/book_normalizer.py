@@ -1,18 +1,59 @@
+import hashlib
 import json
+import marshal
 import os
+import sys
+
+from reference_parser import ReferenceParser, ParsedReference, VERSE_END
+
+# Bump when the snapshotted tables change shape
+SNAPSHOT_VERSION = 2
+
+# Tables rebuilt from bible_books.json, snapshotted as a whole
+SNAPSHOT_TABLES = ('abbreviations', 'n1904_to_code', 'book_order', 'book_codes', 'alias_codes')
+
+
+class Book:
+    """
+    Immutable record of one canonical book: every label and abbreviation.
+    en_key is the internal N1904 name ("I_Samuel"), bhsa_label the BHSA one
+    ("Samuel_I"), bj_label the BJ title ("La Genèse").
+    """
+    __slots__ = ('code', 'order', 'en_key', 'en_label', 'en_abbr', 'fr_label', 'fr_abbr', 'bj_label', 'bhsa_label', 'abbreviations')
+
+    def __init__(self, *fields):
+        for name, value in zip(self.__slots__, fields):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Book records are immutable")
+
+    def __repr__(self):
+        return f"Book({self.code!r})"
+
+    def fields(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    @property
+    def en_name(self):
+        # Display form of the N1904 name: "I Samuel"
+        return self.en_key.replace("_", " ")
+
 
 class BookNormalizer:
-    def __init__(self, data_dir):
+    def __init__(self, data_dir, cache_dir=None):
         self.data_dir = data_dir
+        # cache_dir: where to keep a compiled snapshot of the tables (None: always rebuild)
+        self.cache_dir = cache_dir
+        # Parser tables: alias -> internal key -> book code
         self.abbreviations = {}
-        self.n1904_to_tob = {}
         self.n1904_to_code = {}
-        self.code_to_fr_abbr = {}
-        self.code_to_en_abbr = {}
-        self.code_to_bhsa = {}
-        self.code_to_abbreviations = {}
-        self.code_to_n1904 = {}
         self.book_order = {}
+        self.book_codes = [] # book index -> code, the inverse of book_order
+        # Book registry: code -> Book, and every alias of every book -> Book
+        self.books = {}
+        self.book_index = {}
+        self.alias_codes = {}
         
         self.OT_BOOKS = {
             'GEN', 'EXO', 'LEV', 'NUM', 'DEU', 'JOS', 'JDG', 'RUT', '1SA', '2SA', '1KI', '2KI', '1CH', '2CH', 'EZR', 'NEH', 'EST',
@@ -24,7 +65,55 @@ class BookNormalizer:
             'PHM', 'HEB', 'JAS', '1PE', '2PE', '1JN', '2JN', '3JN', 'JUD', 'REV'
         }
         
-        self._load_mappings()
+        trie = self._load_snapshot()
+        if trie is None:
+            self._load_mappings()
+            self._index_aliases()
+        self.book_index = {alias: self.books[code] for alias, code in self.alias_codes.items()}
+        # Verse id of chapter 0, verse 0 of every book
+        self.book_base = {code: (order + 1) * 1000000 for code, order in self.book_order.items()}
+        self.parser = ReferenceParser(self.abbreviations, self.n1904_to_code, self.verse_id, trie=trie)
+        if trie is None:
+            self._save_snapshot()
+
+    # Packed verse ids: book index * 10^6 + chapter * 10^3 + verse.
+    # The canonical verse identity used by storage, indexes and caches:
+    # ints sort in canonical order and a book is a contiguous id range.
+    # VERSE_END as chapter or verse means "up to the end of the book / chapter".
+    VERSE_END = VERSE_END
+
+    def verse_id(self, book_code, chapter, verse):
+        return self.book_base[book_code] + chapter * 1000 + verse
+
+    def split_verse_id(self, vid):
+        """Inverse of verse_id: (book_code, chapter, verse)."""
+        book, rest = divmod(vid, 1000000)
+        chapter, verse = divmod(rest, 1000)
+        return self.book_codes[book - 1], chapter, verse
+
+    def chapter_id(self, vid):
+        """Verse id of verse 0 of the chapter of vid: one key per chapter."""
+        return vid - vid % 1000
+
+    def verse_id_from_key(self, key):
+        """Verse id of a standardized key ("MRK.1.1"), or None."""
+        code, _, rest = key.partition(".")
+        chapter, _, verse = rest.partition(".")
+        base = self.book_base.get(code)
+        if base is None or not chapter.isdigit() or not verse.isdigit():
+            return None
+        if int(chapter) >= VERSE_END or int(verse) >= VERSE_END:
+            return None
+        return base + int(chapter) * 1000 + int(verse)
+
+    def verse_key(self, vid):
+        """Standardized key ("MRK.1.1") of a verse id, as stored in the JSON collections."""
+        return "{}.{}.{}".format(*self.split_verse_id(vid))
+
+    def book_id_range(self, book_code):
+        """Half-open range of the verse ids of a book."""
+        base = self.book_base[book_code]
+        return base, base + 1000000
 
     def is_ot(self, book_code):
         return book_code in self.OT_BOOKS
@@ -32,6 +121,51 @@ class BookNormalizer:
     def is_nt(self, book_code):
         return book_code in self.NT_BOOKS
 
+    def _snapshot_key(self):
+        # Keyed by the JSON content and the Python version (marshal format)
+        path = os.path.join(self.data_dir, "bible_books.json")
+        with open(path, "rb") as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        return (SNAPSHOT_VERSION, sys.version_info[:2], digest)
+
+    def _snapshot_path(self):
+        return os.path.join(self.cache_dir, "book_tables.marshal")
+
+    def _load_snapshot(self):
+        """Restore the tables from a fresh snapshot in one read. Returns the parser trie, or None."""
+        if not self.cache_dir:
+            return None
+        try:
+            key = self._snapshot_key()
+            with open(self._snapshot_path(), "rb") as f:
+                snapshot = marshal.loads(f.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if snapshot.get("key") != key:
+            return None
+        for name in SNAPSHOT_TABLES:
+            setattr(self, name, snapshot["tables"][name])
+        self.books = {fields[0]: Book(*fields) for fields in snapshot["books"]}
+        return snapshot["trie"]
+
+    def _save_snapshot(self):
+        if not self.cache_dir or not self.book_codes:
+            return
+        try:
+            snapshot = {
+                "key": self._snapshot_key(),
+                "tables": {name: getattr(self, name) for name in SNAPSHOT_TABLES},
+                "books": [book.fields() for book in self.books.values()],
+                "trie": self.parser.trie,
+            }
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = self._snapshot_path() + ".tmp"
+            with open(tmp_path, "wb") as f:
+                marshal.dump(snapshot, f)
+            os.replace(tmp_path, self._snapshot_path())
+        except (OSError, ValueError):
+            pass
+
     def _load_mappings(self):
         path = os.path.join(self.data_dir, "bible_books.json")
         if not os.path.exists(path):
@@ -45,6 +179,7 @@ class BookNormalizer:
             books = data.get("books", {})
             for i, (code, info) in enumerate(books.items()):
                 self.book_order[code] = i
+                self.book_codes.append(code)
                 en_info = info.get("en", {})
                 en_label = en_info.get("label")
                 bhsa_label = en_info.get("bhsa_label") # Load BHSA label
@@ -66,18 +201,16 @@ class BookNormalizer:
                 fr_abbr = fr_abbreviations[0] if fr_abbreviations else None
                 
                 if en_key:
-                    self.n1904_to_tob[en_key] = fr_label
                     self.n1904_to_code[en_key] = code
-                    self.code_to_fr_abbr[code] = fr_abbr
-                    self.code_to_en_abbr[code] = en_abbr
-                    self.code_to_abbreviations[code] = abbreviations # Now stores all abbreviations
-                    self.code_to_n1904[code] = en_key
                     
-                    # Store BHSA mapping: defaults to en_label if bhsa_label not set
-                    # But careful: BHSA uses "Genesis" but our en_key logic might produce "Genesis". 
-                    # Does BHSA use underscores "Samuel_I"? Yes.
-                    # So we should populate code_to_bhsa.
-                    self.code_to_bhsa[code] = bhsa_label if bhsa_label else (en_label if en_label else code)
+                    # BHSA label defaults to en_label if bhsa_label not set (BHSA uses "Samuel_I")
+                    self.books[code] = Book(
+                        code, i, en_key, en_label or code, en_abbr,
+                        fr_label or en_label or code, fr_abbr,
+                        fr.get("bj") or fr_label or en_label or code,
+                        bhsa_label or en_label or code,
+                        list(abbreviations),
+                    )
                     
                     # Register English variations
                     self.abbreviations[en_key] = en_key
@@ -103,73 +236,67 @@ class BookNormalizer:
         except Exception as e:
             print(f"Warning: Could not load book mappings: {e}")
 
-    def normalize_reference(self, ref_str):
+    def _index_aliases(self):
+        # Every alias known to the parser, plus space / underscore variants
+        for alias, key in self.abbreviations.items():
+            code = self.n1904_to_code.get(key)
+            if code:
+                self.alias_codes[alias] = code
+        for alias, code in list(self.alias_codes.items()):
+            self.alias_codes.setdefault(alias.replace("_", " "), code)
+            self.alias_codes.setdefault(alias.replace(" ", "_"), code)
+        # Corpus labels win over abbreviations: BHSA, then N1904 names
+        for book in self.books.values():
+            self.alias_codes.setdefault(book.bj_label, book.code)
+        for book in self.books.values():
+            self.alias_codes[book.bhsa_label] = book.code
+        for book in self.books.values():
+            self.alias_codes[book.en_key] = book.code
+
+    def book(self, label):
+        """Book record of any label or abbreviation (one dict lookup), or None."""
+        return self.book_index.get(label)
+
+    def code_from_label(self, label):
         """
-        Normalize a reference string (e.g. "Mc 1:1") to a tuple (BookCode, Chapter, Verse) 
-        and a standardized string (e.g. "MRK.1.1").
-        Returns (book_code, chapter, verse, standardized_str) or None if invalid.
+        Resolve a book label as found in any corpus (N1904 "I_Samuel", LXX "1Sam",
+        BHSA "Samuel_I", TOB "1 Samuel", BJ "1SA") to its book code, or None.
+        A single lookup in the book registry.
         """
-        # Simple cleanup
-        ref_str = ref_str.strip().replace(',', ':')
-        
-        # 1. Identify valid book name/abbr
-        # We need to split space-separated or find longest match
-        parts = ref_str.split()
-        book_key = None
-        remaining = ""
-        
-        if len(parts) >= 2:
-            two_word = f"{parts[0]} {parts[1]}"
-            if two_word in self.abbreviations:
-                book_key = self.abbreviations[two_word]
-                remaining = " ".join(parts[2:])
-            elif parts[0] in self.abbreviations:
-                book_key = self.abbreviations[parts[0]]
-                remaining = " ".join(parts[1:])
-        elif len(parts) == 1:
-            # Maybe just "Gen.1.1" or "Gen"
-            # Try splitting by dot if present
-            if "." in parts[0] and not parts[0].replace(".", "").isdigit():
-                 subparts = parts[0].split(".")
-                 if subparts[0] in self.abbreviations:
-                     book_key = self.abbreviations[subparts[0]]
-                     # Reconstruct 1.1 part
-                     remaining = ".".join(subparts[1:])
-            elif parts[0] in self.abbreviations:
-                book_key = self.abbreviations[parts[0]]
-        
-        if not book_key:
+        book = self.book_index.get(label)
+        return book.code if book else None
+
+    def parse_reference(self, ref):
+        """
+        Parse a reference string once into an immutable ParsedReference
+        (memoized). Already parsed references are passed through, so callers
+        down the chain can accept either.
+        """
+        if isinstance(ref, ParsedReference):
+            return ref
+        if not ref:
             return None
+        return self.parser.parse(ref.replace("\u00a0", " "))
 
-        book_code = self.n1904_to_code.get(book_key) or self.n1904_to_code.get(book_key.replace(" ", "_"))
-        if not book_code:
+    def parse_passage(self, passage):
+        """
+        Parse a passage ("Mc 1:1-8; Lc 3:1-6", "Mc 1:40-2:12", "Mc") into a
+        tuple of VerseSpan(start, end) packed verse ids, or None if invalid.
+        """
+        if isinstance(passage, ParsedReference):
+            return self.parser.spans_of(passage)
+        if not passage:
             return None
+        return self.parser.parse_passage(passage.replace("\u00a0", " "))
 
-        # 2. Parse Chapter:Verse
-        # remaining could be "1:1", "1.1", "1", etc.
-        # standardize separators
-        clean_rem = remaining.replace(":", ".")
-        
-        chapter = 0
-        verse = 0
-        
-        if "." in clean_rem:
-            c_v = clean_rem.split(".")
-            if len(c_v) >= 2:
-                try:
-                    chapter = int(c_v[0])
-                    verse = int(c_v[1])
-                except ValueError:
-                    pass
-        else:
-             try:
-                 if clean_rem:
-                    chapter = int(clean_rem)
-             except ValueError:
-                 pass
-        
-        if chapter > 0:
-            std_str = f"{book_code}.{chapter}.{verse}" if verse > 0 else f"{book_code}.{chapter}"
-            return (book_code, chapter, verse, std_str)
-        
+    def normalize_reference(self, ref_str):
+        """
+        Normalize a reference string (e.g. "Mc 1:1") to a tuple (BookCode, Chapter, Verse) 
+        and a standardized string (e.g. "MRK.1.1").
+        Returns (book_code, chapter, verse, standardized_str) or None if invalid
+        (whole-book references have no chapter and are rejected here).
+        """
+        ref = self.parse_reference(ref_str)
+        if ref and ref.chapter > 0:
+            return ref
         return None
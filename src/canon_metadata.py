@@ -0,0 +1,149 @@
+import json
+import os
+import threading
+
+METADATA_VERSION = 1
+
+# Corpora described by the metadata file, in listing order
+CORPORA = ['n1904', 'lxx', 'bhsa', 'tob', 'bj']
+
+
+def iter_verse_nodes(api, code_from_label):
+    """
+    Walk book -> chapter -> verse nodes of a Text-Fabric corpus.
+    Yields ((book_code, chapter, verse), verse_node).
+    """
+    F = api.F
+    L = api.L
+    for book_node in F.otype.s('book'):
+        code = code_from_label(F.book.v(book_node))
+        if not code:
+            continue
+        for chapter_node in L.d(book_node, otype='chapter'):
+            chapter = int(F.chapter.v(chapter_node))
+            for verse_node in L.d(chapter_node, otype='verse'):
+                yield (code, chapter, int(F.verse.v(verse_node))), verse_node
+
+
+def build_table(api, code_from_label):
+    """
+    Structure of a Text-Fabric corpus: {book_code: [verse count of chapter 1, ...]}.
+    Books keep their corpus order; chapters missing from the corpus count 0 verses.
+    """
+    table = {}
+    for (code, chapter, verse), _ in iter_verse_nodes(api, code_from_label):
+        counts = table.setdefault(code, [])
+        if len(counts) < chapter:
+            counts.extend([0] * (chapter - len(counts)))
+        # Verse nodes may repeat or skip numbers: keep the highest one
+        counts[chapter - 1] = max(counts[chapter - 1], verse)
+    return table
+
+
+class CanonMetadata:
+    """
+    Per-corpus book -> chapter -> verse-count tables, stored in one small JSON
+    file so that structural questions (does Mc 17 exist? how many verses in
+    Ps 119?) are answered without loading any corpus.
+    The tables are generated from the Text-Fabric data: a corpus is recorded
+    the first time it is loaded, or all at once with `python src/canon_metadata.py`.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.corpora = {}
+        # Corpora may be loaded (and recorded) from several threads (--progressive)
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == METADATA_VERSION:
+            self.corpora = data.get("corpora", {})
+
+    def save(self):
+        data = {"version": METADATA_VERSION, "corpora": self.corpora}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def has(self, corpus):
+        return corpus in self.corpora
+
+    def record(self, corpus, api, code_from_label):
+        """Generate and save the tables of a loaded corpus, once."""
+        with self._lock:
+            self._record(corpus, api, code_from_label)
+
+    def _record(self, corpus, api, code_from_label):
+        if self.has(corpus) or api is None:
+            return
+        try:
+            table = build_table(api, code_from_label)
+        except Exception:
+            # Unexpected corpus layout: answer structural questions as unknown
+            return
+        if not table:
+            return
+        self.corpora[corpus] = table
+        try:
+            self.save()
+        except OSError:
+            pass
+
+    def books(self, corpus):
+        """Book codes of a corpus, in corpus order."""
+        return list(self.corpora.get(corpus, {}))
+
+    def chapter_count(self, corpus, book_code):
+        """Number of chapters, 0 if the corpus lacks the book, None if unknown."""
+        table = self.corpora.get(corpus)
+        if table is None:
+            return None
+        return len(table.get(book_code, ()))
+
+    def verse_count(self, corpus, book_code, chapter):
+        """Number of verses, 0 if the corpus lacks the chapter, None if unknown."""
+        table = self.corpora.get(corpus)
+        if table is None:
+            return None
+        counts = table.get(book_code, ())
+        if 1 <= chapter <= len(counts):
+            return counts[chapter - 1]
+        return 0
+
+    def verse_counts(self, corpus, book_code):
+        """{chapter: verse count} of a book, empty if unknown."""
+        counts = self.corpora.get(corpus, {}).get(book_code, ())
+        return {chapter: count for chapter, count in enumerate(counts, 1) if count}
+
+    def max_chapter_count(self, book_code):
+        """Chapters of a book across the known corpora, None if no corpus has it."""
+        counts = [len(table[book_code]) for table in self.corpora.values() if book_code in table]
+        return max(counts) if counts else None
+
+    def max_verse_count(self, book_code, chapter):
+        """Verses of a chapter across the known corpora, None if no corpus has the book."""
+        counts = [self.verse_count(corpus, book_code, chapter)
+                  for corpus, table in self.corpora.items() if book_code in table]
+        return max(counts) if counts else None
+
+
+if __name__ == "__main__":
+    # Regenerate the metadata of every corpus available locally:
+    # loading a corpus records its tables.
+    import main
+
+    main.metadata.corpora = {}
+    for corpus in CORPORA:
+        if main.get_corpus_api(corpus) is None:
+            print(f"{corpus}: not available, skipped")
+            continue
+        print(f"{corpus}: {len(main.metadata.books(corpus))} books")
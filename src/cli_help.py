@@ -30,8 +30,17 @@ DESCRIPTION
        and a personal notebook for saving connections between texts.
 
 COMMANDS
-       list books
-              List all available books in the N1904 dataset.
+       list books [--corpus n1904|lxx|bhsa|tob|bj]
+              List the books of a corpus (default: every corpus already known)
+              with their French and English names and chapter counts.
+
+       list chapters BOOK [--corpus CORPUS]
+              Number of verses of every chapter of a book.
+
+       list verses BOOK CHAPTER [--corpus CORPUS]
+              Verse numbers of a chapter. The corpus defaults to N1904 for
+              the NT and LXX otherwise. Listings are read from the canon
+              metadata (.cache/canon_metadata.json) without loading any corpus.
 
        add -c [COLLECTION] -s [SOURCE] -t [TARGET] --type [TYPE] -n [NOTE]
               Add a new cross-reference/note to a personal collection.
@@ -46,8 +55,59 @@ COMMANDS
                                 Default: 'other'
               -n, --note:       Text content of the note
 
-       search [QUERY] (Coming soon)
-              Search for specific terms in the texts.
+       search [TERMS...] [--rank] [--top N]
+              Search for verses containing all the terms in the French
+              (TOB, or BJ with -b bj) and Greek (N1904, LXX) texts.
+              Accents and breathings are ignored. Restrict the searched
+              texts with -t fr or -t gr.
+
+              --rank:  Rank verses by relevance (BM25) instead of listing
+                       every match in book order.
+              --top N: Number of ranked verses to display. Default: 10
+              --notes: Search the notes of the cross-reference collections
+                       (TOB notes, personal notes) instead of the texts.
+                       Combine with -s to search a single collection.
+              --align: Aligned search across texts: each argument is a
+                       SOURCE:TERMS clause and verses must satisfy all of
+                       them. SOURCE is fr (selected French text), gr, lemma
+                       (Greek lemmas), or a text id (tob, bj, n1904, lxx,
+                       n1904.lemma, lxx.lemma).
+
+       concordance [TERM] [--width N] [--sort book|left|right]
+              Keyword-in-context lines for every occurrence of the term in the
+              French and Greek texts (restrict with -t fr or -t gr). Lines are
+              streamed in book order as they are found.
+
+              --width N: Characters of context on each side. Default: 30
+              --sort:    'book' (default), or 'left'/'right' to order the
+                         lines by the words before/after the term.
+
+       export --format html|epub|md BOOK_OR_PASSAGE [-o FILE]
+              Write a book or passage to a file, with the selected texts (-t,
+              -b), the notes and the relations as hyperlinks (-s to choose the
+              collections, -f to include the notes of the relations). Chapters
+              are rendered in parallel worker processes and written one by one.
+              Default file: the passage name with the format extension.
+
+       diff REFERENCE [VERSION_A VERSION_B]
+              Word-level differences between two French versions (default:
+              tob bj), verse by verse: words only in the first version are
+              shown as [-...-] (red), words only in the second as {+...+}
+              (green). Whole books are compared in parallel worker
+              processes. --format json|jsonl prints one record per verse.
+
+       synopsis REFERENCE
+              The passage and its parallel passages (relations of type
+              'parallel' in the cross-reference collections) side by side,
+              one column per book, rows aligned on the linked verses. For a
+              Gospel passage, only the other Gospels are shown. French text
+              (TOB, or BJ with -b bj) by default, Greek with -t gr.
+
+       stats words [BOOK] [--corpus n1904|lxx|bhsa] [--by book|chapter]
+                          [--feature lemma|surface] [--top N]
+              Word frequency tables and type/token ratios per book or chapter
+              (default: chapter), optionally restricted to one book.
+              The corpus defaults to N1904, or LXX for an OT book.
 
 SHORTCUTS
        tob [REFERENCE]
@@ -63,7 +123,15 @@ REFERENCES
        - Single verse:  "Jn 1:1", "Jean 1:1", "Gen 1:1"
        - Verse range:   "Mt 5:1-10"
        - Whole chapter: "Mk 4"
+       - Chapter range: "Mk 1-3", or across chapters: "Mc 1:40-2:12"
+       - Whole book:    "Mc"
+       - Lists:         "Mc 1:1-8; Lc 3:1-6" (an item without a book continues the previous one: "Mc 1:1-8; 3:1-6")
        - Book aliases:  "Gn" = "Gen" = "Genesis", "Mt" = "Matt", etc.: both French and English abbreviations supported.
+       - Compact forms: "1Co13:4", "Mc1,1", "Gen.1.1" (case and accents are ignored in book names)
+       - Numbering:     references follow the French version (Hebrew numbering); the Greek
+                        of the LXX is looked up through data/versification.json, which only
+                        maps Ps 9-147 and Ml 3:22-24. Elsewhere (e.g. Gn 31:55 / 32:1,
+                        Jr 25-51) the LXX verse of the same number is shown, unaligned.
 
 OPTIONS
        -h, --help
@@ -77,9 +145,12 @@ OPTIONS
               - gr: Greek (N1904 for NT, LXX for OT)
               - hb: Hebrew (BHSA)
 
-       -b, --bible [tob|bj]
+       -b, --bible [tob|bj|tob,bj|all]
               Select the French text version (Translation) to display.
-              Options: 'tob' (default), 'bj'.
+              Options: 'tob' (default), 'bj', a comma-separated list
+              ('tob,bj') or 'all'. With several versions, each one is printed
+              on its own line, tagged [TOB] / [BJ], and the texts are loaded
+              concurrently.
 
        -c, --crossref
               Display list of cross-references for the verse.
@@ -97,6 +168,32 @@ OPTIONS
        -K, --very-compact
               Very compact display: each verse on a new line with no prefix (text only), no blank lines.
 
+       --context N
+              Show N verses before and after a single verse, crossing chapter
+              boundaries, the verse itself marked with ▶. With -k / -K, the
+              chapter of the neighbours is printed when it changes.
+
+       -i, --interlinear
+              Interlinear display under the texts: surface form, lemma, morphology and
+              gloss of each word, in aligned columns. N1904 for the NT, BHSA for the OT.
+
+       --format [text|json|jsonl|html|epub|md]
+              Output format of references. 'json' prints an array of verse records,
+              'jsonl' one record per line, streamed verse by verse. A record carries
+              the verse id, header, requested texts (greek, hebrew, english, french)
+              and, with -c/-f, the notes and relations grouped by type. search prints
+              the records of its hits, diff and synopsis their own records; stats,
+              list, concordance and search --notes are text only.
+              'html', 'epub' and 'md' are the formats of export.
+
+       -o, --output FILE
+              Output file of export.
+
+       --progressive
+              Load the corpora in the background, in parallel. In a terminal, a single
+              verse shows the texts of the corpora already loaded (e.g. TOB) first; the
+              others (BHSA, LXX) fill in their lines, in the usual order, once loaded.
+
 DATA SOURCES
        N1904 (Greek NT)
               Nestle 1904 Greek New Testament. Structure based on Tischendorf.
@@ -131,7 +228,48 @@ EXAMPLES
        tob "Mc 1:1" -f
               Show Mark 1:1 in French with TOB notes and parallels.
 
+       biblecli "Jn 1:1" -t gr -i
+              Greek text of John 1:1 with a word-by-word interlinear.
+
+       biblecli "Mc 1:9" --context 3 -k
+              Mark 1:9 with the three verses before and after it, compact.
+
+       biblecli "Mc 1" -c --format jsonl
+              Mark 1 as one JSON record per verse, with cross-references.
+
+       biblecli "Jn 1:1" -b all
+              John 1:1 in Greek, TOB and BJ.
+
+       biblecli search baptême --rank --top 5 -k
+              Show the five verses most relevant to "baptême", compact.
+
+       biblecli search --notes baptême -s tob
+              Show every TOB note mentioning "baptême".
+
+       biblecli search --align lemma:πνεῦμα fr:souffle
+              Show verses where the Greek has the lemma πνεῦμα and the
+              French text reads "souffle".
+
+       biblecli concordance καί -t gr --sort right
+              Concordance of καί in the Greek texts, sorted by what follows.
+
+       biblecli export --format epub Mc -o marc.epub
+              Mark as an EPUB book, with notes and cross-reference links.
+
+       biblecli diff "Mc 1" tob bj
+              Differences between the TOB and BJ texts of Mark 1.
+
+       biblecli synopsis "Mc 1:1-8"
+              John the Baptist in Mark, next to Matthew and Luke.
+
+       biblecli stats words Mc --corpus n1904 --by chapter --top 5
+              Five most frequent lemmas and type/token ratio of each chapter
+              of Mark.
+
        biblecli list books
               Show all supported book names.
+
+       biblecli list verses Ps 119 --corpus bhsa
+              Verse numbers of Psalm 119 in the Hebrew Bible.
 """
         print(help_text)
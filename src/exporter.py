@@ -0,0 +1,252 @@
+import html
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Export formats (biblecli export --format)
+EXPORT_FORMATS = ('html', 'epub', 'md')
+
+# Chapters rendered ahead of the one being written, per worker
+WINDOW_PER_WORKER = 2
+
+# Text rows of a verse record, in print order, with their language tags
+TEXT_ROWS = [('hebrew', 'he'), ('greek', 'grc'), ('english', 'en'), ('french', 'fr')]
+
+HTML_HEAD = """<!DOCTYPE html>
+<html lang="fr">
+<head>
+<meta charset="utf-8"/>
+<title>{title}</title>
+<style>
+.verse {{ margin: 0.4em 0; }}
+.notes, .relations {{ margin: 0 0 0.6em 1.5em; font-size: 0.9em; }}
+[lang="he"] {{ direction: rtl; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+"""
+
+HTML_TAIL = """</body>
+</html>
+"""
+
+XHTML_HEAD = """<?xml version="1.0" encoding="utf-8"?>
+<!DOCTYPE html>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" lang="fr" xml:lang="fr">
+<head>
+<meta charset="utf-8"/>
+<title>{title}</title>
+</head>
+<body>
+"""
+
+CONTAINER_XML = """<?xml version="1.0" encoding="utf-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+<rootfiles>
+<rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+</rootfiles>
+</container>
+"""
+
+CONTENT_OPF = """<?xml version="1.0" encoding="utf-8"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="uid">
+<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">
+<dc:identifier id="uid">biblecli-{uid}</dc:identifier>
+<dc:title>{title}</dc:title>
+<dc:language>fr</dc:language>
+<meta property="dcterms:modified">2000-01-01T00:00:00Z</meta>
+</metadata>
+<manifest>
+<item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>
+{items}
+</manifest>
+<spine>
+{itemrefs}
+</spine>
+</package>
+"""
+
+
+def anchor(key):
+    """HTML id of a verse key: 'MRK.1.1' -> 'MRK-1-1'."""
+    return key.replace(".", "-")
+
+
+def _verse_rows(record):
+    """(language tag, text) of the texts of a verse record, in print order."""
+    rows = []
+    for field, lang in TEXT_ROWS:
+        if field == 'french' and record.get("translations"):
+            # Several French versions: one row each
+            rows.extend(('fr', text) for text in record["translations"].values() if text)
+        elif record.get(field):
+            rows.append((lang, record[field]))
+    return rows
+
+
+def render_chapter(fmt, chapter):
+    """
+    Text of one chapter in an export format. chapter: {"id", "title", "verses"}
+    with the verse records of the chapter, their relations carrying an "href"
+    (None outside the export). A module-level function of plain data, so that
+    worker processes can run it.
+    """
+    if fmt == 'md':
+        return _render_markdown(chapter)
+    body = _render_html(chapter)
+    if fmt == 'epub':
+        return XHTML_HEAD.format(title=html.escape(chapter["title"])) + body + HTML_TAIL
+    return body
+
+
+def _render_html(chapter):
+    esc = html.escape
+    parts = [f'<section id="{chapter["id"]}">\n<h2>{esc(chapter["title"])}</h2>\n']
+    for record in chapter["verses"]:
+        rows = "<br/>\n".join(f'<span lang="{lang}">{esc(text)}</span>' for lang, text in _verse_rows(record))
+        parts.append(f'<p class="verse" id="{anchor(record["ref"])}"><sup>{record["verse"]}</sup> {rows}</p>\n')
+        if record.get("notes"):
+            notes = "".join(f"<li>{esc(note)}</li>" for note in record["notes"])
+            parts.append(f'<ul class="notes">{notes}</ul>\n')
+        for relation_type, relations in record.get("relations", {}).items():
+            links = []
+            for r in relations:
+                label = esc(r["label"])
+                links.append(f'<a href="{r["href"]}">{label}</a>' if r.get("href") else label)
+            parts.append(f'<p class="relations"><em>{esc(relation_type.capitalize())}:</em> {", ".join(links)}</p>\n')
+    parts.append("</section>\n")
+    return "".join(parts)
+
+
+def _render_markdown(chapter):
+    parts = [f'## {chapter["title"]}\n\n']
+    for record in chapter["verses"]:
+        rows = "  \n".join(text for _, text in _verse_rows(record))
+        parts.append(f'<a id="{anchor(record["ref"])}"></a>**{record["verse"]}** {rows}\n\n')
+        for note in record.get("notes", ()):
+            parts.append(f"> {note}\n\n")
+        for relation_type, relations in record.get("relations", {}).items():
+            links = [f'[{r["label"]}]({r["href"]})' if r.get("href") else r["label"] for r in relations]
+            parts.append(f'*{relation_type.capitalize()}:* {", ".join(links)}\n\n')
+    return "".join(parts)
+
+
+class Exporter:
+    """
+    Export of a book or passage (biblecli export) to HTML, EPUB or Markdown,
+    with the selected texts, the notes and the relations as hyperlinks.
+
+    Verse records are read chapter by chapter (ReferenceHandler.iter_records)
+    and rendered in a pool of worker processes, a bounded number of chapters
+    ahead; each chapter is written to disk as soon as it and the previous ones
+    are rendered, so memory does not grow with the length of the book.
+    """
+    def __init__(self, handler, normalizer, workers=None):
+        self.handler = handler
+        self.normalizer = normalizer
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+
+    def chapters(self, ref_str, **display):
+        """Chapters of a passage in order: {"id", "title", "book", "chapter", "verses"}, built lazily."""
+        current = None
+        for record in self.handler.iter_records(ref_str, show_crossref=True, **display):
+            key = (record["book"], record["chapter"])
+            if not current or (current["book"], current["chapter"]) != key:
+                if current:
+                    yield current
+                book = self.normalizer.books.get(record["book"])
+                current = {
+                    "id": f"{record['book']}-{record['chapter']}",
+                    "title": f"{book.fr_label if book else record['book']} {record['chapter']}",
+                    "book": record["book"],
+                    "chapter": record["chapter"],
+                    "verses": [],
+                }
+            current["verses"].append(record)
+        if current:
+            yield current
+
+    def _link(self, target, spans, fmt):
+        """Link of a relation target ('MAT.3.1' or 'MAT.3.1-MAT.3.6'), None when outside the export."""
+        key = target.split("-")[0]
+        vid = self.normalizer.verse_id_from_key(key)
+        if not vid or not any(span.start <= vid <= span.end for span in spans):
+            return None
+        if fmt == 'epub':
+            code, chapter, _ = self.normalizer.split_verse_id(vid)
+            return f"{code}-{chapter}.xhtml#{anchor(key)}"
+        return f"#{anchor(key)}"
+
+    def _rendered(self, ref_str, fmt, display):
+        """(chapter, rendered text) in order, rendered ahead in worker processes."""
+        spans = self.normalizer.parse_passage(ref_str) or ()
+
+        def prepared():
+            for chapter in self.chapters(ref_str, **display):
+                for record in chapter["verses"]:
+                    for relations in record.get("relations", {}).values():
+                        for r in relations:
+                            r["href"] = self._link(r["target"], spans, fmt)
+                yield chapter
+
+        if self.workers <= 1:
+            for chapter in prepared():
+                yield chapter, render_chapter(fmt, chapter)
+            return
+
+        window = deque()
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            for chapter in prepared():
+                window.append((chapter, pool.submit(render_chapter, fmt, chapter)))
+                if len(window) >= self.workers * WINDOW_PER_WORKER:
+                    done, future = window.popleft()
+                    yield done, future.result()
+            while window:
+                done, future = window.popleft()
+                yield done, future.result()
+
+    def export(self, ref_str, fmt, path, **display):
+        """Write the passage to path. Returns the number of chapters written."""
+        # Whole book: titled with its name
+        title = ref_str
+        spans = self.normalizer.parse_passage(ref_str)
+        if spans and len(spans) == 1:
+            END = self.normalizer.VERSE_END
+            code = self.normalizer.split_verse_id(spans[0].start)[0]
+            book = self.normalizer.books.get(code)
+            if book and spans[0] == (self.normalizer.verse_id(code, 1, 1), self.normalizer.verse_id(code, END, END)):
+                title = book.fr_label
+
+        if fmt == 'epub':
+            return self._export_epub(ref_str, path, title, display)
+
+        count = 0
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(HTML_HEAD.format(title=html.escape(title)) if fmt == 'html' else f"# {title}\n\n")
+            for _, text in self._rendered(ref_str, fmt, display):
+                f.write(text)
+                count += 1
+            if fmt == 'html':
+                f.write(HTML_TAIL)
+        return count
+
+    def _export_epub(self, ref_str, path, title, display):
+        # EPUB: a zip whose first entry is the uncompressed mimetype
+        entries = []
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr(zipfile.ZipInfo("mimetype"), "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+            zf.writestr("META-INF/container.xml", CONTAINER_XML)
+            for chapter, text in self._rendered(ref_str, 'epub', display):
+                zf.writestr(f"OEBPS/{chapter['id']}.xhtml", text)
+                entries.append((chapter["id"], chapter["title"]))
+
+            esc = html.escape
+            nav = "\n".join(f'<li><a href="{cid}.xhtml">{esc(ctitle)}</a></li>' for cid, ctitle in entries)
+            zf.writestr("OEBPS/nav.xhtml", XHTML_HEAD.format(title=esc(title))
+                        + f'<nav epub:type="toc" id="toc"><h1>{esc(title)}</h1>\n<ol>\n{nav}\n</ol></nav>\n' + HTML_TAIL)
+            items = "\n".join(f'<item id="c-{cid}" href="{cid}.xhtml" media-type="application/xhtml+xml"/>' for cid, _ in entries)
+            itemrefs = "\n".join(f'<itemref idref="c-{cid}"/>' for cid, _ in entries)
+            zf.writestr("OEBPS/content.opf", CONTENT_OPF.format(uid=esc(anchor(ref_str.replace(" ", "_"))), title=esc(title), items=items, itemrefs=itemrefs))
+        return len(entries)
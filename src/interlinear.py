@@ -0,0 +1,134 @@
+import shutil
+
+from output_writer import display_width
+
+# Rows of the interlinear display, in order
+ROWS = ['surface', 'lemma', 'morph', 'gloss']
+
+# Word features of each row, per corpus. A row lists alternatives, the first
+# non-empty value wins; an alternative is a feature name, a tuple of features
+# joined with '.', or 'otype.feature' for a feature of the containing object.
+FEATURES = {
+    'n1904': {
+        'surface': ['text'],
+        'lemma': ['lemma'],
+        'morph': ['morph'],
+        'gloss': ['trans', 'gloss'],
+    },
+    'bhsa': {
+        'surface': ['g_word_utf8'],
+        'lemma': ['lex_utf8'],
+        'morph': [('sp', 'vs', 'vt', 'ps', 'gn', 'nu')],
+        'gloss': ['lex.gloss'],
+    },
+}
+
+# Feature values meaning "not applicable", left out of the joined morphology
+EMPTY_VALUES = {None, '', 'NA', 'na', 'n/a', 'absent', 'unknown'}
+
+
+class Interlinear:
+    """
+    Per-word features (surface / lemma / morph / gloss) of verses.
+    The words of a verse are a contiguous range of slots, so each feature is
+    resolved once into a list indexed by slot and a verse costs one slice per
+    feature, instead of one F.x.v(w) call (and hasattr check) per word.
+    The resolved lists are cached for the life of the process.
+    """
+    def __init__(self):
+        # (id(api), feature) -> list indexed by slot, None for features without data dict
+        self._arrays = {}
+
+    def slot_range(self, api, node):
+        """First and last slot of a node."""
+        slots = api.E.oslots.s(node)
+        return slots[0], slots[-1]
+
+    def _array(self, api, name):
+        key = (id(api), name)
+        if key in self._arrays:
+            return self._arrays[key]
+
+        array = None
+        otype, _, feature = name.rpartition('.')
+        F = api.F
+        if hasattr(F, feature):
+            max_slot = F.otype.maxSlot
+            if otype:
+                # Feature of the containing object (BHSA lexemes): spread over its words
+                array = [None] * (max_slot + 1)
+                for obj in F.otype.s(otype):
+                    value = getattr(F, feature).v(obj)
+                    for w in api.L.d(obj, otype='word'):
+                        array[w] = value
+            else:
+                data = getattr(getattr(F, feature), 'data', None)
+                if isinstance(data, dict):
+                    array = [None] * (max_slot + 1)
+                    for n, value in data.items():
+                        if n <= max_slot:
+                            array[n] = value
+        self._arrays[key] = array
+        return array
+
+    def _feature(self, api, name, first, last):
+        array = self._array(api, name)
+        if array is not None:
+            return array[first:last + 1]
+        otype, _, feature = name.rpartition('.')
+        if otype or not hasattr(api.F, feature):
+            return [None] * (last - first + 1)
+        # Features without a data dict: one lookup per slot
+        fv = getattr(api.F, feature).v
+        return [fv(w) for w in range(first, last + 1)]
+
+    def column(self, api, alternatives, first, last):
+        """Values of a row for the slots first..last (first non-empty alternative)."""
+        column = None
+        for alternative in alternatives:
+            if isinstance(alternative, tuple):
+                parts = [self._feature(api, name, first, last) for name in alternative]
+                values = [".".join(str(v) for v in word if v not in EMPTY_VALUES) or None for word in zip(*parts)]
+            else:
+                values = self._feature(api, alternative, first, last)
+            column = values if column is None else [a or b for a, b in zip(column, values)]
+        return column
+
+    def words(self, api, node, corpus):
+        """[{surface, lemma, morph, gloss}] of the words of a verse node."""
+        first, last = self.slot_range(api, node)
+        columns = [self.column(api, FEATURES[corpus][row], first, last) for row in ROWS]
+        return [dict(zip(ROWS, values)) for values in zip(*columns)]
+
+
+def format_interlinear(words, width=None, indent=""):
+    """
+    Aligned rows, one column per word, wrapped at the terminal width:
+    a block of len(ROWS) lines per group of words, blank line between blocks.
+    """
+    if width is None:
+        width = shutil.get_terminal_size().columns
+    cells = [[str(word.get(row) or "-") for row in ROWS] for word in words]
+    lines = []
+    block = []
+    used = len(indent)
+    for cell in cells:
+        size = max(display_width(c) for c in cell) + 2
+        if block and used + size > width:
+            lines.extend(_block_lines(block, indent))
+            lines.append("")
+            block = []
+            used = len(indent)
+        block.append((cell, size))
+        used += size
+    if block:
+        lines.extend(_block_lines(block, indent))
+    return lines
+
+
+def _block_lines(block, indent):
+    rows = []
+    for i in range(len(ROWS)):
+        row = "".join(cell[i] + " " * (size - display_width(cell[i])) for cell, size in block)
+        rows.append(indent + row.rstrip())
+    return rows
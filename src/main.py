@@ -8,8 +8,18 @@ import contextlib
 # Import new DB module
 from book_normalizer import BookNormalizer
 from references_db import ReferenceDatabase
-from verse_printer import VersePrinter
+from verse_printer import VersePrinter, FRENCH_VERSIONS, french_versions
 from reference_handler import ReferenceHandler
+from search_handler import SearchHandler, verse_text_feature, verse_text_words, verse_text_section, verse_lemmas
+from notes_index import NotesIndex
+from search_cache import SearchCache
+from canon_metadata import CanonMetadata, CORPORA
+from versification import Versification
+from output_writer import OutputWriter
+from progressive import ProgressiveRenderer, serialized
+from synopsis import SynopsisHandler
+from translation_diff import TranslationDiff
+from exporter import Exporter, EXPORT_FORMATS
 from cli_help import CLIHelp
 
 # Configuration
@@ -17,16 +27,33 @@ from cli_help import CLIHelp
 BIBLECLI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 TOB_DIR = os.path.expanduser("~/text-fabric-data/TOB/1.0/")
 BJ_DIR = os.path.expanduser("~/text-fabric-data/BJ/1.0/")
+N1904_DIR = os.path.expanduser("~/text-fabric-data/github/CenterBLC/N1904/tf/1.0.0")
+LXX_DIR = os.path.expanduser("~/text-fabric-data/github/CenterBLC/LXX/tf/1935")
 
 # Initialize Managers
 DATA_DIR = os.path.join(BIBLECLI_DIR, "data")
-normalizer = BookNormalizer(DATA_DIR)
+CACHE_DIR = os.path.join(BIBLECLI_DIR, ".cache")
+METADATA_PATH = os.path.join(CACHE_DIR, "canon_metadata.json")
+VERSIFICATION_PATH = os.path.join(DATA_DIR, "versification.json")
+normalizer = BookNormalizer(DATA_DIR, CACHE_DIR)
 ref_db = ReferenceDatabase(DATA_DIR, normalizer)
+# Chapter / verse counts of every corpus, recorded the first time each corpus is loaded
+metadata = CanonMetadata(METADATA_PATH)
+# Verse numbering differences between the Greek and Hebrew based corpora (Psalms, Malachi...)
+versification = Versification(VERSIFICATION_PATH, normalizer)
+# Search indexes persisted per corpus: (version, directory of the source files)
+search_cache = SearchCache(CACHE_DIR, {
+    'tob': ("1.0", TOB_DIR),
+    'bj': ("1.0", BJ_DIR),
+    'n1904': ("1.0.0", N1904_DIR),
+    'lxx': ("1935", LXX_DIR),
+})
 
 # TOB Lazy Load
 _tob_api_instance = None
 _tob_loaded = False
 
+@serialized
 def get_tob_app():
     global _tob_api_instance, _tob_loaded
     if _tob_loaded:
@@ -38,6 +65,7 @@ def get_tob_app():
             with open(os.devnull, 'w') as f, contextlib.redirect_stdout(f):
                 TF_TOB = Fabric(locations=[TOB_DIR], silent=True)
                 _tob_api_instance = TF_TOB.load('text book chapter verse', silent=True)
+            metadata.record('tob', _tob_api_instance, normalizer.code_from_label)
         else:
             _tob_api_instance = None
     except Exception as e:
@@ -48,6 +76,7 @@ def get_tob_app():
 _bj_api_instance = None
 _bj_loaded = False
 
+@serialized
 def get_bj_app():
     global _bj_api_instance, _bj_loaded
     if _bj_loaded:
@@ -63,6 +92,7 @@ def get_bj_app():
             with open(os.devnull, 'w') as f, contextlib.redirect_stdout(f):
                  TF_BJ = Fabric(locations=[BJ_DIR], silent=True)
                  _bj_api_instance = TF_BJ.load('text book chapter verse', silent=True)
+            metadata.record('bj', _bj_api_instance, normalizer.code_from_label)
         else:
              _bj_api_instance = None
     except Exception as e:
@@ -74,57 +104,58 @@ def get_bj_app():
 printer = None
 
 class OfflineLXXApp:
+    # Versification scheme of the corpus (see Versification)
+    corpus = 'lxx'
+
     def __init__(self, api, normalizer):
         self.api = api
         self.normalizer = normalizer
         # LXX app expects specific book names (e.g. "2Kgs")
-        # These are now handled via aliases in bible_books.json
-        # The normalizer's `get_lxx_abbr` method is used to retrieve the correct abbreviation.
-        
-    def nodeFromSectionStr(self, ref_str):
-        # We need to parse ref_str -> Book, Chapter, Verse
-        # ReferenceHandler typically passes things like "Genesis 1:1"
+        # These are handled via aliases in bible_books.json: the label that the
+        # corpus actually uses is resolved once per book code, here at load.
+        self.book_labels = self._book_label_table()
+
+    def _book_label_table(self):
+        """Book code -> LXX section label, for every book present in the corpus."""
+        T = self.api.T
+        F = self.api.F
+        present = {T.sectionFromNode(book)[0] for book in F.otype.s('book')}
+
+        table = {}
+        for code, book in self.normalizer.books.items():
+            abbreviations = book.abbreviations
+            # Candidates: every abbreviation (canonical first), their spacerless
+            # versions (e.g. "2 Sam" -> "2Sam", TF may require them), then the code.
+            candidates = list(abbreviations)
+            candidates.extend(abbr.replace(" ", "") for abbr in abbreviations if " " in abbr)
+            candidates.append(code)
+            for label in candidates:
+                if label in present:
+                    table[code] = label
+                    break
+        return table
+
+    def nodeFromSectionStr(self, ref):
+        # ref is a ParsedReference passed down by ReferenceHandler / VersePrinter,
+        # or a plain string (e.g. "Genesis 1:1") parsed once by the normalizer.
         try:
-            # Use normalizer to get code
-            norm = self.normalizer.normalize_reference(ref_str)
+            norm = self.normalizer.parse_reference(ref)
             if not norm:
                 return None
             
             code, ch, vs, _ = norm
             
-            # LXX uses strict book names. We need to find the one that works.
-            # We try all candidates from the abbreviations list.
-            candidates = []
-            
-            # Get all abbreviations (canonical is first)
-            abbreviations = self.normalizer.code_to_abbreviations.get(code, [])
-            candidates.extend(abbreviations)
-            
-            # Also try spacerless versions of abbreviations (e.g. "2 Sam" -> "2Sam")
-            # This is important because we removed redundant spacerless aliases from JSON
-            # but TF might require the spacerless version (e.g. "2Sam").
-            spacerless = [abbr.replace(" ", "") for abbr in abbreviations if " " in abbr]
-            candidates.extend(spacerless)
-            
-            # Code itself (fallback)
-            candidates.append(code)
+            # One lookup with the precomputed label; books absent from the LXX fail fast.
+            label = self.book_labels.get(code)
+            if not label:
+                return None
 
-            # Try candidates until one returns a node.
-            for abbr in candidates:
-                # API expects string for book name in section tuple
-                if vs > 0:
-                     node = self.api.T.nodeFromSection((abbr, ch, vs))
-                elif ch > 0:
-                     node = self.api.T.nodeFromSection((abbr, ch))
-                else:
-                     node = self.api.T.nodeFromSection((abbr,))
-                
-                # Check if valid node returned (TF returns None or sometimes 0 if not found?)
-                # nodeFromSection usually returns None if not found, or a node int.
-                if node:
-                    return node
-            
-            return None
+            # API expects string for book name in section tuple
+            if vs > 0:
+                 return self.api.T.nodeFromSection((label, ch, vs))
+            elif ch > 0:
+                 return self.api.T.nodeFromSection((label, ch))
+            return self.api.T.nodeFromSection((label,))
             
         except Exception as e:
             # print(f"OfflineLXX lookup error: {e}")
@@ -132,21 +163,24 @@ class OfflineLXXApp:
 
 
 class OfflineBHSAApp:
+    corpus = 'bhsa'
+
     def __init__(self, api, normalizer):
         self.api = api
         self.normalizer = normalizer
 
-    def nodeFromSectionStr(self, ref_str):
-        # Similar to LXX, we need to map normalize reference to BHSA book format
+    def nodeFromSectionStr(self, ref):
+        # Similar to LXX, we need to map the parsed reference to BHSA book format
         try:
-            norm = self.normalizer.normalize_reference(ref_str)
+            norm = self.normalizer.parse_reference(ref)
             if not norm: return None
             
             code, ch, vs, _ = norm
             
             # Get BHSA book label
-            bhsa_book = self.normalizer.code_to_bhsa.get(code)
-            if not bhsa_book: return None
+            book = self.normalizer.books.get(code)
+            if not book: return None
+            bhsa_book = book.bhsa_label
             
             if vs > 0:
                  node = self.api.T.nodeFromSection((bhsa_book, ch, vs))
@@ -159,24 +193,116 @@ class OfflineBHSAApp:
         except Exception:
             return None
 
-def handle_list(A, args):
-    api = A.api
-    F = api.F
-    N = api.N
-    
-    if not args:
-        print("Error: Missing argument for 'list'. Available: 'books'")
+def handle_list(args):
+    # Answered from the canon metadata: a corpus is only loaded the first
+    # time it is listed, to record its structure.
+    if not args.args:
+        print("Error: Missing argument for 'list'. Available: 'books', 'chapters BOOK', 'verses BOOK CHAPTER'")
         return
 
-    subcommand = args[0]
-    
+    subcommand = args.args[0]
+    corpus = args.corpus
+    if corpus and corpus not in CORPORA:
+        print(f"Error: Unknown corpus '{corpus}'. Available: {', '.join(CORPORA)}")
+        return
+
+    def ensure(corpus):
+        if not metadata.has(corpus):
+            get_corpus_api(corpus)
+        return metadata.has(corpus)
+
+    def label(code, corpus=None):
+        book = normalizer.books.get(code)
+        if not book:
+            return code
+        return f"{book.bj_label if corpus == 'bj' else book.fr_label} / {book.en_label}"
+
     if subcommand == "books":
-        print("Available books:")
-        for node in N.walk():
-            if F.otype.v(node) == 'book':
-                print(F.book.v(node))
-    else:
+        corpora = [corpus] if corpus else [c for c in CORPORA if metadata.has(c)] or ['n1904']
+        corpora = [c for c in corpora if ensure(c)]
+        if not corpora:
+            print(f"Error: Could not load {corpus or 'n1904'}.")
+            return
+        if corpus:
+            codes = metadata.books(corpus)
+        else:
+            codes = sorted({code for c in corpora for code in metadata.books(c)}, key=lambda code: normalizer.book_order.get(code, len(normalizer.book_order)))
+
+        print(f"Available books ({', '.join(corpora)}):")
+        for code in codes:
+            chapters = max(metadata.chapter_count(c, code) for c in corpora)
+            book = normalizer.books.get(code)
+            abbr = (book.fr_abbr if book else None) or code
+            print(f"{code:<4} {abbr:<5} {label(code, corpus)} ({chapters} ch.)")
+        return
+
+    if subcommand not in ("chapters", "verses"):
         print(f"Unknown list command: {subcommand}")
+        return
+
+    book_code, rest = normalizer.parser.match_book(" ".join(args.args[1:]))
+    if not book_code:
+        print(f"Error: Unknown book '{' '.join(args.args[1:])}'")
+        return
+    if not corpus:
+        corpus = 'n1904' if normalizer.is_nt(book_code) else 'lxx'
+    if not ensure(corpus):
+        print(f"Error: Could not load {corpus}.")
+        return
+
+    counts = metadata.verse_counts(corpus, book_code)
+    if not counts:
+        print(f"Error: {label(book_code, corpus)} is not in {corpus}.")
+        return
+
+    if subcommand == "chapters":
+        print(f"{label(book_code, corpus)} ({corpus}): {len(counts)} chapters")
+        for chapter, n_verses in counts.items():
+            print(f"{chapter:>4}  {n_verses} verses")
+        return
+
+    try:
+        chapter = int(rest.strip(" .:"))
+    except ValueError:
+        print("Error: Usage: list verses BOOK CHAPTER")
+        return
+    n_verses = counts.get(chapter)
+    if not n_verses:
+        print(f"Error: {label(book_code, corpus)} has no chapter {chapter} in {corpus}.")
+        return
+    print(f"{label(book_code, corpus)} {chapter} ({corpus}): {n_verses} verses")
+    print(" ".join(str(v) for v in range(1, n_verses + 1)))
+
+def handle_stats(args):
+    if not args.args or args.args[0] != "words":
+        print("Error: Unknown stats command. Available: 'words'")
+        return
+
+    # Optional book restriction: biblecli stats words Mc
+    book_code = None
+    if len(args.args) > 1:
+        norm = normalizer.normalize_reference(" ".join(args.args[1:]) + " 1")
+        if not norm:
+            print(f"Error: Unknown book '{' '.join(args.args[1:])}'")
+            return
+        book_code = norm[0]
+
+    corpus = args.corpus
+    if not corpus:
+        corpus = 'lxx' if book_code and normalizer.is_ot(book_code) else 'n1904'
+    providers = {'n1904': get_n1904_app, 'lxx': get_lxx_app, 'bhsa': get_bhsa_app}
+    if corpus not in providers:
+        print(f"Error: Unknown corpus '{corpus}'. Available: n1904, lxx, bhsa")
+        return
+
+    app = providers[corpus]()
+    if not app:
+        print(f"Error: Could not load {corpus}.")
+        return
+
+    # NumPy is only needed here: keep it out of the common startup path
+    from word_stats import WordStats
+    WordStats(app.api, normalizer).print_stats(by=args.by, kind=args.feature, top=args.top, book_code=book_code)
 
 def handle_add(args):
     # args matches the structure added in main: collection, source, target, type, note
@@ -198,10 +324,120 @@ def handle_add(args):
     except Exception as e:
         print(f"Unexpected error: {e}")
 
+def get_searcher(handler):
+    def api_of(provider):
+        # N1904 / LXX providers return apps wrapping the TF api
+        def get_api():
+            app = provider()
+            return app.api if app else None
+        return get_api
+
+    corpora = {
+        'tob': (get_tob_app, verse_text_feature),
+        'bj': (get_bj_app, verse_text_words),
+        'n1904': (api_of(get_n1904_app), verse_text_section),
+        'lxx': (api_of(get_lxx_app), verse_text_section),
+        'n1904.lemma': (api_of(get_n1904_app), verse_lemmas),
+        'lxx.lemma': (api_of(get_lxx_app), verse_lemmas),
+    }
+    return SearchHandler(corpora, normalizer, handler, NotesIndex(ref_db, CACHE_DIR), search_cache)
+
+def handle_search(args, handler, french_version, compact_mode, show_english, show_greek, show_french, show_hebrew, show_crossref, cross_refs):
+    searcher = get_searcher(handler)
+    if args.notes:
+        searcher.handle_notes_search(" ".join(args.args), source_filter=args.crossref_source, compact_mode=compact_mode)
+        return
+
+    display = dict(
+        show_english=show_english,
+        show_greek=show_greek,
+        show_french=show_french,
+        show_hebrew=show_hebrew,
+        show_crossref=show_crossref,
+        cross_refs=cross_refs,
+        show_crossref_text=args.crossref_full,
+    )
+    if args.align:
+        searcher.handle_align_search(args.args, french_version=french_version, compact_mode=compact_mode, **display)
+        return
+
+    searcher.handle_search(
+        " ".join(args.args),
+        langs=args.tr,
+        ranked=args.rank,
+        top=args.top,
+        french_version=french_version,
+        compact_mode=compact_mode,
+        **display,
+    )
+
+def load_collections(args, ref_str, versions):
+    # Cross-reference collections of the testament of the passage (-s filters them, -b hints)
+    spans = normalizer.parse_passage(ref_str) or ()
+    book_codes = {normalizer.split_verse_id(span.start)[0] for span in spans}
+    scope = 'all'
+    if book_codes and all(normalizer.is_nt(code) for code in book_codes):
+        scope = 'nt'
+    elif book_codes and all(normalizer.is_ot(code) for code in book_codes):
+        scope = 'ot'
+    ref_db.load_all(source_filter=args.crossref_source or (versions[0] if args.bible and len(versions) == 1 else None), scope=scope)
+
+def handle_synopsis(args, handler, french_version):
+    ref_str = " ".join(args.args)
+    if not ref_str:
+        print("Usage: biblecli synopsis REFERENCE")
+        return
+    # Parallels come from the cross-reference collections
+    versions = french_versions(french_version)
+    load_collections(args, ref_str, versions)
+
+    # French text by default (every -b version), Greek alongside with -t gr
+    corpora = list(versions)
+    if args.tr and "gr" in args.tr:
+        corpora = ['n1904'] + (corpora if "fr" in args.tr else [])
+    SynopsisHandler(normalizer, ref_db, handler.printer, metadata=metadata, reference_handler=handler).handle_synopsis(ref_str, corpora=tuple(corpora))
+
+def handle_export(args, handler, french_version, show_english, show_greek, show_french, show_hebrew):
+    ref_str = " ".join(args.args)
+    if not ref_str or not normalizer.parse_passage(ref_str):
+        print("Usage: biblecli export --format html|epub|md BOOK_OR_PASSAGE [-o FILE]")
+        return
+    fmt = args.format if args.format in EXPORT_FORMATS else 'html'
+    # Default file: the passage, e.g. "Mc.html", in the current directory
+    path = args.output or "".join(c if c.isalnum() else "_" for c in ref_str) + "." + fmt
+
+    # Notes and relations of the exported texts
+    load_collections(args, ref_str, french_versions(french_version))
+    count = Exporter(handler, normalizer).export(
+        ref_str, fmt, path,
+        show_english=show_english,
+        show_greek=show_greek,
+        show_french=show_french,
+        show_hebrew=show_hebrew,
+        show_crossref_text=args.crossref_full,
+        french_version=french_version,
+    )
+    print(f"{count} chapter(s) written to {path}")
+
+def handle_diff(args, printer):
+    # biblecli diff REFERENCE [VERSION_A VERSION_B]: the versions default to TOB and BJ
+    words = list(args.args)
+    versions = []
+    while words and words[-1].lower() in FRENCH_VERSIONS and len(versions) < 2:
+        versions.insert(0, words.pop().lower())
+    ref_str = " ".join(words)
+    if not ref_str:
+        print("Usage: biblecli diff REFERENCE [tob bj]")
+        return
+    if len(versions) < 2:
+        versions = ['tob', 'bj']
+    TranslationDiff(normalizer, printer).handle_diff(ref_str, versions[0], versions[1])
+
 # Lazy Load N1904
 _n1904_app_instance = None
 _n1904_loaded = False
 
+@serialized
 def get_n1904_app():
     global _n1904_app_instance, _n1904_loaded
     if _n1904_loaded:
@@ -212,6 +448,8 @@ def get_n1904_app():
          with open(os.devnull, 'w') as f, contextlib.redirect_stdout(f):
               # use returns an App instance
               _n1904_app_instance = use("CenterBLC/N1904", version="1.0.0", silent=True)
+              if _n1904_app_instance:
+                  metadata.record('n1904', _n1904_app_instance.api, normalizer.code_from_label)
     except Exception as e:
          _n1904_app_instance = None
     return _n1904_app_instance
@@ -220,6 +458,7 @@ def get_n1904_app():
 _lxx_app_instance = None
 _lxx_loaded = False
 
+@serialized
 def get_lxx_app():
     global _lxx_app_instance, _lxx_loaded
     if _lxx_loaded:
@@ -229,7 +468,7 @@ def get_lxx_app():
     try:
         with open(os.devnull, 'w') as f, contextlib.redirect_stdout(f):
              # Load LXX (Manual Offline Priority)
-            lxx_path = os.path.expanduser("~/text-fabric-data/github/CenterBLC/LXX/tf/1935")
+            lxx_path = LXX_DIR
             if os.path.exists(lxx_path):
                  try:
                      # We need to manually construct the API similar to 'use' but offline
@@ -258,6 +497,8 @@ def get_lxx_app():
                          _lxx_app_instance = OfflineLXXApp(LXX_tf_app.api, normalizer)
                  except Exception:
                      _lxx_app_instance = None
+        if _lxx_app_instance:
+            metadata.record('lxx', _lxx_app_instance.api, normalizer.code_from_label)
     except Exception as e:
         # print(f"Error lazy loading LXX: {e}")
         _lxx_app_instance = None
@@ -268,6 +509,7 @@ def get_lxx_app():
 _bhsa_app_instance = None
 _bhsa_loaded = False
 
+@serialized
 def get_bhsa_app():
     global _bhsa_app_instance, _bhsa_loaded
     if _bhsa_loaded:
@@ -282,11 +524,22 @@ def get_bhsa_app():
               bhsa = use("ETCBC/bhsa", version="2021", silent=True)
               if bhsa:
                   _bhsa_app_instance = OfflineBHSAApp(bhsa.api, normalizer)
+                  metadata.record('bhsa', bhsa.api, normalizer.code_from_label)
     except Exception as e:
          _bhsa_app_instance = None
          
     return _bhsa_app_instance
 
+def get_corpus_api(corpus):
+    """Text-Fabric api of a corpus by name (n1904, lxx, bhsa, tob, bj), or None."""
+    if corpus == 'tob':
+        return get_tob_app()
+    if corpus == 'bj':
+        return get_bj_app()
+    providers = {'n1904': get_n1904_app, 'lxx': get_lxx_app, 'bhsa': get_bhsa_app}
+    app = providers[corpus]() if corpus in providers else None
+    return app.api if app else None
+
 def main():
     parser = argparse.ArgumentParser(description="N1904 CLI Tool", add_help=False)
     parser.add_argument("-h", "--help", action="store_true", help="Show this help message and exit")
@@ -313,16 +566,29 @@ def main():
     parser.add_argument("args", nargs="*", help="Arguments for the command")
     # Remove choices from argparse to prevent error on greedy consumption of positional args
     parser.add_argument("-t", "--tr", nargs="+", help="Translations (en, fr, gr, hb)")
-    parser.add_argument("-b", "--bible", help="Select French Text Version (tob, bj)")
+    parser.add_argument("-b", "--bible", help="French text version: tob, bj, a list (tob,bj) or all")
     parser.add_argument("-c", "--crossref", action="store_true", help="Display cross-references")
     parser.add_argument("-f", "--crossref-full", action="store_true", help="Display cross-references with text")
     parser.add_argument("-s", "--crossref-source", help="Filter cross-references by source")
     parser.add_argument("-k", "--compact", action="store_true", help="Compact display (vX. Text)")
     parser.add_argument("-K", "--very-compact", action="store_true", help="Very compact display (Text only)")
+    parser.add_argument("-i", "--interlinear", action="store_true", help="Interlinear display: surface, lemma, morphology and gloss of each word (N1904, BHSA)")
+    parser.add_argument("--context", type=int, default=0, help="Verses shown before and after a single verse, the verse itself highlighted")
+    parser.add_argument("--progressive", action="store_true", help="Print the texts of the corpora already loaded first, while the others load")
+    parser.add_argument("--format", choices=["text", "json", "jsonl"] + list(EXPORT_FORMATS), default="text", help="Output format of references (json/jsonl: one record per verse), html/epub/md for export")
+    parser.add_argument("-o", "--output", help="Output file of export")
+    parser.add_argument("--rank", action="store_true", help="Rank search results by relevance (BM25)")
+    parser.add_argument("--top", type=int, default=10, help="Number of ranked search results")
+    parser.add_argument("--notes", action="store_true", help="Search the cross-reference notes instead of the texts")
+    parser.add_argument("--align", action="store_true", help="Aligned search: verses matching every SOURCE:TERMS clause")
+    parser.add_argument("--width", type=int, default=30, help="Concordance context width (characters)")
+    parser.add_argument("--sort", choices=["book", "left", "right"], default="book", help="Concordance order")
+    parser.add_argument("--corpus", help="Corpus for statistics (n1904, lxx, bhsa) and listings (also tob, bj)")
+    parser.add_argument("--by", choices=["book", "chapter"], default="chapter", help="Statistics section level")
+    parser.add_argument("--feature", choices=["lemma", "surface"], default="lemma", help="Count lemmas or surface forms")
     
-    args = parser.parse_args()
-
-    args = parser.parse_args()
+    # Intermixed so that command arguments may follow options (e.g. `search --notes TERM`)
+    args = parser.parse_intermixed_args()
 
     # Manual handling for greedy --tr argument
     if args.tr:
@@ -350,18 +616,22 @@ def main():
         return
 
     first_arg = args.command_or_ref
-    
-    if first_arg == "search":
-        print("done.")
+
+    # Listings, statistics, concordances and notes are not verse records
+    if args.format in ("json", "jsonl") and (first_arg in ("stats", "list", "concordance") or (first_arg == "search" and args.notes)):
+        print(f"Error: --format {args.format} is not available with '{first_arg}{' --notes' if args.notes else ''}'")
         return
     
+    if first_arg == "stats":
+        handle_stats(args)
+        return
+
     if first_arg == "list":
-        app = get_n1904_app()
-        if not app:
-            print("Error: Could not load N1904 for listing commands.")
-            sys.exit(1)
-        
-        handle_list(app, args.args)
+        handle_list(args)
+        return
+
+    if args.format in EXPORT_FORMATS and first_arg != "export":
+        print(f"Error: --format {args.format} is only available with 'export'")
         return
 
 
@@ -374,10 +644,12 @@ def main():
     # Initialize global printer
     global printer
     global printer
-    printer = VersePrinter(get_tob_app, get_n1904_app, normalizer, ref_db, get_bhsa_app, get_bj_app)
+    # One buffered writer for the whole rendering pipeline
+    out = OutputWriter()
+    printer = VersePrinter(get_tob_app, get_n1904_app, normalizer, ref_db, get_bhsa_app, get_bj_app, versification, writer=out, output_format=args.format)
     
     # Initialize Handler with Lazy Provider
-    handler = ReferenceHandler(get_n1904_app, get_lxx_app, get_bhsa_app, normalizer, printer)
+    handler = ReferenceHandler(get_n1904_app, get_lxx_app, get_bhsa_app, normalizer, printer, metadata=metadata, writer=out, output_format=args.format, versification=versification)
     
     if args.tr:
         # Reset provided defaults if explicit flags used
@@ -394,14 +666,8 @@ def main():
     cross_refs = None
     show_crossref = args.crossref or args.crossref_full
     if show_crossref:
-        book_key = first_arg.split()[0]
-        if book_key in ["1", "2", "3", "I", "II", "III"]:
-             parts = first_arg.split()
-             if len(parts) > 1:
-                 book_key = f"{parts[0]} {parts[1]}"
-        
-        resolved = normalizer.abbreviations.get(book_key, book_key)
-        book_code = normalizer.n1904_to_code.get(resolved) or normalizer.n1904_to_code.get(resolved.replace(" ", "_"))
+        spans = normalizer.parse_passage(first_arg) or ()
+        book_codes = {normalizer.split_verse_id(span.start)[0] for span in spans}
         
         # Determine source filter logic
         # Default source_filter is None (all)
@@ -409,16 +675,16 @@ def main():
         
         # Smart default: if no -s provided, but -b provided, use -b as source hint
         # This allows `biblecli "Mc 1:1" -b tob -c` to show TOB notes.
-        if not source_filter and args.bible:
+        if not source_filter and args.bible and len(french_versions(args.bible)) == 1:
              source_filter = args.bible
         
         # Determine Scope (NT/OT)
         scope = 'all'
-        # We can use normalizer on book_code to be precise
-        if book_code:
-            if normalizer.is_nt(book_code):
+        # We can use normalizer on the book codes of the passage to be precise
+        if book_codes:
+            if all(normalizer.is_nt(code) for code in book_codes):
                  scope = 'nt'
-            elif normalizer.is_ot(book_code):
+            elif all(normalizer.is_ot(code) for code in book_codes):
                  scope = 'ot'
 
         ref_db.load_all(source_filter=source_filter, scope=scope)
@@ -428,7 +694,13 @@ def main():
     # Determine French Version
     french_version = 'tob'
     if args.bible:
-        french_version = args.bible.lower()
+        # -b all / -b tob,bj: every listed version, the first one numbering the passage
+        versions = french_versions(args.bible)
+        unknown = [v for v in versions if v not in FRENCH_VERSIONS]
+        if unknown:
+            print(f"Error: Unknown French version '{unknown[0]}'. Available: {', '.join(FRENCH_VERSIONS)}, all")
+            return
+        french_version = versions if len(versions) > 1 else versions[0]
     elif args.crossref_source and args.crossref_source.lower() == 'bj':
          # Fallback for backward compatibility? Or STRICT separation?
          # User requested: "change the behaviour: -b is now for selecting French Text... and -s is for source... only".
@@ -442,7 +714,34 @@ def main():
     elif args.compact:
         compact_mode = 1
 
-    handler.handle_reference(first_arg, show_english, show_greek, show_french, show_crossref, cross_refs, args.crossref_full, show_hebrew, french_version=french_version, compact_mode=compact_mode)
+    if first_arg == "concordance":
+        get_searcher(handler).handle_concordance(" ".join(args.args), langs=args.tr, width=args.width, sort=args.sort, french_version=french_versions(french_version)[0])
+        return
+
+    if first_arg == "export":
+        handle_export(args, handler, french_version, show_english, show_greek, show_french, show_hebrew)
+        return
+
+    if first_arg == "diff":
+        handle_diff(args, printer)
+        return
+
+    if first_arg == "synopsis":
+        handle_synopsis(args, handler, french_version)
+        return
+
+    if first_arg == "search":
+        # The hits are verse records: the JSON array is closed below
+        handle_search(args, handler, french_versions(french_version)[0], compact_mode, show_english, show_greek, show_french, show_hebrew, show_crossref, cross_refs)
+    elif args.progressive or not isinstance(french_version, str):
+        # Corpora loaded in background threads, fast ones shown first
+        # (several French versions: loaded concurrently, shown once all are loaded)
+        providers = {'n1904': get_n1904_app, 'lxx': get_lxx_app, 'bhsa': get_bhsa_app, 'tob': get_tob_app, 'bj': get_bj_app}
+        ProgressiveRenderer(handler, providers, interactive=None if args.progressive else False).render(first_arg, show_english, show_greek, show_french, show_crossref, cross_refs, args.crossref_full, show_hebrew, french_version=french_version, compact_mode=compact_mode, show_interlinear=args.interlinear, context=args.context)
+    else:
+        handler.handle_reference(first_arg, show_english, show_greek, show_french, show_crossref, cross_refs, args.crossref_full, show_hebrew, french_version=french_version, compact_mode=compact_mode, show_interlinear=args.interlinear, context=args.context)
+    printer.finish()
+    out.flush()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,115 @@
+import json
+import os
+import pickle
+
+from search_index import SearchIndex
+
+INDEX_VERSION = 1
+
+
+class NotesIndex:
+    """
+    Inverted index over the commentary of the reference collections:
+    entry "notes" strings and relation "note" fields.
+
+    Each collection file gets its own sub-index, persisted in the cache
+    directory with the file's (mtime, size) stamp. On refresh only the files
+    whose stamp changed (e.g. after `biblecli add`) are re-indexed.
+    """
+    def __init__(self, reference_db, cache_dir):
+        self.ref_db = reference_db
+        self.cache_path = os.path.join(cache_dir, "notes_index.pickle")
+        # filename -> {"stamp": (mtime_ns, size), "docs": [...], "index": SearchIndex}
+        self.files = {}
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path, "rb") as f:
+                data = pickle.load(f)
+            if data.get("version") == INDEX_VERSION:
+                return data.get("files", {})
+        except Exception:
+            pass
+        return {}
+
+    def _save_cache(self):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(self.cache_path, "wb") as f:
+                pickle.dump({"version": INDEX_VERSION, "files": self.files}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError as e:
+            print(f"Warning: Could not save notes index: {e}")
+
+    @staticmethod
+    def _stamp(path):
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+
+    @staticmethod
+    def index_file(path):
+        """
+        Build the sub-index of one collection file.
+        Docs are (source, relation_type, target, text) tuples; relation_type and
+        target are None for entry-level notes.
+        """
+        with open(path, "r") as f:
+            data = json.load(f)
+
+        docs = []
+        index = SearchIndex()
+        for entry in data.get("cross_references", []):
+            src = entry.get("source")
+            if entry.get("notes"):
+                index.add_document(len(docs), entry["notes"])
+                docs.append((src, None, None, entry["notes"]))
+            for rel in entry.get("relations", []):
+                if rel.get("note"):
+                    index.add_document(len(docs), rel["note"])
+                    docs.append((src, rel.get("type", "other"), rel.get("target"), rel["note"]))
+        return docs, index
+
+    def refresh(self, filenames=None):
+        """Bring the index in line with the collection files on disk."""
+        if filenames is None:
+            filenames = self.ref_db.list_files()
+
+        cached = self._load_cache()
+        changed = set(cached) != set(filenames)
+        self.files = {}
+
+        for filename in filenames:
+            path = os.path.join(self.ref_db.data_dir, filename)
+            try:
+                stamp = self._stamp(path)
+            except OSError:
+                continue
+
+            entry = cached.get(filename)
+            if entry and entry["stamp"] == stamp:
+                self.files[filename] = entry
+                continue
+
+            try:
+                docs, index = self.index_file(path)
+            except Exception as e:
+                print(f"Warning: Could not index {filename}: {e}")
+                continue
+            self.files[filename] = {"stamp": stamp, "docs": docs, "index": index}
+            changed = True
+
+        if changed:
+            self._save_cache()
+
+    def search(self, query, filenames=None):
+        """
+        Notes containing every query term.
+        Returns (filename, source, relation_type, target, text) tuples in file order.
+        """
+        hits = []
+        for filename, entry in self.files.items():
+            if filenames is not None and filename not in filenames:
+                continue
+            docs = entry["docs"]
+            for doc_id in sorted(entry["index"].match_all(query)):
+                hits.append((filename,) + tuple(docs[doc_id]))
+        return hits
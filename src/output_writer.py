@@ -0,0 +1,58 @@
+import sys
+import unicodedata
+
+# Flush threshold of a chunk that keeps growing (whole book, -f notes)
+BUFFER_SIZE = 1 << 16
+
+
+def display_width(text):
+    """Terminal columns of a line: combining marks take none, wide characters two."""
+    width = 0
+    for ch in text:
+        if unicodedata.combining(ch):
+            continue
+        width += 2 if unicodedata.east_asian_width(ch) in ('W', 'F') else 1
+    return width
+
+
+class OutputWriter:
+    """
+    Buffered replacement for print() in the rendering pipeline.
+    Lines are collected in memory and written to the stream in one call
+    when the caller reaches a chunk boundary (end of a chapter, of a
+    reference) or when the buffer grows past buffer_size, instead of one
+    small write per header, text line, note and relation.
+    The stream defaults to the current sys.stdout, resolved at flush time.
+    """
+    def __init__(self, stream=None, buffer_size=BUFFER_SIZE):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self._parts = []
+        self._size = 0
+
+    def write(self, text):
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def line(self, text=""):
+        """print(text) equivalent."""
+        self.write(f"{text}\n")
+
+    def flush(self):
+        """Chunk boundary: write out everything buffered so far."""
+        if not self._parts:
+            return
+        stream = self.stream or sys.stdout
+        data = "".join(self._parts)
+        self._parts = []
+        self._size = 0
+        stream.write(data)
+        stream.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
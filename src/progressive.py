@@ -0,0 +1,183 @@
+import functools
+import shutil
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from reference_parser import ParsedReference
+from output_writer import display_width
+from verse_printer import french_versions
+
+# Text rows of a verse, in print order, and the corpus each one needs
+ROW_ORDER = ['hebrew', 'greek', 'english', 'french']
+
+
+def serialized(provider):
+    """
+    Lazy provider callable from several threads: the first caller loads,
+    the others wait for it instead of loading the corpus a second time.
+    """
+    lock = threading.Lock()
+
+    @functools.wraps(provider)
+    def wrapper():
+        with lock:
+            return provider()
+    return wrapper
+
+
+class ProgressiveRenderer:
+    """
+    Opt-in progressive rendering (--progressive).
+    The corpora a passage needs are loaded in background threads, one per
+    corpus. On a terminal, a single verse is previewed at once: its header,
+    then one row per requested text, each filled in as soon as its corpus is
+    loaded (TOB in a second, BHSA or LXX much later), always in the usual
+    Hebrew / Greek / English / French order. Once everything is loaded the
+    preview is replaced by the regular rendering, so the final output is the
+    same as without --progressive. Elsewhere (pipes, JSON, passages) the
+    loads still overlap, and the passage is printed when they are done.
+    """
+    def __init__(self, handler, providers, interactive=None, max_workers=4):
+        # providers: corpus name (n1904, lxx, bhsa, tob, bj) -> lazy provider
+        self.handler = handler
+        self.printer = handler.printer
+        self.normalizer = handler.normalizer
+        self.out = handler.out
+        self.providers = providers
+        self.interactive = interactive
+        self.max_workers = max_workers
+        self._drawn = 0
+
+    def corpora_for(self, book_code, show_english, show_greek, show_french, french_version):
+        """{row: corpus} of the texts printed for a book, in print order."""
+        rows = {}
+        nt = self.normalizer.is_nt(book_code)
+        # Hebrew defaults on for the OT, off for the NT (see ReferenceHandler)
+        if not nt:
+            rows['hebrew'] = 'bhsa'
+        if show_greek:
+            rows['greek'] = 'n1904' if nt else 'lxx'
+        if show_english and nt:
+            rows['english'] = 'n1904'
+        if show_french:
+            versions = french_versions(french_version)
+            if len(versions) == 1:
+                rows['french'] = versions[0]
+            else:
+                # One row per version: 'french:tob', 'french:bj'
+                rows.update((f"french:{version}", version) for version in versions)
+        return rows
+
+    def render(self, ref_str, show_english=False, show_greek=True, show_french=True, show_crossref=False, cross_refs=None, show_crossref_text=False, show_hebrew=False, french_version='tob', compact_mode=0, show_interlinear=False, context=0):
+        spans = self.normalizer.parse_passage(ref_str) or ()
+        rows = {}
+        for span in spans:
+            book_code = self.normalizer.split_verse_id(span.start)[0]
+            rows.update(self.corpora_for(book_code, show_english, show_greek, show_french, french_version))
+        # The driver of an OT passage is the LXX even without Greek text
+        if any(not self.normalizer.is_nt(self.normalizer.split_verse_id(span.start)[0]) for span in spans):
+            rows.setdefault('driver', 'lxx')
+
+        # Loading corpora redirects sys.stdout (see main.py): write to the real one
+        stdout = sys.stdout
+        if self.out.stream is None:
+            self.out.stream = stdout
+        interactive = self.interactive
+        if interactive is None:
+            interactive = self.out.stream.isatty() and self.handler.output_format == 'text'
+        preview = interactive and len(spans) == 1 and spans[0].start == spans[0].end
+
+        try:
+            if preview:
+                self._preview(spans[0].start, rows, show_english, french_version)
+            else:
+                self._load_all(set(rows.values()))
+        finally:
+            sys.stdout = stdout
+        if preview:
+            self._clear()
+
+        self.handler.handle_reference(ref_str, show_english, show_greek, show_french, show_crossref, cross_refs, show_crossref_text, show_hebrew, french_version=french_version, compact_mode=compact_mode, show_interlinear=show_interlinear, context=context)
+
+    def _load_all(self, corpora):
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for future in [pool.submit(self.providers[c]) for c in corpora if c in self.providers]:
+                future.result()
+
+    def _preview(self, vid, rows, show_english, french_version):
+        book_code, chapter, verse = self.normalizer.split_verse_id(vid)
+        book = self.normalizer.books.get(book_code)
+        name = (book.en_name if show_english else book.fr_label) if book else book_code
+        header = f"{name} {chapter}:{verse}"
+        # Numbering of the passage: the one of the (first) French version
+        source = french_versions(french_version)[0]
+
+        # Print order; with several French versions, one 'french:VERSION' row each
+        order = [row for row in rows if row.partition(':')[0] in ROW_ORDER]
+        order.sort(key=lambda row: ROW_ORDER.index(row.partition(':')[0]))
+        texts = {row: None for row in order}
+        by_corpus = {}
+        for row, corpus in rows.items():
+            by_corpus.setdefault(corpus, []).append(row)
+
+        def load(corpus):
+            provider = self.providers.get(corpus)
+            if provider:
+                provider()
+            return {row: self._row_text(row, book, chapter, verse, source, french_version)
+                    for row in by_corpus[corpus] if row in texts}
+
+        self._draw(header, texts, rows)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(load, corpus): corpus for corpus in by_corpus}
+            for future in as_completed(futures):
+                try:
+                    done = future.result()
+                except Exception:
+                    done = {}
+                for row in by_corpus[futures[future]]:
+                    if row in texts:
+                        # "" once loaded: a corpus without the verse leaves no row
+                        texts[row] = done.get(row) or ""
+                self._draw(header, texts, rows)
+
+    def _row_text(self, row, book, chapter, verse, source, french_version):
+        if not book:
+            return None
+        if row == 'hebrew':
+            return self.printer.get_hebrew_text(book, chapter, verse, source)
+        if row.startswith('french'):
+            # 'french' (single version) or 'french:bj'
+            version = row.partition(':')[2] or french_versions(french_version)[0]
+            get_text = self.printer.get_bj_text if version == 'bj' else self.printer.get_french_text
+            text = get_text(book, chapter, verse, source)
+            return text if text and not text.startswith("[") else None
+        # Greek / English: from the driving node
+        node, app = self.handler._get_node_and_app(ParsedReference.of(book.code, chapter, verse), source)
+        if not node:
+            return None
+        record = self.printer.verse_record(node=node, source_app=app, source_corpus=source, show_greek=row == 'greek', show_english=row == 'english', show_french=False)
+        return record.get(row) if record else None
+
+    def _draw(self, header, texts, rows):
+        lines = ["", header]
+        for row, text in texts.items():
+            if text is None:
+                lines.append(f"... ({rows[row]})")
+            elif text and ':' in row:
+                lines.append(f"[{rows[row].upper()}] {text}")
+            elif text:
+                lines.append(text)
+        self._clear()
+        self.out.stream.write("\n".join(lines) + "\n")
+        self.out.stream.flush()
+        columns = max(shutil.get_terminal_size().columns, 1)
+        self._drawn = sum(max(1, -(-display_width(line) // columns)) for line in lines)
+
+    def _clear(self):
+        # Back to the first line of the preview, and erase to the end of the screen
+        if self._drawn:
+            self.out.stream.write(f"\x1b[{self._drawn}F\x1b[J")
+            self.out.stream.flush()
+            self._drawn = 0
@@ -1,18 +1,88 @@
+import sys
+
+from reference_parser import ParsedReference
+from output_writer import OutputWriter
+from verse_printer import french_versions
+
+
 class ReferenceHandler:
-    def __init__(self, n1904_provider, lxx_provider, bhsa_provider, normalizer, verse_printer):
+    def __init__(self, n1904_provider, lxx_provider, bhsa_provider, normalizer, verse_printer, metadata=None, writer=None, output_format='text', versification=None):
         self.n1904_provider = n1904_provider # Callable returning N1904 app
         self.lxx_provider = lxx_provider 
         self.bhsa_provider = bhsa_provider
         self.normalizer = normalizer
         self.printer = verse_printer
+        self.metadata = metadata # Optional CanonMetadata: structure answered without loading corpora
+        # Buffered output, shared with the printer so that headers and verses keep their order.
+        # Flushed at chunk boundaries: each chapter of a long span, each reference.
+        if writer is None:
+            writer = getattr(verse_printer, 'out', None)
+            if not isinstance(writer, OutputWriter):
+                writer = OutputWriter()
+        self.out = writer
+        # Structured formats (json, jsonl) carry the verse records only
+        self.output_format = output_format
+        # Verse numbering maps (Versification): references are typed in the numbering
+        # of the French version, the LXX driver is looked up in the Greek one
+        self.versification = versification
+
+    def _header(self, text):
+        """Passage / chapter header: text output only."""
+        if self.output_format == 'text':
+            self.out.line(text)
+
+    def _message(self, text):
+        """Errors: on stderr in structured formats, to keep the records parseable."""
+        if self.output_format == 'text':
+            self.out.line(text)
+        else:
+            print(text, file=sys.stderr)
+
+    def _corpus(self, app):
+        """Corpus name of a driver app (the offline LXX / BHSA wrappers name theirs, the N1904 app does not)."""
+        corpus = getattr(app, 'corpus', None)
+        return corpus if isinstance(corpus, str) else 'n1904'
+
+    def _renumbers(self, app, numbering):
+        """True when the driver app and corpus `numbering` number verses differently (LXX and TOB Psalms)."""
+        if not self.versification or not numbering:
+            return False
+        schemes = self.versification.schemes
+        source, target = schemes.get(self._corpus(app)), schemes.get(numbering)
+        return bool(source and target and source != target)
+
+    def _map(self, book_code, chapter, verse, source, target):
+        """(chapter, verse) of a verse of corpus `source` in the numbering of corpus `target`."""
+        return self.versification.map_reference(book_code, chapter, verse, source, target)[1:]
+
+    def _numbered(self, app, node, book_code, numbering):
+        """(chapter, verse) of a driver verse node in the numbering of corpus `numbering`."""
+        section = app.api.T.sectionFromNode(node)
+        chapter, verse = int(section[1]), int(section[2])
+        if self._renumbers(app, numbering):
+            return self._map(book_code, chapter, verse, self._corpus(app), numbering)
+        return chapter, verse
 
-    def _get_node_and_app(self, ref_str):
-        # Determine book type
-        norm = self.normalizer.normalize_reference(ref_str)
-        if not norm:
+    def _node_for(self, app, ref):
+        """Section node (book, chapter or verse) of a parsed reference in a driver app."""
+        if self.n1904_provider and app is self.n1904_provider():
+            # N1904 is a standard TF app: use the tuple lookup with its book name
+            book = self.normalizer.books.get(ref.book_code)
+            if not book:
+                return None
+            section = (book.en_key,) + tuple(p for p in (ref.chapter, ref.verse) if p)
+            return app.api.T.nodeFromSection(section)
+        # Offline LXX / BHSA wrappers resolve parsed references themselves
+        return app.nodeFromSectionStr(ref)
+
+    def _get_node_and_app(self, ref, numbering=None):
+        # ref may be a string or an already parsed reference,
+        # numbered as in corpus `numbering` (a French version) if given
+        ref = self.normalizer.parse_reference(ref)
+        if not ref or not ref.chapter:
             return None, None
             
-        code, ch, vs, _ = norm
+        code = ref.book_code
         
         # Smart Loading Logic
         if self.normalizer.is_nt(code):
@@ -20,280 +90,372 @@ class ReferenceHandler:
              if self.n1904_provider:
                  n1904_app = self.n1904_provider()
                  if n1904_app:
-                     # Use tuple lookup for robustness
-                     book_name = self.normalizer.code_to_n1904.get(code)
-                     if book_name:
-                         # Verify if nodeFromSection can accept the tuple
-                         # TF API: T.nodeFromSection((book, chapter, verse))
-                         node = n1904_app.api.T.nodeFromSection((book_name, ch, vs))
-                         if node:
-                             return node, n1904_app
+                     node = self._node_for(n1904_app, ref)
+                     if node:
+                         return node, n1904_app
                          
         elif self.normalizer.is_ot(code):
              # Try LXX (Old Testament)
              if self.lxx_provider:
                  lxx_app = self.lxx_provider()
                  if lxx_app:
-                     node = lxx_app.nodeFromSectionStr(ref_str)
+                     lxx_ref = ref
+                     if ref.verse and self._renumbers(lxx_app, numbering):
+                         # TOB Ps 23:1 is LXX Ps 22:1
+                         lxx_ref = ParsedReference.of(code, *self._map(code, ref.chapter, ref.verse, numbering, 'lxx'))
+                     node = lxx_app.nodeFromSectionStr(lxx_ref)
                      if node and isinstance(node, int):
                          return node, lxx_app
                          
-             # Also try BHSA (Hebrew) if lxx fails or as alternative?
-             # Usually we return the "driver" app (LXX for OT Greek usually, or BHSA for Hebrew).
-             # If strict Hebrew requested, handle_reference logic handles it via show_hebrew flag.
-             # But for a default node, we prefer LXX (Greek) if consistent with N1904?
-             # Actually, if we want to show Hebrew by default, maybe return BHSA node?
-             # But VersePrinter expects a node to print.
-             
              # Fallback: if LXX didn't work (e.g. not loaded or book missing), try BHSA
              if self.bhsa_provider:
                   bhsa = self.bhsa_provider()
                   if bhsa:
-                      node = bhsa.nodeFromSectionStr(ref_str)
+                      node = bhsa.nodeFromSectionStr(ref)
                       if node: return node, bhsa
 
         return None, None
 
-    def handle_reference(self, ref_str, show_english=False, show_greek=True, show_french=True, show_crossref=False, cross_refs=None, show_crossref_text=False, show_hebrew=False, french_version='tob', compact_mode=0):
-        # 1. Normalize first to decide strategies
-        norm = self.normalizer.normalize_reference(ref_str)
-        
-        # Defaults if normalization fails (shouldn't happen often if we want to proceed)
-        is_ot = False
-        is_nt = False
-        book_code = None
-        
-        if norm:
-            book_code = norm[0]
-            is_ot = self.normalizer.is_ot(book_code)
-            is_nt = self.normalizer.is_nt(book_code)
-        
-        # SMART DEFAULTS Override
-        # If no explicit "show" flags were likely toggled (we can't easily know if they were defaults or user choice here easily without passing more args).
-        # But we can enforce:
-        # If NT -> Force show_hebrew = False (unless user really tried? No, physically impossible reference)
-        # If OT -> We want to show Hebrew by default? 
-        # The user said: "tob Gn 1:1" should show Hebrew. "tob Mc 1:1" should NOT load Hebrew.
-        
-        if is_nt:
-            show_hebrew = False
-            # Ensure N1904 is loaded
-            driver_app = self.n1904_provider() if self.n1904_provider else None
-        elif is_ot:
-            # For OT, user wants Hebrew. 
-            # If show_hebrew was passed as False (CLI default might be False?), force True?
-            # Wait, main.py passes show_hebrew based on flags.
-            # I should update main.py defaults? Or here?
-            # "I'd like the change in tob Gn 1:1 where it displays hebrew not to affect..."
-            # Implies by default it SHOULD display Hebrew for OT.
-            if not show_hebrew: # If not already enabled explicitly
-                 show_hebrew = True
-            
-            # Ensure proper drivers for text
-            # We don't need N1904
-            pass
-        
-        if not norm:
-             # Basic handling if normalization failed drastically but ref_str exists
-             pass
+    def handle_reference(self, ref_str, show_english=False, show_greek=True, show_french=True, show_crossref=False, cross_refs=None, show_crossref_text=False, show_hebrew=False, french_version='tob', compact_mode=0, show_interlinear=False, context=0):
+        # 1. Parse once into verse-id spans: "Mc 1:1-8; Lc 3:1-6", "Mc 1:40-2:12", "Mc".
+        # The spans are passed down the call chain instead of re-parsing strings.
+        spans = self.normalizer.parse_passage(ref_str)
+        if not spans:
+            self._message(f"Could not find reference: {ref_str}")
+            self.out.flush()
+            return
 
-        # ... (rest of logic needs to use providers)
-        
-        # We need an app to get F/L/TF logic for "chapter" or range iteration?
-        # N1904 app was the "main" app. functionality like F.otype lives there.
+        display = dict(show_english=show_english, show_greek=show_greek, show_french=show_french, show_crossref=show_crossref, cross_refs=cross_refs, show_crossref_text=show_crossref_text, french_version=french_version, compact_mode=compact_mode, show_interlinear=show_interlinear)
+
+        for span in spans:
+            try:
+                self._render_span(span, ref_str, show_hebrew, display, context)
+            except Exception as e:
+                # import traceback
+                # traceback.print_exc()
+                self._message(f"Error processing reference: {e}")
+            self.out.flush()
+
+    def _driver_app(self, book_code):
+        # We need an app to get F/L/TF logic for "chapter" or range iteration.
         # If we are in OT mode, we might not HAVE N1904 app if we skip loading it!
         # We should use the "driver" app for structural logic.
-        
         app = None
-        if is_nt and self.n1904_provider:
+        if self.normalizer.is_nt(book_code) and self.n1904_provider:
             app = self.n1904_provider()
-        elif is_ot and self.lxx_provider:
+        elif self.normalizer.is_ot(book_code) and self.lxx_provider:
             app = self.lxx_provider()
-        
-        if not app and self.bhsa_provider: 
+
+        if not app and self.bhsa_provider:
              app = self.bhsa_provider() # Fallback for OT if LXX missing?
-        
+
         if not app and self.n1904_provider:
              app = self.n1904_provider() # Ultimate fallback (e.g. unknown book)
+        return app
+
+    def _prepare_span(self, span, show_hebrew):
+        """
+        Smart defaults and driver app of a span: (app, show_hebrew), or (None, error message).
+        """
+        book_code, c1, v1 = self.normalizer.split_verse_id(span.start)
+
+        # SMART DEFAULTS Override
+        # "tob Gn 1:1" should show Hebrew. "tob Mc 1:1" should NOT load Hebrew.
+        if self.normalizer.is_nt(book_code):
+            show_hebrew = False
+        elif self.normalizer.is_ot(book_code):
+            show_hebrew = True
+
+        # Reject references outside the known canon before loading any corpus
+        if not self._in_canon(book_code, c1, v1):
+            return None, "Could not find reference: {ref}"
 
+        app = self._driver_app(book_code)
         if not app:
-             print("Error: No suitable dataset loaded for this reference.")
-             return
+            return None, "Error: No suitable dataset loaded for this reference."
+        return app, show_hebrew
 
-        api = app.api
-        F = api.F
-        L = api.L
-        
-        # ... logic continues ...
-        # I need to be careful about replacing "self.app" with "app" in the snippet.
-        
-        # (Snippet replacement follows)
-        ref_str = ref_str.replace(',', ':')
-        
-        # ... abbrevs ...
-        parts = ref_str.split()
-        if len(parts) >= 2:
-            two_word_abbr = f"{parts[0]} {parts[1]}"
-            if two_word_abbr in self.normalizer.abbreviations:
-                ref_str = f"{self.normalizer.abbreviations[two_word_abbr]} {' '.join(parts[2:])}"
-                parts = ref_str.split() 
-            elif parts[0] in self.normalizer.abbreviations:
-                ref_str = f"{self.normalizer.abbreviations[parts[0]]} {' '.join(parts[1:])}"
-                parts = ref_str.split() 
-        elif len(parts) == 1:
-            if parts[0] in self.normalizer.abbreviations:
-                ref_str = self.normalizer.abbreviations[parts[0]]
-                parts = [ref_str]
-                
-        try:
-            # Check if it's a range (e.g., "Luke 1:4-7")
-            if "-" in ref_str and ":" in ref_str:
-                last_colon_idx = ref_str.rfind(":")
-                if last_colon_idx != -1:
-                    book_chapter = ref_str[:last_colon_idx]
-                    verses_part = ref_str[last_colon_idx+1:]
-                    
-                    if "-" in verses_part:
-                        start_v, end_v = verses_part.split("-")
-                        start_v = int(start_v)
-                        end_v = int(end_v)
-                        
-                        if ' ' in book_chapter:
-                            book, chapter = book_chapter.rsplit(' ', 1)
-                            # book_fr = self.normalizer.n1904_to_tob.get(book)
-                            # if not book_fr: book_fr = book
-                        else:
-                            book = book_chapter
-                            chapter = ""
-                        
-                        # Print Header once if in compact mode
-                        if compact_mode > 0:
-                            # Use TOB name if possible
-                            if ' ' in book_chapter:
-                                b_name = book_chapter.rsplit(' ', 1)[0]
-                                f_name = self.normalizer.n1904_to_tob.get(b_name, b_name)
-                                print(f"\n{f_name} {book_chapter.split()[-1]}:{start_v}-{end_v}")
-                            else:
-                                print(f"\n{book_chapter} {start_v}-{end_v}")
-
-                        for v_num in range(start_v, end_v + 1):
-                            single_ref = f"{book_chapter}:{v_num}"
-                            node, source_app = self._get_node_and_app(single_ref)
-                            if node:
-                                self.printer.print_verse(node=node, show_english=show_english, show_greek=show_greek, show_french=show_french, show_crossref=show_crossref, cross_refs=cross_refs, show_crossref_text=show_crossref_text, source_app=source_app, show_hebrew=show_hebrew, french_version=french_version, compact_mode=compact_mode)
-                            else:
-                                if ' ' in book_chapter:
-                                    b, c = book_chapter.rsplit(' ', 1)
-                                    self.printer.print_verse(book_en=b, chapter=c, verse=v_num, show_english=show_english, show_greek=show_greek, show_french=show_french, show_crossref=show_crossref, cross_refs=cross_refs, show_crossref_text=show_crossref_text, show_hebrew=show_hebrew, french_version=french_version, compact_mode=compact_mode)
-                                else: # book only?
-                                    print(f"Could not find verse: {single_ref}")
-                        return
-
-            # Check if it's a chapter reference (e.g., "John 13")
-            if ":" not in ref_str and " " in ref_str:
-                parts = ref_str.rsplit(' ', 1)
-                if len(parts) == 2:
-                    book_name = parts[0]
-                    try:
-                        chapter_num = int(parts[1])
-                        
-                        book_fr = self.normalizer.n1904_to_tob.get(book_name)
-                        if not book_fr: book_fr = book_name
-                        print(f"\n{book_fr} {chapter_num}")
-                        
-                        # Use driver app to list verses
-                        # NOTE: For lazy N1904, we might not have 'app' if we are in OT mode. 
-                        # We use the app determined above.
-                        
-                        # Try finding chapter node in the driver app
-                        # For N1904/LXX/BHSA, logic is similar if using TF
-                        
-                        # But standard TF search might differ.
-                        # N1904: F.otype.s('chapter')
-                        # LXX: same
-                        # BHSA: same
-                        
-                        # We need to use nodeFromSectionStr logic for chapters?
-                        # Or just iterate.
-                        
-                        # Let's try to find chapter node using app's section lookup if available, or manual filter.
-                        # Apps usually have nodeFromSectionStr("Book Chapter")
-                        
-                        chapter_node = app.nodeFromSectionStr(f"{book_name} {chapter_num}")
-                        if chapter_node and F.otype.v(chapter_node) == 'chapter':
-                             verse_nodes = L.d(chapter_node, otype='verse')
-                             # Print Header for Chapter block
-                             if compact_mode > 0:
-                                 # Header already printed above at line 187?
-                                 # Yes: print(f"\n{book_fr} {chapter_num}") is unconditional above.
-                                 # Wait, if compact_mode, print_verse suppresses its own header.
-                                 # So the header at 187 covers the whole block. Perfect.
-                                 pass
-                                 
-                             for verse_node in verse_nodes:
-                                 self.printer.print_verse(node=verse_node, show_english=show_english, show_greek=show_greek, show_french=show_french, show_crossref=show_crossref, cross_refs=cross_refs, show_crossref_text=show_crossref_text, source_app=app, show_hebrew=show_hebrew, french_version=french_version, compact_mode=compact_mode)
-                             return
-
-                        # Fallback to TOB extraction loop
-                        v = 1
-                        found_any = False
-                        while True:
-                            txt = self.printer.get_french_text(book_name, chapter_num, v)
-                            if (not txt or txt.startswith("[TOB:")) and v > 1:
-                                break
-                            if txt and not txt.startswith("["):
-                                self.printer.print_verse(book_en=book_name, chapter=chapter_num, verse=v, show_english=show_english, show_greek=show_greek, show_french=show_french, show_crossref=show_crossref, cross_refs=cross_refs, show_crossref_text=show_crossref_text, show_hebrew=show_hebrew, french_version=french_version, compact_mode=compact_mode)
-                                found_any = True
-                            v += 1
-                        if found_any: return
-                        
-                        print(f"Could not find chapter: {ref_str}")
-                        return
-
-                    except ValueError:
-                        pass  
-            
-            # Fallback to single reference lookup
-            node, source_app = self._get_node_and_app(ref_str)
-            
-            if node:
-                # For single verse, compact mode basically just suppresses header and adds prefix?
-                # User asked for it "when it is a suite of verses... OR Mc 1 tout seul".
-                # "Mc 1:1" is also a single verse.
-                # If compact mode is on, we print Header once.
-                if compact_mode > 0:
-                     # Calculate header
-                     # Assuming ref_str is clean
-                     # We can reconstruct or use parts
-                     print(f"\n{ref_str}") # Simplify for now or look up French name?
-                     # Ideally use printer logic to get header name, but that's inside print_verse.
-                     # But print_verse hides it. 
-                     # Let's let print_verse handle SINGLE verse cases?
-                     # NO, print_verse suppresses header in compact mode!
-                     # So we MUST print header here for single verse too.
-                     # Let's use simplified header or existing one.
-                     pass
-                     
-                self.printer.print_verse(node=node, show_english=show_english, show_greek=show_greek, show_french=show_french, show_crossref=show_crossref, cross_refs=cross_refs, show_crossref_text=show_crossref_text, source_app=source_app, show_hebrew=show_hebrew, french_version=french_version, compact_mode=compact_mode)
+    def _render_span(self, span, ref_str, show_hebrew, display, context=0):
+        END = self.normalizer.VERSE_END
+        book_code, c1, v1 = self.normalizer.split_verse_id(span.start)
+        _, c2, v2 = self.normalizer.split_verse_id(span.end)
+
+        app, show_hebrew = self._prepare_span(span, show_hebrew)
+        if not app:
+            self._message(show_hebrew.format(ref=ref_str))
+            return
+        display = dict(display, show_hebrew=show_hebrew)
+
+        book = self.normalizer.books.get(book_code)
+        book_fr = book.fr_label if book else book_code
+
+        # Print Header once if in compact mode (whole chapters get one header each)
+        whole_chapters = v1 == 1 and v2 == END
+        if span.start != span.end and not whole_chapters and display['compact_mode'] > 0:
+            if c1 == c2:
+                self._header(f"\n{book_fr} {c1}:{v1}-{v2}")
+            else:
+                self._header(f"\n{book_fr} {c1}:{v1}-{c2}:{v2}")
+
+        # Around a single verse, compact modes print the chapter of each neighbour
+        context_headers = context and span.start == span.end and display['compact_mode'] > 0
+
+        # Consume the verse stream: the first verse is written out at once,
+        # then one chunk per chapter
+        first = True
+        for event, payload in self._walk_span(span, app, display['french_version'], context):
+            if event == 'chapter':
+                self.out.flush()
+                if whole_chapters or context_headers:
+                    # Header for the whole chapter block (print_verse suppresses its own in compact mode)
+                    self._header(f"\n{book_fr} {payload}")
+            elif event == 'verse':
+                self.printer.print_verse(**payload, **display)
+                if first:
+                    self.out.flush()
+                    first = False
+            else:
+                self._message(f"Could not find chapter: {ref_str}")
+
+    def iter_records(self, ref_str, show_english=False, show_greek=True, show_french=True, show_crossref=False, show_crossref_text=False, show_hebrew=False, french_version='tob', show_interlinear=False):
+        """
+        Lazy stream of the verse records (VersePrinter.verse_record) of a passage,
+        for consumers other than the printer. Unknown passages yield nothing.
+        """
+        spans = self.normalizer.parse_passage(ref_str) or ()
+        display = dict(show_english=show_english, show_greek=show_greek, show_french=show_french, show_crossref=show_crossref, show_crossref_text=show_crossref_text, french_version=french_version, show_interlinear=show_interlinear)
+        for span in spans:
+            app, span_hebrew = self._prepare_span(span, show_hebrew)
+            if not app:
+                continue
+            for event, payload in self._walk_span(span, app, french_version):
+                if event == 'verse':
+                    record = self.printer.verse_record(**payload, **dict(display, show_hebrew=span_hebrew))
+                    if record:
+                        yield record
+
+    def _walk_span(self, span, app, french_version, context=0):
+        """
+        Generator over the verses of a span, in order:
+        ('chapter', number) when a new chapter starts in a chapter or multi-chapter span,
+        ('verse', print_verse arguments) for each verse,
+        ('missing', None) when the passage is found nowhere.
+        Verses are produced one at a time: a whole book costs no more memory than a verse.
+        With a context, a single verse comes with `context` verses on each side, highlighted.
+        The span is numbered as in the French version: the verses of an LXX driver
+        are looked up, and numbered, through the versification (TOB Ps 23 is LXX Ps 22).
+        """
+        END = self.normalizer.VERSE_END
+        book_code, c1, v1 = self.normalizer.split_verse_id(span.start)
+        _, c2, v2 = self.normalizer.split_verse_id(span.end)
+        book = self.normalizer.books.get(book_code)
+        book_en = book.en_key if book else book_code
+        # Several French versions: the first one numbers the passage
+        french_version = french_versions(french_version)[0]
+
+        # Single verse
+        if span.start == span.end:
+            ref = ParsedReference.of(book_code, c1, v1)
+            node, source_app = self._get_node_and_app(ref, french_version)
+            if node and self._renumbers(source_app, french_version) and self._numbered(source_app, node, book_code, french_version) != (c1, v1):
+                # No such verse in the French numbering (TOB Ps 9:22): no Greek counterpart
+                node = None
+            if context:
+                if node:
+                    yield from self._context_nodes(node, source_app, context, book_code, french_version)
+                else:
+                    yield from self._context_verses(book_code, c1, v1, french_version, context)
+            elif node:
+                yield 'verse', dict(node=node, source_app=source_app, source_corpus=french_version)
             else:
-                 # Last ditch manual parse for TOB if node failed
-                if ":" in ref_str and " " in ref_str:
-                    parts = ref_str.rsplit(' ', 1)
-                    book_name = parts[0]
-                    if ":" in parts[1]:
-                        ch_v = parts[1].split(":")
-                        if len(ch_v) == 2:
-                            try:
-                                ch = int(ch_v[0])
-                                vs = int(ch_v[1])
-                                self.printer.print_verse(book_en=book_name, chapter=ch, verse=vs, show_english=show_english, show_greek=show_greek, show_french=show_french, show_crossref=show_crossref, cross_refs=cross_refs, show_crossref_text=show_crossref_text, show_hebrew=show_hebrew, french_version=french_version, compact_mode=compact_mode)
-                                return
-                            except ValueError:
-                                pass
-
-                print(f"Could not find reference: {ref_str}")
-                
-        except Exception as e:
-            # import traceback
-            # traceback.print_exc()
-            print(f"Error processing reference: {e}")
+                # Last ditch: TOB / BJ only, without a driving node, in their own numbering
+                yield 'verse', dict(book_en=book_en, chapter=c1, verse=v1, source_corpus=french_version)
+            return
+
+        # Ranges, chapters and books: resolve both ends once, then walk the verse nodes
+        renumbers = self._renumbers(app, french_version)
+        if renumbers:
+            # Driver numbering of both ends; the walk keeps the verses inside the
+            # span once renumbered (LXX Ps 9 holds TOB Ps 9 and 10)
+            driver = self._corpus(app)
+            ends = sorted([self._map(book_code, c1, v1, french_version, driver), self._map(book_code, c2, v2, french_version, driver)])
+            bounds = self._verse_bounds(app, book_code, *ends[0], *ends[1])
+        else:
+            bounds = self._verse_bounds(app, book_code, c1, v1, c2, v2)
+        if bounds:
+            T = app.api.T
+            track_chapters = c1 != c2 or (v1 == 1 and v2 == END)
+            current_chapter = None
+            for verse_node in range(bounds[0], bounds[1] + 1):
+                if renumbers:
+                    chapter_num, verse_num = self._numbered(app, verse_node, book_code, french_version)
+                    if not span.start <= self.normalizer.verse_id(book_code, chapter_num, verse_num) <= span.end:
+                        continue
+                elif track_chapters:
+                    chapter_num = T.sectionFromNode(verse_node)[1]
+                if track_chapters and chapter_num != current_chapter:
+                    current_chapter = chapter_num
+                    yield 'chapter', chapter_num
+                yield 'verse', dict(node=verse_node, source_app=app, source_corpus=french_version)
+            return
+
+        # The driver lacks the passage: TOB / BJ only, chapter by chapter
+        if c2 == END and self.metadata:
+            c2 = self.metadata.chapter_count(french_version, book_code) or END
+        chapter_num = c1
+        while chapter_num <= c2:
+            lo = v1 if chapter_num == c1 else 1
+            hi = v2 if chapter_num == c2 else END
+            found_any = False
+            for v in self._french_chapter_verses(book_code, chapter_num, lo, hi, french_version):
+                if not found_any:
+                    yield 'chapter', chapter_num
+                    found_any = True
+                yield 'verse', dict(book_en=book_en, chapter=chapter_num, verse=v, source_corpus=french_version)
+            if not found_any:
+                # An open-ended span ("Mc", "Mc 15-16") stops at the last chapter
+                if c2 != END or chapter_num == c1:
+                    yield 'missing', None
+                return
+            chapter_num += 1
+
+    def _context_nodes(self, node, app, context, book_code, french_version):
+        """
+        Verses around a verse node of the driver: the verse nodes of a corpus are
+        consecutive, so the neighbours are node - context .. node + context,
+        within the same book. Chapter boundaries are crossed freely.
+        Chapters are numbered as in the French version.
+        """
+        F = app.api.F
+        T = app.api.T
+        book_label = T.sectionFromNode(node)[0]
+
+        def same_book(n):
+            return n > 0 and F.otype.v(n) == 'verse' and T.sectionFromNode(n)[0] == book_label
+
+        first = node
+        while first > node - context and same_book(first - 1):
+            first -= 1
+        last = node
+        while last < node + context and same_book(last + 1):
+            last += 1
+
+        current_chapter = None
+        for verse_node in range(first, last + 1):
+            chapter_num = self._numbered(app, verse_node, book_code, french_version)[0]
+            if chapter_num != current_chapter:
+                current_chapter = chapter_num
+                yield 'chapter', chapter_num
+            yield 'verse', dict(node=verse_node, source_app=app, source_corpus=french_version, highlight=verse_node == node)
+
+    def _context_verses(self, book_code, chapter, verse, french_version, context):
+        """
+        Verses around a verse missing from the driver (TOB / BJ only), from the
+        chapter sizes of the canon metadata. Without metadata, the verse alone.
+        """
+        book = self.normalizer.books.get(book_code)
+        book_en = book.en_key if book else book_code
+
+        def count(c):
+            return self.metadata.verse_count(french_version, book_code, c) if c > 0 else 0
+
+        if not self.metadata or self.metadata.verse_count(french_version, book_code, chapter) is None:
+            yield 'verse', dict(book_en=book_en, chapter=chapter, verse=verse, source_corpus=french_version, highlight=True)
+            return
+
+        before = []
+        c, v = chapter, verse
+        while len(before) < context:
+            v -= 1
+            if v < 1:
+                c -= 1
+                v = count(c)
+                if not v:
+                    break
+            before.insert(0, (c, v))
+        after = []
+        c, v = chapter, verse
+        while len(after) < context:
+            v += 1
+            if v > count(c):
+                c += 1
+                v = 1
+                if not count(c):
+                    break
+            after.append((c, v))
+
+        current_chapter = None
+        for c, v in before + [(chapter, verse)] + after:
+            if c != current_chapter:
+                current_chapter = c
+                yield 'chapter', c
+            yield 'verse', dict(book_en=book_en, chapter=c, verse=v, source_corpus=french_version, highlight=(c, v) == (chapter, verse))
+
+    def _verse_bounds(self, app, book_code, c1, v1, c2, v2):
+        """
+        First and last verse nodes of a span in the driver app, or None.
+        Text-Fabric numbers the nodes of a type in canonical order, so the
+        verses in between are exactly the node ids from first to last.
+        """
+        END = self.normalizer.VERSE_END
+        L = app.api.L
+
+        start = self._node_for(app, ParsedReference.of(book_code, c1, v1))
+        if not start:
+            return None
+
+        end = None
+        if v2 != END:
+            end = self._node_for(app, ParsedReference.of(book_code, c2, v2))
+        if not end and self.metadata:
+            # Open end from the canon metadata of the driver: no verse list to build
+            corpus = self._corpus(app)
+            last_chapter = c2 if c2 != END else self.metadata.chapter_count(corpus, book_code)
+            last_verse = self.metadata.verse_count(corpus, book_code, last_chapter) if last_chapter else None
+            if last_verse:
+                end = self._node_for(app, ParsedReference.of(book_code, last_chapter, min(v2, last_verse)))
+        if not end:
+            # Open end, or past the last verse: last verse of the chapter / book
+            container = None
+            if c2 != END:
+                container = self._node_for(app, ParsedReference.of(book_code, c2))
+            if not container:
+                container = self._node_for(app, ParsedReference.of(book_code))
+            if not container:
+                return None
+            verses = L.d(container, otype='verse')
+            if not verses:
+                return None
+            end = verses[-1]
+
+        if end < start:
+            return None
+        return start, end
+
+    def _in_canon(self, book_code, chapter, verse):
+        """False only when the metadata knows the book and no corpus has the verse."""
+        if not self.metadata:
+            return True
+        count = self.metadata.max_verse_count(book_code, chapter)
+        return count is None or verse <= count
+
+    def _french_chapter_verses(self, book_code, chapter_num, lo, hi, french_version):
+        """Verse numbers of a TOB / BJ chapter, for the fallback when the driver lacks it."""
+        count = None
+        if self.metadata:
+            count = self.metadata.verse_count(french_version, book_code, chapter_num)
+        if count is not None:
+            # Known chapter size: no probing for the end of the chapter
+            yield from range(lo, min(hi, count) + 1)
+            return
+
+        book = self.normalizer.books.get(book_code)
+        book_en = book.en_key if book else book_code
+        v = lo
+        while v <= hi:
+            txt = self.printer.get_french_text(book_en, chapter_num, v)
+            if (not txt or txt.startswith("[TOB:")) and v > 1:
+                break
+            if txt and not txt.startswith("["):
+                yield v
+            v += 1
@@ -0,0 +1,203 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import NamedTuple
+
+# Chapter and optional verse after the book: "1:1", "1,1", ".1.1", "13"
+CHAPTER_VERSE_RE = re.compile(r"^[\s.]*(\d+)(?:\s*[:.,]\s*(\d+))?\s*$")
+
+# Passage item after the book: C[:V][-C[:V]] ("1:1-8", "1:40-2:12", "1-3", "4")
+PASSAGE_ITEM_RE = re.compile(
+    r"^[\s.]*(\d+)(?:\s*[:.,]\s*(\d+))?"
+    r"(?:\s*[-–]\s*(\d+)(?:\s*[:.,]\s*(\d+))?)?\s*$"
+)
+
+# Open end of a span: last chapter of the book / last verse of the chapter.
+# Typed chapters and verses stay below it, so that packed verse ids do not overflow.
+VERSE_END = 999
+
+
+def fold_book_name(name):
+    """Matching form of a book name: casefolded, no accents, spaces or underscores."""
+    decomposed = unicodedata.normalize("NFD", name.casefold())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return stripped.replace(" ", "").replace("_", "")
+
+
+class ParsedReference(NamedTuple):
+    """
+    Immutable parsed reference. chapter / verse are 0 for a whole book / chapter.
+    std is the standardized key ("MRK.1.1", "MRK.1" or "MRK").
+    """
+    book_code: str
+    chapter: int
+    verse: int
+    std: str
+
+    @classmethod
+    def of(cls, book_code, chapter=0, verse=0):
+        if verse:
+            std = f"{book_code}.{chapter}.{verse}"
+        elif chapter:
+            std = f"{book_code}.{chapter}"
+        else:
+            std = book_code
+        return cls(book_code, chapter, verse, std)
+
+    def with_verse(self, verse):
+        return ParsedReference.of(self.book_code, self.chapter, verse)
+
+
+class VerseSpan(NamedTuple):
+    """Inclusive span of packed verse ids; chapter / verse VERSE_END are open ends."""
+    start: int
+    end: int
+
+
+class ReferenceParser:
+    """
+    Single-pass reference parser.
+    Book names are matched by longest prefix on a trie of every known
+    abbreviation and label, so "1Co13:4", "1 Co 13:4", "Mc1,1" or "Gen.1.1"
+    are all read in one scan. Results are memoized.
+    """
+    # End-of-name marker: never a single character, and plain data so that
+    # the trie can be snapshotted (see BookNormalizer)
+    _END = ""
+
+    def __init__(self, abbreviations, name_to_code, verse_id, cache_size=4096, trie=None):
+        # abbreviations: alias -> internal key, name_to_code: internal key -> book code
+        # verse_id: (book_code, chapter, verse) -> packed verse id
+        # trie: prebuilt trie from a snapshot, skips the build
+        self.verse_id = verse_id
+        self.trie = trie
+        if trie is None:
+            self.trie = {}
+            for alias, key in abbreviations.items():
+                code = name_to_code.get(key) or name_to_code.get(key.replace(" ", "_"))
+                if code:
+                    self._insert(fold_book_name(alias), code)
+        self.parse = lru_cache(maxsize=cache_size)(self._parse)
+        self.parse_passage = lru_cache(maxsize=cache_size)(self._parse_passage)
+
+    def _insert(self, folded, code):
+        node = self.trie
+        for ch in folded:
+            node = node.setdefault(ch, {})
+        node.setdefault(self._END, code)
+
+    def match_book(self, text):
+        """
+        Longest book name prefix of text. Returns (book_code, rest) or (None, text).
+        A name only matches if followed by a digit, a separator or the end.
+        """
+        folded = fold_book_name(text)
+        node = self.trie
+        best = None
+        for i, ch in enumerate(folded):
+            node = node.get(ch)
+            if node is None:
+                break
+            if self._END in node:
+                nxt = folded[i + 1] if i + 1 < len(folded) else ""
+                if not nxt or not nxt.isalpha():
+                    best = (node[self._END], i + 1)
+        if not best:
+            return None, text
+
+        # Map the folded length back onto the original text
+        code, consumed = best
+        pos = 0
+        count = 0
+        while pos < len(text) and count < consumed:
+            if fold_book_name(text[pos]):
+                count += len(fold_book_name(text[pos]))
+            pos += 1
+        return code, text[pos:]
+
+    def _parse(self, ref_str):
+        code, rest = self.match_book(ref_str.strip())
+        if not code:
+            return None
+        if not rest.strip():
+            return ParsedReference.of(code)
+
+        m = CHAPTER_VERSE_RE.match(rest)
+        if not m:
+            return None
+        chapter = int(m.group(1))
+        # Verse 0 is invalid, not a whole chapter ("Mc 1:0")
+        verse = int(m.group(2)) if m.group(2) is not None else None
+        if chapter <= 0 or chapter >= VERSE_END or (verse is not None and not 0 < verse < VERSE_END):
+            return None
+        return ParsedReference.of(code, chapter, verse or 0)
+
+    def spans_of(self, ref):
+        """Span covered by a single parsed reference (verse, chapter or book)."""
+        if ref.verse:
+            vid = self.verse_id(ref.book_code, ref.chapter, ref.verse)
+            return (VerseSpan(vid, vid),)
+        if ref.chapter:
+            return (VerseSpan(self.verse_id(ref.book_code, ref.chapter, 1),
+                              self.verse_id(ref.book_code, ref.chapter, VERSE_END)),)
+        return (VerseSpan(self.verse_id(ref.book_code, 1, 1),
+                          self.verse_id(ref.book_code, VERSE_END, VERSE_END)),)
+
+    def _parse_item(self, code, rest):
+        if not rest.strip():
+            # Whole book
+            return VerseSpan(self.verse_id(code, 1, 1), self.verse_id(code, VERSE_END, VERSE_END))
+
+        m = PASSAGE_ITEM_RE.match(rest)
+        if not m:
+            return None
+        if any(int(n) >= VERSE_END for n in m.groups() if n):
+            # "Mc 1:1-1005" would overflow into the next chapter
+            return None
+        c1, v1, x, y = m.groups()
+        c1 = int(c1)
+        # A typed verse 0 stays 0, and is rejected below ("Mc 1:0-5")
+        v1 = int(v1) if v1 is not None else None
+
+        if x is None:
+            # "C:V" or "C"
+            if v1 is not None:
+                start = end = (c1, v1)
+            else:
+                start, end = (c1, 1), (c1, VERSE_END)
+        elif y is not None:
+            # "C:V-C2:V2" or "C-C2:V2"
+            start, end = (c1, 1 if v1 is None else v1), (int(x), int(y))
+        elif v1 is not None:
+            # "C:V-V2"
+            start, end = (c1, v1), (c1, int(x))
+        else:
+            # "C-C2": whole chapters
+            start, end = (c1, 1), (int(x), VERSE_END)
+
+        if start[0] <= 0 or start[1] <= 0 or end[1] <= 0 or end < start:
+            return None
+        return VerseSpan(self.verse_id(code, *start), self.verse_id(code, *end))
+
+    def _parse_passage(self, passage):
+        """
+        passage := item (";" item)*
+        item    := [BOOK] [C[:V][-C[:V]]]
+        A list item without a book continues the previous one ("Mc 1:1-8; 3:1-6").
+        """
+        spans = []
+        code = None
+        for item in passage.split(";"):
+            item = item.strip()
+            if not item:
+                continue
+            item_code, rest = self.match_book(item)
+            if item_code:
+                code = item_code
+            elif not code:
+                return None
+            span = self._parse_item(code, rest)
+            if not span:
+                return None
+            spans.append(span)
+        return tuple(spans) or None
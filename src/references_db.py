@@ -7,7 +7,7 @@ class ReferenceDatabase:
     def __init__(self, data_dir, normalizer):
         self.data_dir = data_dir
         self.normalizer = normalizer
-        # Structure: source_key -> {"notes": [], "relations": []}
+        # Structure: source verse id (see BookNormalizer.verse_id) -> {"notes": [], "relations": []}
         self.in_memory_refs = defaultdict(lambda: {"notes": [], "relations": []})
         self.loaded_files = [] # Track which files contributed to in-memory state
 
@@ -16,7 +16,15 @@ class ReferenceDatabase:
         Loads references similar to the legacy load_cross_references function.
         """
         self.in_memory_refs.clear()
-        
+
+        for filename in self.list_files(source_filter=source_filter, scope=scope):
+            self._load_file(filename)
+
+    def list_files(self, source_filter=None, scope='all'):
+        """
+        Collection filenames matching the scope (nt, ot, generic, all)
+        and source filter (substring of the filename).
+        """
         files_to_load = []
         
         # Determine patterns to match based on scope
@@ -65,9 +73,7 @@ class ReferenceDatabase:
             
         # Fallback/Safety: If explicit source requested but not found via glob?
         # (e.g. file doesn't exist yet but user wants it loaded? No, we only load existing)
-            
-        for filename in files_to_load:
-            self._load_file(filename)
+        return sorted(files_to_load)
 
     def _load_file(self, filename):
         path = os.path.join(self.data_dir, filename)
@@ -87,7 +93,9 @@ class ReferenceDatabase:
                 data = json.load(f)
             
             for entry in data.get("cross_references", []):
-                src = entry["source"]
+                src = self.normalizer.verse_id_from_key(entry["source"])
+                if src is None:
+                    continue
                 # Structure merge
                 if src not in self.in_memory_refs:
                     self.in_memory_refs[src] = {"notes": [], "relations": []}
@@ -109,13 +117,9 @@ class ReferenceDatabase:
         Returns the subset of references for a specific book code.
         Used by the viewer to filter relevant refs.
         """
-        # The keys are like "GEN.1.1". We verify the prefix.
-        filtered = {}
-        idx = f"{book_code}."
-        for k, v in self.in_memory_refs.items():
-            if k.startswith(idx):
-                filtered[k] = v
-        return filtered
+        # The keys are verse ids: a book is a contiguous id range.
+        lo, hi = self.normalizer.book_id_range(book_code)
+        return {k: v for k, v in self.in_memory_refs.items() if lo <= k < hi}
 
     def add_relation(self, collection_name, source_ref, target_ref, rel_type="other", note=""):
         """
@@ -0,0 +1,62 @@
+import hashlib
+import os
+import pickle
+
+INDEX_VERSION = 1
+
+
+class SearchCache:
+    """
+    Verse text indexes of the search (SearchHandler.get_index), persisted in
+    the cache directory: one pickle per index (tob, n1904, n1904.lemma...)
+    holding the SearchIndex and its {verse id: verse node} map.
+
+    Each pickle is stamped with the version of its corpus and a hash of the
+    corpus source files (name, size and mtime of the .tf files), so that a
+    search loads the index without walking the corpus, and rebuilds it when
+    the corpus data changes.
+    """
+    def __init__(self, cache_dir, sources):
+        self.cache_dir = os.path.join(cache_dir, "search")
+        # corpus -> (version, directory of its Text-Fabric files)
+        self.sources = sources
+
+    def path(self, name):
+        return os.path.join(self.cache_dir, f"{name}.pickle")
+
+    def stamp(self, name):
+        """(corpus version, source hash) of an index ('n1904.lemma' is N1904's), None if unknown."""
+        source = self.sources.get(name.partition(".")[0])
+        if not source:
+            return None
+        version, directory = source
+        try:
+            files = sorted(f for f in os.listdir(directory) if f.endswith(".tf"))
+        except OSError:
+            return None
+        digest = hashlib.sha1()
+        for filename in files:
+            st = os.stat(os.path.join(directory, filename))
+            digest.update(f"{filename}:{st.st_size}:{st.st_mtime_ns}\n".encode("utf-8"))
+        return (version, digest.hexdigest())
+
+    def load(self, name, stamp):
+        """(index, nodes) of a fresh pickle, or None."""
+        try:
+            with open(self.path(name), "rb") as f:
+                data = pickle.load(f)
+            if data.get("version") == INDEX_VERSION and data.get("stamp") == stamp:
+                return data["index"], data["nodes"]
+        except Exception:
+            pass
+        return None
+
+    def save(self, name, stamp, index, nodes):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = self.path(name) + ".tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump({"version": INDEX_VERSION, "stamp": stamp, "index": index, "nodes": nodes}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path(name))
+        except OSError as e:
+            print(f"Warning: Could not save search index: {e}")
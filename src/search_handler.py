@@ -0,0 +1,302 @@
+import heapq
+import sys
+
+from reference_parser import ParsedReference
+from canon_metadata import iter_verse_nodes
+from search_index import SearchIndex, top_k, merge_scores, kwic, tokenize
+
+
+# Verse text extractors, one per corpus layout
+def verse_text_feature(api, node):
+    # TOB stores the whole verse in the 'text' feature of the verse node
+    return api.F.text.v(node)
+
+def verse_text_words(api, node):
+    # BJ stores the surface form on word nodes
+    return " ".join([api.F.text.v(w) for w in api.L.d(node, otype='word')])
+
+def verse_text_section(api, node):
+    # N1904 / LXX: standard TF text formatting
+    return api.T.text(node)
+
+def verse_lemmas(api, node):
+    # N1904 / LXX: dictionary forms of the words of the verse
+    if not hasattr(api.F, 'lemma'):
+        return ""
+    return " ".join([api.F.lemma.v(w) or "" for w in api.L.d(node, otype='word')])
+
+
+class SearchHandler:
+    # Corpora searched for each language code of -t/--tr
+    GREEK_CORPORA = ['n1904', 'lxx']
+    # Aligned search sources: shortcut -> corpora ('fr' resolves to the selected French version)
+    ALIGN_SOURCES = {
+        'gr': GREEK_CORPORA,
+        'lemma': ['n1904.lemma', 'lxx.lemma'],
+    }
+
+    def __init__(self, corpora, normalizer, reference_handler, notes_index=None, cache=None):
+        # corpora: name -> (api_provider, text_extractor)
+        self.corpora = corpora
+        self.normalizer = normalizer
+        self.handler = reference_handler
+        self.notes_index = notes_index
+        # Optional SearchCache: indexes persisted across runs
+        self.cache = cache
+        self._indexes = {}
+        # name -> (api, {verse id: verse node}) for lazy text access
+        self._sources = {}
+
+    def get_index(self, name):
+        if name in self._indexes:
+            return self._indexes[name]
+
+        index = None
+        entry = self.corpora.get(name)
+        stamp = self.cache.stamp(name) if self.cache and entry else None
+        cached = self.cache.load(name, stamp) if stamp else None
+        if cached:
+            # Persisted index: the corpus is only loaded if its texts are needed (concordance)
+            index, nodes = cached
+            self._sources[name] = (None, nodes)
+        elif entry:
+            provider, text_of = entry
+            api = provider()
+            if api:
+                index = SearchIndex()
+                nodes = {}
+                for key, node in iter_verse_nodes(api, self.normalizer.code_from_label):
+                    vid = self.normalizer.verse_id(*key)
+                    index.add_document(vid, text_of(api, node))
+                    nodes.setdefault(vid, node)
+                self._sources[name] = (api, nodes)
+                if stamp:
+                    self.cache.save(name, stamp, index, nodes)
+        self._indexes[name] = index
+        return index
+
+    def corpus_names(self, langs, french_version='tob'):
+        names = []
+        if 'fr' in langs:
+            names.append(french_version)
+        if 'gr' in langs:
+            names.extend(self.GREEK_CORPORA)
+        return names
+
+    def search(self, query, names):
+        """Verses matching every query term in at least one corpus, in canonical order."""
+        hits = set()
+        for name in names:
+            index = self.get_index(name)
+            if index:
+                hits |= index.match_all(query)
+        # Verse ids sort in canonical order
+        return sorted(hits)
+
+    def rank(self, query, names, top=10):
+        """Top verses by BM25 score summed over the selected corpora."""
+        score_maps = []
+        for name in names:
+            index = self.get_index(name)
+            if index:
+                score_maps.append(index.scores(query))
+        return top_k(merge_scores(*score_maps), top)
+
+    def align(self, clauses, french_version='tob'):
+        """
+        Verses satisfying every (corpora, terms) clause, e.g. N1904 lemma
+        πνεῦμα and TOB 'souffle'. Each clause is answered from its own indexes,
+        then the verse-id sets are intersected, smallest first.
+        """
+        hit_sets = []
+        for names, terms in clauses:
+            hits = set()
+            for name in names:
+                if name == 'fr':
+                    name = french_version
+                index = self.get_index(name)
+                if index:
+                    hits |= index.match_all(terms)
+            hit_sets.append(hits)
+
+        if not hit_sets:
+            return []
+        hit_sets.sort(key=len)
+        result = hit_sets[0]
+        for hits in hit_sets[1:]:
+            result = result & hits
+            if not result:
+                break
+        return sorted(result)
+
+    def _concordance_stream(self, name, terms, width):
+        index = self.get_index(name)
+        if not index:
+            return
+        api, nodes = self._sources[name]
+        provider, text_of = self.corpora[name]
+        if api is None and provider:
+            # Index loaded from the cache: the corpus is loaded now
+            api = provider()
+            if not api:
+                return
+            self._sources[name] = (api, nodes)
+
+        keys = set()
+        for term in terms:
+            keys.update(index.postings.get(term, ()))
+        # Verse texts are only fetched when the consumer gets to them
+        for key in sorted(keys):
+            for left, keyword, right in kwic(text_of(api, nodes[key]), terms, width):
+                yield key, left, keyword, right
+
+    def concordance(self, term, names, width=30):
+        """
+        Lazy keyword-in-context lines (key, left, keyword, right) for every
+        occurrence of the term in the selected corpora, in book order.
+        """
+        terms = set(tokenize(term))
+        streams = [self._concordance_stream(name, terms, width) for name in names]
+        return heapq.merge(*streams, key=lambda line: line[0])
+
+    def parse_clause(self, clause):
+        """
+        'SOURCE:TERMS' -> (corpora, terms). SOURCE is a corpus (tob, bj, n1904,
+        lxx, n1904.lemma, lxx.lemma) or a shortcut (fr, gr, lemma).
+        """
+        source, sep, terms = clause.partition(":")
+        if not sep or not terms.strip():
+            return None
+        source = source.strip().lower()
+        if source == 'fr':
+            return ['fr'], terms
+        if source in self.ALIGN_SOURCES:
+            return self.ALIGN_SOURCES[source], terms
+        if source in self.corpora:
+            return [source], terms
+        return None
+
+    def _label(self, key):
+        code, chapter, verse = self.normalizer.split_verse_id(key)
+        book = self.normalizer.books.get(code)
+        return f"{(book.fr_abbr if book else None) or code} {chapter}:{verse}"
+
+    def _structured(self):
+        # json / jsonl: the verse records of the hits only (ReferenceHandler.output_format)
+        return getattr(self.handler, 'output_format', 'text') in ('json', 'jsonl')
+
+    def _header(self, text):
+        """Hit header: text output only."""
+        if not self._structured():
+            print(text)
+
+    def _message(self, text):
+        """Errors and counts: on stderr in structured formats, to keep the records parseable."""
+        print(text, file=sys.stderr if self._structured() else sys.stdout)
+
+    def _print_hit(self, key, compact_mode, display):
+        self.handler.handle_reference(ParsedReference.of(*self.normalizer.split_verse_id(key)), compact_mode=compact_mode, **display)
+
+    def handle_search(self, query, langs=None, ranked=False, top=10, french_version='tob', compact_mode=0, **display):
+        if not query:
+            self._message("Error: Missing search terms.")
+            return
+
+        names = self.corpus_names(langs or ['fr', 'gr'], french_version)
+
+        if ranked:
+            results = self.rank(query, names, top)
+            for rank, (score, key) in enumerate(results, 1):
+                # print_verse suppresses its header in compact modes, so name the verse here
+                if compact_mode > 0:
+                    self._header(f"\n{self._label(key)} (score {score:.2f})")
+                else:
+                    self._header(f"\n#{rank} (score {score:.2f})")
+                self._print_hit(key, compact_mode, dict(display, french_version=french_version))
+        else:
+            results = self.search(query, names)
+            for key in results:
+                if compact_mode > 0:
+                    self._header(f"\n{self._label(key)}")
+                self._print_hit(key, compact_mode, dict(display, french_version=french_version))
+
+        self._message(f"\n{len(results)} verse(s) found.")
+
+    def handle_align_search(self, clauses, french_version='tob', compact_mode=0, **display):
+        parsed = []
+        for clause in clauses:
+            p = self.parse_clause(clause)
+            if not p:
+                self._message(f"Error: Invalid aligned search clause '{clause}'. Expected SOURCE:TERMS (e.g. lemma:πνεῦμα fr:souffle).")
+                return
+            parsed.append(p)
+        if len(parsed) < 2:
+            self._message("Error: Aligned search needs at least two clauses (e.g. lemma:πνεῦμα fr:souffle).")
+            return
+
+        results = self.align(parsed, french_version)
+        for key in results:
+            if compact_mode > 0:
+                self._header(f"\n{self._label(key)}")
+            self._print_hit(key, compact_mode, dict(display, french_version=french_version))
+
+        self._message(f"\n{len(results)} verse(s) found.")
+
+    def handle_concordance(self, term, langs=None, width=30, sort='book', french_version='tob'):
+        if not term:
+            print("Error: Missing concordance term.")
+            return
+
+        lines = self.concordance(term, self.corpus_names(langs or ['fr', 'gr'], french_version), width)
+        if sort == 'left':
+            # Classic concordance order: by the words nearest to the keyword, leftwards
+            lines = sorted(lines, key=lambda line: tokenize(line[1])[::-1])
+        elif sort == 'right':
+            lines = sorted(lines, key=lambda line: tokenize(line[3]))
+
+        count = 0
+        for key, left, keyword, right in lines:
+            left = left.replace("\n", " ")
+            right = right.replace("\n", " ")
+            print(f"{self._label(key):<12} {left:>{width}} {keyword} {right}")
+            count += 1
+
+        print(f"\n{count} occurrence(s).")
+
+    def handle_notes_search(self, query, source_filter=None, compact_mode=0):
+        """Search the notes of the reference collections (TOB notes, personal notes...)."""
+        if not query:
+            print("Error: Missing search terms.")
+            return
+        if not self.notes_index:
+            print("Error: Notes index unavailable.")
+            return
+
+        # Refresh every collection so the cache stays complete; filter at query time
+        self.notes_index.refresh()
+        filenames = None
+        if source_filter:
+            filenames = set(self.notes_index.ref_db.list_files(source_filter=source_filter))
+        hits = self.notes_index.search(query, filenames)
+
+        # Canonical order, collections grouped per verse
+        def sort_key(hit):
+            return (self.normalizer.verse_id_from_key(hit[1]) or 0, hit[0])
+
+        format_ref = self.handler.printer.format_ref_fr
+        for filename, source, rel_type, target, text in sorted(hits, key=sort_key):
+            collection = filename.replace("references_", "").replace(".json", "")
+            if compact_mode > 0:
+                label = f"[{rel_type.capitalize()} {format_ref(target)}]" if rel_type else "[Note]"
+                print(f"{format_ref(source)} ({collection}) {label}: {text}")
+                continue
+
+            print(f"\n{format_ref(source)} ({collection})")
+            if rel_type:
+                print(f"    {rel_type.capitalize()}: ")
+                print(f"        {format_ref(target)} ({text})")
+            else:
+                print("    Notes:")
+                print(f"        {text}")
+
+        print(f"\n{len(hits)} note(s) found.")
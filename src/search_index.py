@@ -0,0 +1,124 @@
+import heapq
+import math
+import re
+import unicodedata
+from collections import defaultdict
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_token(word):
+    """
+    Fold a word to its search form: lowercase, no accents or breathings,
+    final sigma folded to sigma. "Baptême" -> "bapteme", "Λόγος" -> "λογοσ".
+    """
+    decomposed = unicodedata.normalize("NFD", word.lower())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return stripped.replace("ς", "σ")
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return [normalize_token(t) for t in TOKEN_RE.findall(text)]
+
+
+def kwic(text, terms, width=30):
+    """
+    Keyword-in-context: yield (left, keyword, right) for every word of text
+    whose search form is in terms, with up to width characters of context.
+    """
+    if not text:
+        return
+    for m in TOKEN_RE.finditer(text):
+        if normalize_token(m.group()) in terms:
+            left = text[max(0, m.start() - width):m.start()]
+            right = text[m.end():m.end() + width]
+            yield left, m.group(), right
+
+
+class SearchIndex:
+    """
+    Inverted index over verse texts, keyed by packed verse id.
+    Supports boolean (all terms) lookups and BM25 scoring.
+    """
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        # term -> {doc_key: term frequency}
+        self.postings = defaultdict(dict)
+        self.doc_lengths = {}
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def add_document(self, key, text):
+        tokens = tokenize(text)
+        if not tokens:
+            return
+        # Re-adding a key (e.g. split verses) accumulates into the same document
+        self.total_length += len(tokens)
+        self.doc_lengths[key] = self.doc_lengths.get(key, 0) + len(tokens)
+        for token in tokens:
+            docs = self.postings[token]
+            docs[key] = docs.get(key, 0) + 1
+
+    def match_all(self, query):
+        """Keys of the documents containing every term of the query."""
+        terms = tokenize(query)
+        if not terms:
+            return set()
+        # Intersect starting from the rarest term to keep the working set small
+        postings = sorted((self.postings.get(t, {}) for t in set(terms)), key=len)
+        result = set(postings[0])
+        for docs in postings[1:]:
+            result.intersection_update(docs)
+            if not result:
+                break
+        return result
+
+    def scores(self, query):
+        """BM25 score of every document matching at least one query term."""
+        n_docs = len(self.doc_lengths)
+        if not n_docs:
+            return {}
+        avgdl = self.total_length / n_docs
+        k1, b = self.k1, self.b
+
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            df = len(docs)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for key, tf in docs.items():
+                norm = k1 * (1 - b + b * self.doc_lengths[key] / avgdl)
+                scores[key] += idf * tf * (k1 + 1) / (tf + norm)
+        return scores
+
+
+def top_k(scores, k):
+    """
+    Best k (score, key) pairs, best first.
+    Keeps a bounded min-heap of size k instead of sorting every match.
+    """
+    if k <= 0:
+        return []
+    heap = []
+    for key, score in scores.items():
+        if len(heap) < k:
+            heapq.heappush(heap, (score, key))
+        elif score > heap[0][0]:
+            heapq.heappushpop(heap, (score, key))
+    return sorted(heap, key=lambda item: (-item[0], item[1]))
+
+
+def merge_scores(*score_maps):
+    """Sum per-verse scores coming from several indexes (e.g. French and Greek)."""
+    merged = defaultdict(float)
+    for score_map in score_maps:
+        for key, score in score_map.items():
+            merged[key] += score
+    return merged
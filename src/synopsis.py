@@ -0,0 +1,211 @@
+import json
+import shutil
+import sys
+import textwrap
+from concurrent.futures import ThreadPoolExecutor
+
+# Books shown side by side when the passage is in a Gospel
+GOSPELS = ['MAT', 'MRK', 'LUK', 'JHN']
+
+# Space between two columns
+GUTTER = " | "
+
+
+class SynopsisHandler:
+    """
+    Synopsis of a passage: the passage and its parallels (relations of type
+    'parallel' in the reference collections), one column per book, rows
+    aligned on the verses that the relations link.
+
+    Every parallel of every verse is collected first, then the texts of all
+    the verses of all the columns are fetched with one batched lookup per
+    corpus (VersePrinter.verse_texts), the corpora concurrently.
+    """
+    def __init__(self, normalizer, ref_db, printer, metadata=None, reference_handler=None):
+        self.normalizer = normalizer
+        self.ref_db = ref_db
+        self.printer = printer
+        self.out = printer.out
+        self.metadata = metadata
+        self.reference_handler = reference_handler
+
+    def source_ids(self, ref_str):
+        """Verse ids of a passage, open ends bounded by the canon metadata."""
+        END = self.normalizer.VERSE_END
+        ids = []
+        for span in self.normalizer.parse_passage(ref_str) or ():
+            code, c1, v1 = self.normalizer.split_verse_id(span.start)
+            _, c2, v2 = self.normalizer.split_verse_id(span.end)
+            if c2 == END:
+                c2 = self.metadata.max_chapter_count(code) if self.metadata else None
+            for chapter in range(c1, (c2 or 0) + 1):
+                lo = v1 if chapter == c1 else 1
+                hi = v2 if chapter == c2 else END
+                if hi == END:
+                    hi = self.metadata.max_verse_count(code, chapter) if self.metadata else None
+                if not hi:
+                    c2 = None
+                    break
+                ids.extend(self.normalizer.verse_id(code, chapter, v) for v in range(lo, hi + 1))
+            if not c2 and self.reference_handler:
+                # Unknown structure: let the driver corpus enumerate the verses
+                ids = [r["id"] for r in self.reference_handler.iter_records(ref_str, show_greek=False, show_french=False)]
+                break
+        return ids
+
+    def target_ids(self, target):
+        """Verse ids of a relation target ('MAT.3.1', 'MAT.3.1-MAT.3.6' or 'MAT.3.1-6')."""
+        start, _, end = target.partition("-")
+        first = self.normalizer.verse_id_from_key(start)
+        if not first:
+            return []
+        if not end:
+            return [first]
+        if "." in end:
+            last = self.normalizer.verse_id_from_key(end)
+        else:
+            last = first - first % 1000 + int(end) if end.isdigit() else None
+        if not last or last < first:
+            return [first]
+        if self.normalizer.chapter_id(first) != self.normalizer.chapter_id(last):
+            # Cross-chapter range: both ends only, chapter lengths are corpus data
+            return [first, last]
+        return list(range(first, last + 1))
+
+    def parallels(self, source_ids):
+        """
+        {verse id: {book code: [target verse ids]}} of the parallel relations of
+        the source verses, towards the other books (the Gospels for a Gospel).
+        """
+        source_book = self.normalizer.split_verse_id(source_ids[0])[0] if source_ids else None
+        links = {}
+        for vid in source_ids:
+            entry = self.ref_db.in_memory_refs.get(vid)
+            if not entry:
+                continue
+            for relation in entry.get("relations", []):
+                if relation.get("type", "").lower() != "parallel":
+                    continue
+                for target in self.target_ids(relation["target"]):
+                    book = self.normalizer.split_verse_id(target)[0]
+                    if book == source_book or (source_book in GOSPELS and book not in GOSPELS):
+                        continue
+                    links.setdefault(vid, {}).setdefault(book, []).append(target)
+        return links
+
+    def build(self, ref_str, corpora=('tob',)):
+        """
+        Synopsis as data: {"columns": [{"book", "label", "verses"}],
+        "rows": [[verse ids of each column]]}, and {verse id: {corpus: text}}.
+        """
+        source_ids = self.source_ids(ref_str)
+        if not source_ids:
+            return None, {}
+        source_book = self.normalizer.split_verse_id(source_ids[0])[0]
+        links = self.parallels(source_ids)
+
+        # Columns: the passage, then each parallel book in canonical order
+        column_ids = {source_book: list(source_ids)}
+        for by_book in links.values():
+            for book, targets in by_book.items():
+                column_ids.setdefault(book, []).extend(targets)
+        books = [source_book] + sorted((b for b in column_ids if b != source_book), key=self.normalizer.book_order.get)
+        for book in books:
+            column_ids[book] = sorted(set(column_ids[book]))
+
+        # Rows: a source verse starts a row; each column catches up to the
+        # verses linked to it, so parallels print side by side
+        rows = []
+        pending = {book: list(column_ids[book]) for book in books[1:]}
+        for vid in source_ids:
+            row = [[vid]]
+            for book in books[1:]:
+                cell = []
+                linked = links.get(vid, {}).get(book)
+                if linked:
+                    last = max(linked)
+                    while pending[book] and pending[book][0] <= last:
+                        cell.append(pending[book].pop(0))
+                row.append(cell)
+            rows.append(row)
+        if any(pending.values()):
+            rows.append([[]] + [pending[book] for book in books[1:]])
+
+        # Texts of every verse of the synopsis, one batch per corpus, concurrently.
+        # Loading corpora redirects sys.stdout (see main.py), which overlapping
+        # loads can leave on a closed file: the real one is restored afterwards.
+        all_ids = [vid for book in books for vid in column_ids[book]]
+        stdout = sys.stdout
+        try:
+            with ThreadPoolExecutor(max_workers=max(len(corpora), 1)) as pool:
+                fetched = dict(zip(corpora, pool.map(lambda corpus: self.printer.verse_texts(all_ids, corpus), corpora)))
+        finally:
+            sys.stdout = stdout
+        texts = {vid: {corpus: fetched[corpus].get(vid) for corpus in corpora} for vid in all_ids}
+
+        columns = [{"book": book, "label": self._label(column_ids[book]), "verses": column_ids[book]} for book in books]
+        return {"columns": columns, "rows": rows}, texts
+
+    def _label(self, ids):
+        """'Mc 1:1-8', 'Mt 3:1-4:2'."""
+        code, c1, v1 = self.normalizer.split_verse_id(ids[0])
+        _, c2, v2 = self.normalizer.split_verse_id(ids[-1])
+        book = self.normalizer.books.get(code)
+        abbr = book.fr_abbr if book else code
+        if ids[0] == ids[-1]:
+            return f"{abbr} {c1}:{v1}"
+        if c1 == c2:
+            return f"{abbr} {c1}:{v1}-{v2}"
+        return f"{abbr} {c1}:{v1}-{c2}:{v2}"
+
+    def handle_synopsis(self, ref_str, corpora=('tob',), width=None):
+        synopsis, texts = self.build(ref_str, corpora)
+        if not synopsis:
+            self.out.line(f"Could not find reference: {ref_str}")
+            self.out.flush()
+            return
+
+        if self.printer.output_format != 'text':
+            data = dict(synopsis, texts={self.normalizer.verse_key(vid): t for vid, t in texts.items()})
+            self.out.line(json.dumps(data, ensure_ascii=False))
+            self.out.flush()
+            return
+
+        if len(synopsis["columns"]) == 1:
+            self.out.line(f"No parallel passage found for {ref_str}.")
+        for line in self.format_columns(synopsis, texts, corpora, width):
+            self.out.line(line)
+        self.out.flush()
+
+    def format_columns(self, synopsis, texts, corpora, width=None):
+        """Aligned terminal columns: a header line, then each row's cells wrapped side by side."""
+        if width is None:
+            width = shutil.get_terminal_size().columns
+        n = len(synopsis["columns"])
+        col_width = max((width - len(GUTTER) * (n - 1)) // n, 10)
+
+        def pad(text):
+            return text + " " * (col_width - len(text))
+
+        lines = [GUTTER.join(pad(c["label"][:col_width]) for c in synopsis["columns"]).rstrip()]
+        lines.append(GUTTER.join("-" * col_width for _ in range(n)))
+        for row in synopsis["rows"]:
+            cells = [self._cell_lines(ids, texts, corpora, col_width) for ids in row]
+            height = max(len(cell) for cell in cells)
+            if not height:
+                continue
+            for i in range(height):
+                lines.append(GUTTER.join(pad(cell[i] if i < len(cell) else "") for cell in cells).rstrip())
+            lines.append("")
+        return lines
+
+    def _cell_lines(self, ids, texts, corpora, col_width):
+        lines = []
+        for vid in ids:
+            _, chapter, verse = self.normalizer.split_verse_id(vid)
+            prefix = f"{chapter}:{verse} "
+            for corpus in corpora:
+                text = texts.get(vid, {}).get(corpus) or "-"
+                lines.extend(textwrap.wrap(prefix + text, col_width) or [prefix])
+                prefix = ""
+        return lines
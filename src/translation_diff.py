@@ -0,0 +1,123 @@
+import difflib
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# Spans of at least this many verses are diffed in worker processes
+PARALLEL_MIN = 200
+
+# Verses sent to a worker at once
+CHUNK_SIZE = 64
+
+# Terminal colours of the removed / added words
+DELETE_COLOR = "\x1b[31m"
+INSERT_COLOR = "\x1b[32m"
+RESET = "\x1b[0m"
+
+
+def diff_words(pair):
+    """
+    Word-level diff of two texts: list of [op, text] segments with op
+    '=' (common), '-' (only in the first text) or '+' (only in the second).
+    A module-level function, so that worker processes can run it.
+    """
+    a, b = pair
+    a_words = (a or "").split()
+    b_words = (b or "").split()
+    segments = []
+    matcher = difflib.SequenceMatcher(None, a_words, b_words, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            segments.append(['=', " ".join(a_words[i1:i2])])
+            continue
+        # 'replace' is a deletion followed by an insertion
+        if i2 > i1:
+            segments.append(['-', " ".join(a_words[i1:i2])])
+        if j2 > j1:
+            segments.append(['+', " ".join(b_words[j1:j2])])
+    return segments
+
+
+def format_diff(segments, color=False):
+    """One line of a diff: removed words as [-...-], added ones as {+...+}, coloured on a terminal."""
+    parts = []
+    for op, text in segments:
+        if op == '-':
+            parts.append(f"{DELETE_COLOR}[-{text}-]{RESET}" if color else f"[-{text}-]")
+        elif op == '+':
+            parts.append(f"{INSERT_COLOR}{{+{text}+}}{RESET}" if color else f"{{+{text}+}}")
+        else:
+            parts.append(text)
+    return " ".join(parts)
+
+
+class TranslationDiff:
+    """
+    Verse by verse, word-level comparison of two French versions (tob, bj)
+    over a passage. Each version is fetched with one walk of its node index
+    (VersePrinter.passage_texts); long spans such as whole books are diffed
+    in a pool of worker processes.
+    """
+    def __init__(self, normalizer, printer, workers=None, min_parallel=PARALLEL_MIN):
+        self.normalizer = normalizer
+        self.printer = printer
+        self.out = printer.out
+        self.workers = workers
+        self.min_parallel = min_parallel
+
+    def diffs(self, ref_str, version_a='tob', version_b='bj'):
+        """[(verse id, text a, text b, segments)] in verse order, None for an unknown passage."""
+        spans = self.normalizer.parse_passage(ref_str)
+        if not spans:
+            return None
+        texts_a = self.printer.passage_texts(spans, version_a)
+        texts_b = self.printer.passage_texts(spans, version_b)
+        vids = sorted(set(texts_a) | set(texts_b))
+        pairs = [(texts_a.get(vid), texts_b.get(vid)) for vid in vids]
+
+        if len(pairs) >= self.min_parallel:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                segments = list(pool.map(diff_words, pairs, chunksize=CHUNK_SIZE))
+        else:
+            segments = [diff_words(pair) for pair in pairs]
+        return [(vid, a, b, diff) for vid, (a, b), diff in zip(vids, pairs, segments)]
+
+    def handle_diff(self, ref_str, version_a='tob', version_b='bj', color=None):
+        results = self.diffs(ref_str, version_a, version_b)
+        if results is None:
+            self.out.line(f"Could not find reference: {ref_str}")
+            self.out.flush()
+            return
+
+        if self.printer.output_format != 'text':
+            # One record per verse, as the verse records of the other commands
+            for vid, a, b, diff in results:
+                self.printer.emit({
+                    "id": vid,
+                    "ref": self.normalizer.verse_key(vid),
+                    "versions": [version_a, version_b],
+                    "texts": {version_a: a, version_b: b},
+                    "diff": diff,
+                })
+            self.printer.finish()
+            self.out.flush()
+            return
+
+        if color is None:
+            # Colours on a terminal only, plain markers in pipes and files
+            stream = self.out.stream or sys.stdout
+            color = stream.isatty()
+        self.out.line(f"--- {version_a.upper()}")
+        self.out.line(f"+++ {version_b.upper()}")
+        changed = 0
+        current_chapter = None
+        for vid, a, b, diff in results:
+            code, chapter, verse = self.normalizer.split_verse_id(vid)
+            if (code, chapter) != current_chapter:
+                current_chapter = (code, chapter)
+                book = self.normalizer.books.get(code)
+                self.out.line(f"\n{book.fr_label if book else code} {chapter}")
+            if any(op != '=' for op, _ in diff):
+                changed += 1
+            self.out.line(f"v{verse}. {format_diff(diff, color)}")
+        self.out.line(f"\n{changed} of {len(results)} verse(s) differ.")
+        self.out.flush()
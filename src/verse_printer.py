@@ -1,5 +1,39 @@
+import json
+
+from reference_parser import ParsedReference
+from output_writer import OutputWriter
+from interlinear import Interlinear, format_interlinear
+from book_normalizer import Book
+
+# Mark of the target verse among its --context neighbours
+HIGHLIGHT_MARKER = "▶ "
+
+# French translations (-b), in print order
+FRENCH_VERSIONS = ('tob', 'bj')
+
+
+def french_versions(french_version):
+    """
+    Tuple of French versions from a -b value: 'tob', 'bj', 'all', a comma
+    separated list ('tob,bj') or a sequence of names. The first one drives
+    the numbering of passages missing from the Greek / Hebrew corpora.
+    """
+    if not french_version:
+        return ('tob',)
+    if isinstance(french_version, str):
+        if french_version.lower() == 'all':
+            return FRENCH_VERSIONS
+        french_version = french_version.split(",")
+    versions = []
+    for version in french_version:
+        version = version.strip().lower()
+        if version and version not in versions:
+            versions.append(version)
+    return tuple(versions) or ('tob',)
+
+
 class VersePrinter:
-    def __init__(self, tob_provider, n1904_provider, normalizer, reference_db, bhsa_provider=None, bj_provider=None):
+    def __init__(self, tob_provider, n1904_provider, normalizer, reference_db, bhsa_provider=None, bj_provider=None, versification=None, writer=None, output_format='text'):
         self.tob_provider = tob_provider
         self.n1904_provider = n1904_provider
         self.bj_provider = bj_provider
@@ -10,6 +44,15 @@ class VersePrinter:
         self.normalizer = normalizer
         self.ref_db = reference_db
         self.bhsa_provider = bhsa_provider
+        # Verse numbering maps between corpora (Versification), None keeps the numbers
+        self.versification = versification
+        # Buffered output (OutputWriter), shared with ReferenceHandler which flushes it
+        self.out = writer or OutputWriter()
+        # 'text' (human readable), 'json' (array of verse records) or 'jsonl' (one record per line)
+        self.output_format = output_format
+        self._records = 0
+        # Cached per-word feature arrays for the interlinear and English rows
+        self.interlinear = Interlinear()
 
     @property
     def tob_api(self):
@@ -23,24 +66,46 @@ class VersePrinter:
             self._bj_api = self.bj_provider()
         return self._bj_api
 
+    def _book(self, book):
+        # Callers pass a Book record, or a label from any corpus resolved in one lookup
+        if isinstance(book, Book):
+            return book
+        return self.normalizer.book(book)
+
+    def _aligned(self, book, chapter_num, verse_num, source, target):
+        """
+        Parallel verse in corpus `target` of a verse numbered as in corpus `source`
+        (LXX Ps 22:1 -> TOB Ps 23:1). Returns (Book, chapter, verse).
+        """
+        chapter_num, verse_num = int(chapter_num), int(verse_num)
+        if not self.versification or not source or not book:
+            return book, chapter_num, verse_num
+        code, chapter_num, verse_num = self.versification.map_reference(book.code, chapter_num, verse_num, source, target)
+        return self.normalizer.books.get(code, book), chapter_num, verse_num
+
     @property
     def app(self):
         if self._n1904_app is None and self.n1904_provider:
              self._n1904_app = self.n1904_provider()
         return self._n1904_app
 
-    def get_hebrew_text(self, book_en, chapter_num, verse_num):
+    def _bhsa_node(self, book_en, chapter_num, verse_num, source=None):
+        """(BHSA app, verse node) of a verse, node None if missing."""
         if not self.bhsa_provider: 
-            return None
+            return None, None
             
+        # bhsa_provider returns the OfflineBHSAApp instance, which resolves parsed references
         bhsa_app = self.bhsa_provider()
-        if not bhsa_app: return None
+        if not bhsa_app: return None, None
 
-        # Look up node in BHSA
-        # Ideally use OfflineBHSAApp nodeFromSectionStr, but here we might not have that method exposed on VersePrinter interface easily without creating a new instance.
-        # But wait, bhsa_provider returns the OfflineBHSAApp instance.
-        
-        node = bhsa_app.nodeFromSectionStr(f"{book_en} {chapter_num}:{verse_num}")
+        book = self._book(book_en)
+        if not book: return bhsa_app, None
+        # 'source' names the corpus numbering of chapter_num / verse_num
+        book, chapter_num, verse_num = self._aligned(book, chapter_num, verse_num, source, 'bhsa')
+        return bhsa_app, bhsa_app.nodeFromSectionStr(ParsedReference.of(book.code, chapter_num, verse_num))
+
+    def get_hebrew_text(self, book_en, chapter_num, verse_num, source=None):
+        bhsa_app, node = self._bhsa_node(book_en, chapter_num, verse_num, source)
         if node:
             # Get text from words
             # Confirmed via research: g_word_utf8
@@ -49,25 +114,19 @@ class VersePrinter:
             return text
         return None
 
-    def get_bj_text(self, book_en, chapter_num, verse_num):
+    def get_bj_text(self, book_en, chapter_num, verse_num, source=None):
         if not self.bj_api:
             return ""
         
-        # Determine BJ book label from "bj" entry in bible_books.json
-        # 1. Normalize book_en to code
-        book_code = self.normalizer.n1904_to_code.get(book_en)
-        if not book_code:
-             # Try abbreviation
-             canon = self.normalizer.abbreviations.get(book_en)
-             if canon:
-                 book_code = self.normalizer.n1904_to_code.get(canon)
-        
-        if not book_code:
+        # 1. Resolve book_en to its record
+        book = self._book(book_en)
+        if not book:
             return f"[BJ: Unknown Book '{book_en}']"
+        book, chapter_num, verse_num = self._aligned(book, chapter_num, verse_num, source, 'bj')
+        book_code = book.code
             
         # 2. Get BJ label from JSON data (loaded in normalizer?)
-        # Normalizer has `code_to_fr_abbr` but not `code_to_bj` directly exposed?
-        # We might need to load it or use a mapping.
+        # The Book record has `bj_label` ("La Genèse"), but is it what BJ TF uses?
         # But wait, BJ TF uses the *label* as the value of the 'book' feature in my conversion?
         # Yes: `f.write(f"{d['id']}\t{d['book']}\n")` where `d['book']` was the Code (e.g. "GEN")?
         # Let me re-verify convert_bj_epub.py.
@@ -128,32 +187,19 @@ class VersePrinter:
         # Let's manual join to be safe, or use `features='text'`
         return " ".join([F.text.v(w) for w in words])
 
-    def get_french_text(self, book_en, chapter_num, verse_num):
+    def get_french_text(self, book_en, chapter_num, verse_num, source=None):
         if not self.tob_api:
             return ""
             
         F = self.tob_api.F
         L = self.tob_api.L
         
-        # Normalize book_en to ensure we match the keys in n1904_to_tob
-        book_fr = self.normalizer.n1904_to_tob.get(book_en)
-        
-        if not book_fr:
-            # Try to find code
-            book_code = self.normalizer.n1904_to_code.get(book_en) or \
-                        self.normalizer.n1904_to_code.get(self.normalizer.abbreviations.get(book_en, ""))
-                        
-            if book_code:
-                en_key = self.normalizer.code_to_n1904.get(book_code)
-                if en_key:
-                    book_fr = self.normalizer.n1904_to_tob.get(en_key)
-
-        if not book_fr:
-            # Try direct mapping if not found (e.g. if N1904 uses spaces instead of underscores)
-            book_fr = self.normalizer.n1904_to_tob.get(book_en.replace(" ", "_"))
-            
-        if not book_fr:
+        # TOB book nodes carry the French label
+        book = self._book(book_en)
+        if not book:
             return f"[TOB: Book '{book_en}' not found]"
+        book, chapter_num, verse_num = self._aligned(book, chapter_num, verse_num, source, 'tob')
+        book_fr = book.fr_label
 
         # 1. Find book node
         book_node = None
@@ -188,6 +234,112 @@ class VersePrinter:
         # 4. Get text
         return F.text.v(verse_node)
 
+    def french_texts(self, book, chapter_num, verse_num, versions=('tob',), source=None):
+        """{version: text or None} of a verse in each French version ('tob', 'bj')."""
+        texts = {}
+        for version in versions:
+            if version == 'bj':
+                text = self.get_bj_text(book, chapter_num, verse_num, source)
+            else:
+                # Default to TOB
+                text = self.get_french_text(book, chapter_num, verse_num, source)
+            # Lookup errors ("[TOB: Chapter 3 not found]") are common across versions: no text
+            texts[version] = text if text and not text.startswith("[") else None
+        return texts
+
+    def verse_texts(self, vids, corpus='tob'):
+        """
+        Texts of many verses at once: {verse id: text} ('tob', 'bj' or 'n1904').
+        TOB / BJ book and chapter nodes are resolved once per book and chapter
+        instead of once per verse as in get_french_text.
+        """
+        texts = {}
+        by_chapter = {}
+        for vid in sorted(set(vids)):
+            code, chapter, verse = self.normalizer.split_verse_id(vid)
+            by_chapter.setdefault((code, chapter), []).append((vid, verse))
+
+        if corpus == 'n1904':
+            app = self.app
+            if not app:
+                return texts
+            T = app.api.T
+            for (code, chapter), verses in by_chapter.items():
+                book = self.normalizer.books.get(code)
+                for vid, verse in verses:
+                    node = T.nodeFromSection((book.en_key, chapter, verse)) if book else None
+                    if node:
+                        texts[vid] = T.text(node)
+            return texts
+
+        api = self.bj_api if corpus == 'bj' else self.tob_api
+        if not api:
+            return texts
+        F = api.F
+        L = api.L
+        book_nodes = self._book_nodes(api)
+        chapter_nodes = {}
+        for (code, chapter), verses in by_chapter.items():
+            book_node = book_nodes.get(self._book_key(code, corpus))
+            if not book_node:
+                continue
+            if book_node not in chapter_nodes:
+                chapter_nodes[book_node] = {F.chapter.v(n): n for n in L.d(book_node, otype='chapter')}
+            chapter_node = chapter_nodes[book_node].get(chapter)
+            if not chapter_node:
+                continue
+            verse_nodes = {F.verse.v(n): n for n in L.d(chapter_node, otype='verse')}
+            for vid, verse in verses:
+                node = verse_nodes.get(verse)
+                if node:
+                    texts[vid] = self._verse_node_text(api, node, corpus)
+        return texts
+
+    def passage_texts(self, spans, corpus='tob'):
+        """
+        {verse id: text} of every verse of VerseSpans in 'tob' or 'bj', open
+        ends included: one walk of the book's chapter and verse nodes per span,
+        without knowing the chapter sizes beforehand.
+        """
+        texts = {}
+        api = self.bj_api if corpus == 'bj' else self.tob_api
+        if not api:
+            return texts
+        F = api.F
+        L = api.L
+        book_nodes = self._book_nodes(api)
+        for span in spans:
+            code, c1, v1 = self.normalizer.split_verse_id(span.start)
+            _, c2, v2 = self.normalizer.split_verse_id(span.end)
+            book_node = book_nodes.get(self._book_key(code, corpus))
+            if not book_node:
+                continue
+            for chapter_node in L.d(book_node, otype='chapter'):
+                chapter = F.chapter.v(chapter_node)
+                if chapter < c1 or chapter > c2:
+                    continue
+                for verse_node in L.d(chapter_node, otype='verse'):
+                    verse = F.verse.v(verse_node)
+                    if (c1, v1) <= (chapter, verse) <= (c2, v2):
+                        texts[self.normalizer.verse_id(code, chapter, verse)] = self._verse_node_text(api, verse_node, corpus)
+        return texts
+
+    def _book_nodes(self, api):
+        # Book feature value -> book node, one scan of the book nodes
+        return {api.F.book.v(n): n for n in api.F.otype.s('book')}
+
+    def _book_key(self, code, corpus):
+        # BJ book nodes carry the book code, TOB ones the French label
+        if corpus == 'bj':
+            return code
+        book = self.normalizer.books.get(code)
+        return book.fr_label if book else None
+
+    def _verse_node_text(self, api, node, corpus):
+        if corpus == 'bj':
+            return " ".join(api.F.text.v(w) for w in api.L.d(node, otype='word'))
+        return api.F.text.v(node)
+
     def format_ref_fr(self, target_str):
         """
         Format a reference like 'ACT.1.25-ACT.1.26' into 'Ac 1:25-26'.
@@ -201,7 +353,8 @@ class VersePrinter:
                 book_code = parts[0]
                 chapter = parts[1]
                 verse = parts[2]
-                fr_abbr = self.normalizer.code_to_fr_abbr.get(book_code, book_code)
+                book = self.normalizer.books.get(book_code)
+                fr_abbr = (book.fr_abbr if book else None) or book_code
                 return fr_abbr, chapter, verse
             return None, None, None
 
@@ -233,12 +386,30 @@ class VersePrinter:
             
         return target_str
 
-    def print_verse(self, node=None, book_en=None, chapter=None, verse=None, show_english=False, show_greek=True, show_french=True, show_crossref=False, cross_refs=None, show_crossref_text=False, source_app=None, show_hebrew=False, french_version='tob', compact_mode=0):
+    def print_verse(self, node=None, book_en=None, chapter=None, verse=None, show_english=False, show_greek=True, show_french=True, show_crossref=False, cross_refs=None, show_crossref_text=False, source_app=None, show_hebrew=False, french_version='tob', compact_mode=0, source_corpus=None, show_interlinear=False, highlight=False):
+        # One data path for every output format: build the record, then format it
+        record = self.verse_record(node=node, book_en=book_en, chapter=chapter, verse=verse, show_english=show_english, show_greek=show_greek, show_french=show_french, show_crossref=show_crossref, show_crossref_text=show_crossref_text, source_app=source_app, show_hebrew=show_hebrew, french_version=french_version, source_corpus=source_corpus, show_interlinear=show_interlinear, highlight=highlight)
+        if record:
+            self.emit(record, compact_mode=compact_mode)
+
+    def verse_record(self, node=None, book_en=None, chapter=None, verse=None, show_english=False, show_greek=True, show_french=True, show_crossref=False, show_crossref_text=False, source_app=None, show_hebrew=False, french_version='tob', source_corpus=None, show_interlinear=False, highlight=False):
+        """
+        Structured content of a verse, independent of the output format:
+        {"id", "ref", "book", "chapter", "verse", "header",
+         "hebrew" / "greek" / "english" / "french" (requested texts, None if missing),
+         "translations" ({version: text} when several French versions are requested),
+         "interlinear" ({"corpus", "words": [{surface, lemma, morph, gloss}]}),
+         "notes", "relations" ({type: [{"target", "label", "note"[, "texts"]}]}) with cross-references,
+         "highlight" (True for the target verse of a --context display)}.
+        A driving node is numbered as in its corpus, or as in `source_corpus` when
+        given: an LXX node with source_corpus 'tob' is read as TOB Ps 23:1, not LXX Ps 22:1.
+        Returns None without a driving app.
+        """
         if not source_app:
             source_app = self.app
             
         if not source_app:
-            return
+            return None
             
         api = source_app.api
         T = api.T
@@ -250,88 +421,44 @@ class VersePrinter:
             book_en = section[0]
             chapter = int(section[1])
             verse = int(section[2])
+            # Numbering of the driving corpus (OfflineLXXApp / OfflineBHSAApp name theirs)
+            driver_corpus = getattr(source_app, 'corpus', None)
+            if not isinstance(driver_corpus, str):
+                driver_corpus = 'n1904'
+            if source_corpus is None:
+                source_corpus = driver_corpus
+            elif source_corpus != driver_corpus:
+                # Renumbered: header, id, notes and the other texts follow source_corpus
+                book = self._book(book_en)
+                if book:
+                    book_en, chapter, verse = self._aligned(book, chapter, verse, driver_corpus, source_corpus)
         else:
             chapter = int(chapter)
             verse = int(verse)
 
-        # Try to resolve book_fr using normalizer logic if direct key fails
-        # 'book_en' might be 'Gen' (LXX) or 'Genesis' or 'MAT'
-        # 1. Try resolving to code first, then to French label
-        book_code = self.normalizer.n1904_to_code.get(book_en)
-        if not book_code:
-             # Try abbreviations or reverse lookup (if book_en is 'Numeri' from BHSA)
-             # If book_en is 'Numeri', n1904_to_code won't find it directly maybe?
-             # But let's rely on standard flow.
-             canon = self.normalizer.abbreviations.get(book_en)
-             if canon:
-                 book_code = self.normalizer.n1904_to_code.get(canon)
-        
-        book_fr = None
-        if book_code:
-            en_key = self.normalizer.code_to_n1904.get(book_code)
-            if en_key:
-                book_fr = self.normalizer.n1904_to_tob.get(en_key)
-        
-        # Fallback to direct lookup if code path failed
-        if not book_fr:
-            book_fr = self.normalizer.n1904_to_tob.get(book_en)
-        if not book_fr:
-            book_fr = self.normalizer.n1904_to_tob.get(book_en.replace(" ", "_"))
-            
-        if not book_fr:
-            book_fr = book_en
+        # Resolve the book once: 'book_en' might be 'Gen' (LXX), 'Genesis', 'Numeri' (BHSA) or 'MAT'.
+        # The record is passed on to the text getters below.
+        book = self._book(book_en)
+        book_code = book.code if book else None
         
         # Determine Header Language
-        header_book_name = book_fr
+        header_book_name = book.fr_label if book else book_en
         
         if show_english:
              # Prefer English name if English translation is requested
-             if book_code:
-                 raw_en = self.normalizer.code_to_n1904.get(book_code)
-                 if raw_en:
-                      header_book_name = raw_en.replace("_", " ")
-                 else:
-                      header_book_name = book_en
-             else:
-                 header_book_name = book_en
+             header_book_name = book.en_name if book else book_en
 
-        # Header logic
-        # If compact_mode > 0, we suppress the per-verse header
-        if compact_mode == 0:
-            print(f"\n{header_book_name} {chapter}:{verse}")
-            
-        # Prefix logic
-        prefix = ""
-        if compact_mode == 1:
-            prefix = f"v{verse}. "
-        elif compact_mode == 2:
-            prefix = "" # No prefix for very compact
-            
-        # For compact mode, we might want to collect all text and print in one go?
-        # But print_verse is called per verse. 
-        # Standard compact behavior: print(f"{prefix}{text}")
-        
-        # NOTE: Multiple requests (show_greek and show_french) in compact mode?
-        # User said: "vers s'affichent chacun sur une ligne".
-        # If showing multiple languages, putting them on ONE line might be messy.
-        # But usually compact is used for single translation reading.
-        # Let's print each requested text on its own line (or same line?).
-        # If multiple languages, `print_verse` prints multiple lines naturally.
-        # With compact mode, we retain the line breaks between LANGUAGES, but avoid the main Header.
-        # And we prefix the FIRST language line? Or all? 
-        # Usually prefix the first line is best.
-        
-        has_printed_prefix = False
-        def get_prefix():
-            nonlocal has_printed_prefix
-            if not has_printed_prefix:
-                has_printed_prefix = True
-                return prefix
-            # For subsequent lines of the SAME verse (e.g. diff languages), indent or repeat?
-            # Repeating is ugly. Indenting is better. Or empty.
-            if compact_mode > 0:
-                 return " " * len(prefix) # Indent alignment?
-            return ""
+        vid = self.normalizer.verse_id(book_code, chapter, verse) if book_code else None
+        record = {
+            "id": vid,
+            "ref": self.normalizer.verse_key(vid) if vid else None,
+            "book": book_code,
+            "chapter": chapter,
+            "verse": verse,
+            "header": f"{header_book_name} {chapter}:{verse}",
+        }
+        if highlight:
+            record["highlight"] = True
 
         # Hebrew Text
         if show_hebrew:
@@ -352,163 +479,226 @@ class VersePrinter:
                              hebrew_text = " ".join([F.g_word_utf8.v(w) for w in words])
                  else:
                      # Fetch via alignment (Book/Chapter/Verse)
-                     hebrew_text = self.get_hebrew_text(book_en, chapter, verse)
-            
-            if hebrew_text:
-                print(f"{get_prefix()}{hebrew_text}")
+                     hebrew_text = self.get_hebrew_text(book or book_en, chapter, verse, source_corpus)
+            record["hebrew"] = hebrew_text or None
 
         # Greek text
-        if show_greek and node:
+        if show_greek:
             # Check if source app has Greek text feature
             # N1904 and LXX use T.text logic or standard TF text
-            greek_text = T.text(node)
-            if greek_text and greek_text.strip():
-                print(f"{get_prefix()}{greek_text}")
+            greek_text = T.text(node) if node else None
+            record["greek"] = greek_text if greek_text and greek_text.strip() else None
         
         # English translation (Only for N1904 source currently)
-        if show_english and node and source_app == self.app:
-            words = L.d(node, otype='word')
-            english_text = []
-            for w in words:
-                trans = F.trans.v(w) if hasattr(F, 'trans') else ""
-                if not trans and hasattr(F, 'gloss'):
-                    trans = F.gloss.v(w)
-                english_text.append(trans)
-            print(f"{get_prefix()}{' '.join(english_text)}")
+        if show_english:
+            english_text = None
+            if node and source_app == self.app:
+                # One slice of the cached trans / gloss arrays for the verse's words
+                first, last = self.interlinear.slot_range(api, node)
+                glosses = self.interlinear.column(api, ['trans', 'gloss'], first, last)
+                english_text = ' '.join(g or "" for g in glosses)
+            record["english"] = english_text
         
-        # French translation (TOB or BJ)
+        # French translations (TOB, BJ or both): one lookup per version with the book resolved above
         if show_french:
-            french_text = ""
-            if french_version == 'bj':
-                french_text = self.get_bj_text(book_en, chapter, verse)
+            versions = french_versions(french_version)
+            texts = self.french_texts(book or book_en, chapter, verse, versions, source_corpus)
+            record["french"] = texts[versions[0]]
+            record["french_version"] = versions[0]
+            if len(versions) > 1:
+                record["translations"] = texts
+
+        # Interlinear: N1904 words for the NT, BHSA words for the OT
+        if show_interlinear:
+            words = None
+            corpus = 'n1904' if self.normalizer.is_nt(book_code) else 'bhsa'
+            if corpus == 'n1904':
+                if node and source_app == self.app:
+                    words = self.interlinear.words(api, node, 'n1904')
             else:
-                # Default to TOB
-                french_text = self.get_french_text(book_en, chapter, verse)
-
-            if french_text:
-                 # Check for None/Empty or Error strings
-                 if not french_text.startswith(f"[{french_version.upper()}:") or french_text.startswith(f"[{french_version.upper()}: Book"):
-                     # We print errors if they are about missing books?
-                     # Existing logic: `if french_text and not french_text.startswith("[TOB:")`
-                     # But sometimes we might want to see it?
-                     # Let's hide errors if typical mismatch.
-                     if not french_text.startswith("["):
-                         print(f"{get_prefix()}{french_text}")
-                     elif node: # If driving node exists, output even if error?
-                         # Only if it is NOT a "not found" error which is common for cross-versions
-                         pass
+                bhsa_app, bhsa_node = None, None
+                if self.bhsa_provider:
+                    bhsa_app = self.bhsa_provider()
+                if bhsa_app and source_app.api == bhsa_app.api:
+                    bhsa_node = node
+                elif book:
+                    bhsa_app, bhsa_node = self._bhsa_node(book, chapter, verse, source_corpus)
+                if bhsa_node:
+                    words = self.interlinear.words(bhsa_app.api, bhsa_node, 'bhsa')
+            record["interlinear"] = {"corpus": corpus, "words": words} if words else None
  
-        # Cross-references (Header logic might differ? No, cross-refs usually separate block)
+        # Cross-references
         if show_crossref:
-            # We need the 3-letter code for the current book to look up refs
-            # normalizer has n1904_to_code
-            
-            # Key lookup: e.g. "JHN.1.1"
-            # book_en might be "John" or "1_John" etc.
-            
-            # Try to get book code
-            book_code = self.normalizer.n1904_to_code.get(book_en)
-            if not book_code:
-                 book_code = self.normalizer.n1904_to_code.get(book_en.replace(" ", "_"))
-            
-            if book_code:
-                ref_key = f"{book_code}.{chapter}.{verse}"
-                
-                # Filter refs for this specific verse
-                # If cross_refs is passed (pre-filtered dict), utilize it
-                # The 'cross_refs' arg in the original function seemed to be the whole DB dictionary
-                # Here we can use self.ref_db.in_memory_refs
+            # Key lookup with the verse id of the book resolved above
+            # (main.py loads the reference collections before rendering)
+            data = self.ref_db.in_memory_refs.get(vid) if vid else None
+            if data is not None:
+                record["notes"] = list(data.get("notes", []))
+
+                # Relations grouped by type, in order of first appearance
+                by_type = {}
+                for r in data.get("relations", []):
+                    relation = {"target": r["target"], "label": self.format_ref_fr(r["target"]), "note": r.get("note", "")}
+                    if show_crossref_text:
+                        relation["texts"] = self._relation_texts(r["target"], french_version)
+                    by_type.setdefault(r.get("type", "other").lower(), []).append(relation)
+                record["relations"] = by_type
+
+        return record
+
+    def _relation_texts(self, target, french_version):
+        """French texts of the verses of a relation target ('ACT.1.25-ACT.1.26' or 'ACT.1.25')."""
+        refs_to_fetch = []
+        # Parse target for text fetching
+        # Logic compatible with 'ACT.1.25-ACT.1.26' or 'ACT.1.25'
+        if "-" in target:
+            parts = target.split("-")
+            if len(parts) == 2:
+                start_p = parts[0].split(".")
+                end_p = parts[1].split(".")
                 
-                # If the caller didn't ensure data is loaded, we might miss it.
-                # Ideally main.py calls ref_db.load_all() before using this.
+                # Case 1: Full ref to full ref "BOOK.C.V-BOOK.C.V"
+                if len(start_p) == 3 and len(end_p) == 3:
+                    b_code = start_p[0]
+                    ch = int(start_p[1])
+                    s_v = int(start_p[2])
+                    # End verse check basic
+                    if b_code == end_p[0] and ch == int(end_p[1]):
+                        e_v = int(end_p[2])
+                        for v in range(s_v, e_v + 1):
+                            refs_to_fetch.append((b_code, ch, v))
                 
-                if ref_key in self.ref_db.in_memory_refs:
-                    data = self.ref_db.in_memory_refs[ref_key]
-                    
-                    if compact_mode == 0:
-                        print("\n––––––––––")
-                    
-                    # 1. Notes
-                    if data.get("notes"):
-                        if compact_mode == 0: print("    Notes:")
-                        for n in data["notes"]:
-                            if compact_mode > 0:
-                                print(f"    [Note]: {n}")
-                            else:
-                                print(f"        {n}")
-                        if compact_mode == 0: print("")
+                # Case 2: Full ref to verse only? (unlikely in standardized db but possible in display logic)
+                # The DB standardizes to full refs usually, but let's be safe.
+        else:
+            parts = target.split(".")
+            if len(parts) == 3:
+                refs_to_fetch.append((parts[0], int(parts[1]), int(parts[2])))
+        
+        texts = []
+        for b_code, ch, vs in refs_to_fetch:
+            # get_french_text takes the Book record of the code
+            b_en = self.normalizer.books.get(b_code)
+            if b_en:
+                txt = ""
+                if french_versions(french_version)[0] == 'bj':
+                    txt = self.get_bj_text(b_en, ch, vs)
+                else:
+                    txt = self.get_french_text(b_en, ch, vs)
                     
-                    # 2. Relations grouped by type
-                    relations = data.get("relations", [])
-                    by_type = {}
-                    for r in relations:
-                         t = r.get("type", "other").capitalize()
-                         if t not in by_type: by_type[t] = []
-                         by_type[t].append(r)
+                if txt and not txt.startswith("["):
+                    texts.append(txt)
+        return texts
+
+    def emit(self, record, compact_mode=0):
+        """Write a verse record in the output format."""
+        if self.output_format == 'text':
+            self._format_text(record, compact_mode)
+        else:
+            self._format_json(record)
+
+    def _format_json(self, record):
+        # Streamed: one record per line (jsonl) or per element of a JSON array closed by finish()
+        data = json.dumps(record, ensure_ascii=False)
+        if self.output_format == 'jsonl':
+            self.out.line(data)
+        else:
+            self.out.write(("[\n" if not self._records else ",\n") + data)
+        self._records += 1
+
+    def finish(self):
+        """End of the output: closes the JSON array."""
+        if self.output_format == 'json':
+            self.out.line("\n]" if self._records else "[]")
+        self._records = 0
+
+    def _format_text(self, record, compact_mode=0):
+        verse = record["verse"]
+
+        # Target verse of a --context display: marked on its header, or its first line
+        marker = HIGHLIGHT_MARKER if record.get("highlight") else ""
+
+        # Header logic
+        # If compact_mode > 0, we suppress the per-verse header
+        if compact_mode == 0:
+            self.out.line(f"\n{marker}{record['header']}")
+            marker = ""
+            
+        # Prefix logic
+        prefix = ""
+        if compact_mode == 1:
+            prefix = f"{marker}v{verse}. "
+        elif compact_mode == 2:
+            prefix = marker # No prefix for very compact
+            
+        # NOTE: Multiple requests (show_greek and show_french) in compact mode?
+        # User said: "vers s'affichent chacun sur une ligne".
+        # If showing multiple languages, putting them on ONE line might be messy.
+        # But usually compact is used for single translation reading.
+        # If multiple languages, each text is printed on its own line.
+        # With compact mode, we retain the line breaks between LANGUAGES, but avoid the main Header.
+        # And we prefix the FIRST language line.
+        
+        has_printed_prefix = False
+        def get_prefix():
+            nonlocal has_printed_prefix
+            if not has_printed_prefix:
+                has_printed_prefix = True
+                return prefix
+            # For subsequent lines of the SAME verse (e.g. diff languages), indent or repeat?
+            # Repeating is ugly. Indenting is better. Or empty.
+            if compact_mode > 0:
+                 return " " * len(prefix) # Indent alignment?
+            return ""
+
+        for lang in ("hebrew", "greek"):
+            if record.get(lang):
+                self.out.line(f"{get_prefix()}{record[lang]}")
+        # The English glosses are printed even when empty
+        if record.get("english") is not None:
+            self.out.line(f"{get_prefix()}{record['english']}")
+        if "translations" in record:
+            # Several French versions: one line each, tagged with the version
+            for version, text in record["translations"].items():
+                if text:
+                    self.out.line(f"{get_prefix()}[{version.upper()}] {text}")
+        elif record.get("french"):
+            self.out.line(f"{get_prefix()}{record['french']}")
+        if record.get("interlinear"):
+            for line in format_interlinear(record["interlinear"]["words"], indent=" " * len(prefix)):
+                self.out.line(line)
+
+        # Cross-references (separate block)
+        if "notes" not in record:
+            return
+
+        if compact_mode == 0:
+            self.out.line("\n––––––––––")
+        
+        # 1. Notes
+        if record["notes"]:
+            if compact_mode == 0: self.out.line("    Notes:")
+            for n in record["notes"]:
+                if compact_mode > 0:
+                    self.out.line(f"    [Note]: {n}")
+                else:
+                    self.out.line(f"        {n}")
+            if compact_mode == 0: self.out.line("")
+        
+        # 2. Relations grouped by type
+        for relation_type, rels in record["relations"].items():
+            t = relation_type.capitalize()
+            if compact_mode == 0: self.out.line(f"    {t}: ")
+            for r in rels:
+                if compact_mode == 0:
+                    line = f"        {r['label']}"
+                else:
+                    line = f"    [{t}]: {r['label']}"
                     
-                    for t, rels in by_type.items():
-                        if compact_mode == 0: print(f"    {t}: ")
-                        for r in rels:
-                            target = r["target"]
-                            fmt_target = self.format_ref_fr(target)
-                            note = r.get("note", "")
-                            # If detailed crossref requested (text), we would fetch it here
-                            # But current specs say "crossref-full" was partial in original
-                            # Let's simple print
-                            if compact_mode == 0:
-                                line = f"        {fmt_target}"
-                            else:
-                                line = f"    [{t}]: {fmt_target}"
-                                
-                            if show_crossref_text: 
-                                if note: line += f" ({note})"
-                            else:
-                                if note: line += "" # Original didn't show note in simple list often?
-                                # Let's stick to original behavior:
-                                # Original code:
-                                # print(f"        {fmt_target}")
-                            print(line)
-                            
-                            if show_crossref_text:
-                                refs_to_fetch = []
-                                # Parse target for text fetching
-                                # Logic compatible with 'ACT.1.25-ACT.1.26' or 'ACT.1.25'
-                                if "-" in target:
-                                    parts = target.split("-")
-                                    if len(parts) == 2:
-                                        start_p = parts[0].split(".")
-                                        end_p = parts[1].split(".")
-                                        
-                                        # Case 1: Full ref to full ref "BOOK.C.V-BOOK.C.V"
-                                        if len(start_p) == 3 and len(end_p) == 3:
-                                            b_code = start_p[0]
-                                            ch = int(start_p[1])
-                                            s_v = int(start_p[2])
-                                            # End verse check basic
-                                            if b_code == end_p[0] and ch == int(end_p[1]):
-                                                e_v = int(end_p[2])
-                                                for v in range(s_v, e_v + 1):
-                                                    refs_to_fetch.append((b_code, ch, v))
-                                        
-                                        # Case 2: Full ref to verse only? (unlikely in standardized db but possible in display logic)
-                                        # The DB standardizes to full refs usually, but let's be safe.
-                                else:
-                                    parts = target.split(".")
-                                    if len(parts) == 3:
-                                        refs_to_fetch.append((parts[0], int(parts[1]), int(parts[2])))
-                                
-                                for b_code, ch, vs in refs_to_fetch:
-                                    # Convert 3-letter code back to N1904 English name for get_french_text lookup?
-                                    # get_french_text takes (book_en, ...). 
-                                    # We need code_to_n1904 mapping.
-                                    # normalizer has code_to_n1904.
-                                    b_en = self.normalizer.code_to_n1904.get(b_code)
-                                    if b_en:
-                                        txt = ""
-                                        if french_version == 'bj':
-                                            txt = self.get_bj_text(b_en, ch, vs)
-                                        else:
-                                            txt = self.get_french_text(b_en, ch, vs)
-                                            
-                                        if txt and not txt.startswith("["):
-                                            print(f"            {txt}")
+                # Notes of the relations are only shown with their texts (-f)
+                if "texts" in r and r["note"]:
+                    line += f" ({r['note']})"
+                self.out.line(line)
+                
+                for txt in r.get("texts", ()):
+                    self.out.line(f"            {txt}")
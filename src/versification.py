@@ -0,0 +1,98 @@
+import json
+import os
+
+VERSIFICATION_VERSION = 1
+
+
+class Versification:
+    """
+    Verse id -> verse id maps between the numbering schemes of the corpora.
+    LXX and N1904 follow the Greek numbering, BHSA, TOB and BJ the Hebrew one:
+    LXX Ps 22 is TOB Ps 23, LXX Ml 3:22 is BHSA Ml 3:23.
+
+    data/versification.json lists the differences as pairs of passages
+    ("PSA 9:22-39" -> "PSA 10:1-18", "PSA 10-112" -> "PSA 11-113"); the
+    reverse direction is derived. At load each pair of schemes gets two tables:
+    - verses:   source verse id -> target verse id, for the verse ranges
+    - chapters: source chapter id -> id offset, for the whole chapter ranges
+    so that map() is one or two dict lookups. Verses without a rule keep
+    their number.
+
+    The shipped rules cover the Psalms and Malachi 3 only; other LXX
+    divergences (Gn 32, Jeremiah 25-51...) are not mapped.
+    """
+    def __init__(self, path, normalizer):
+        self.path = path
+        self.normalizer = normalizer
+        self.schemes = {}
+        self.tables = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != VERSIFICATION_VERSION:
+            return
+        self.schemes = data.get("schemes", {})
+        for pair, rules in data.get("maps", {}).items():
+            source, _, target = pair.partition(">")
+            forward = ({}, {})
+            backward = ({}, {})
+            for source_ref, target_ref in rules:
+                self._add_rule(source_ref, target_ref, forward, backward)
+            self.tables[(source, target)] = forward
+            self.tables[(target, source)] = backward
+
+    def _span(self, ref):
+        spans = self.normalizer.parse_passage(ref)
+        if not spans or len(spans) != 1:
+            raise ValueError(f"Invalid versification passage: {ref}")
+        code, c1, v1 = self.normalizer.split_verse_id(spans[0].start)
+        _, c2, v2 = self.normalizer.split_verse_id(spans[0].end)
+        return code, c1, v1, c2, v2
+
+    def _add_rule(self, source_ref, target_ref, forward, backward):
+        END = self.normalizer.VERSE_END
+        verse_id = self.normalizer.verse_id
+        s_code, s_c1, s_v1, s_c2, s_v2 = self._span(source_ref)
+        t_code, t_c1, t_v1, t_c2, t_v2 = self._span(target_ref)
+
+        if s_v1 == 1 and s_v2 == END and t_v1 == 1 and t_v2 == END:
+            # Whole chapters: one id offset per chapter, whatever its length
+            if s_c2 - s_c1 != t_c2 - t_c1:
+                raise ValueError(f"Chapter counts differ: {source_ref} -> {target_ref}")
+            for i in range(s_c2 - s_c1 + 1):
+                source = verse_id(s_code, s_c1 + i, 0)
+                target = verse_id(t_code, t_c1 + i, 0)
+                forward[1][source] = target - source
+                backward[1][target] = source - target
+            return
+
+        # Verses of one chapter
+        if s_c1 != s_c2 or t_c1 != t_c2 or END in (s_v2, t_v2) or s_v2 - s_v1 != t_v2 - t_v1:
+            raise ValueError(f"Verse ranges differ: {source_ref} -> {target_ref}")
+        for i in range(s_v2 - s_v1 + 1):
+            source = verse_id(s_code, s_c1, s_v1 + i)
+            target = verse_id(t_code, t_c1, t_v1 + i)
+            forward[0][source] = target
+            backward[0][target] = source
+
+    def map(self, vid, source, target):
+        """Verse id in the numbering of corpus `target` of verse `vid` of corpus `source`."""
+        table = self.tables.get((self.schemes.get(source), self.schemes.get(target)))
+        if not table:
+            return vid
+        verses, chapters = table
+        mapped = verses.get(vid)
+        if mapped is not None:
+            return mapped
+        return vid + chapters.get(self.normalizer.chapter_id(vid), 0)
+
+    def map_reference(self, book_code, chapter, verse, source, target):
+        """map() on (book_code, chapter, verse) triples."""
+        if not source or source == target:
+            return book_code, chapter, verse
+        vid = self.normalizer.verse_id(book_code, chapter, verse)
+        return self.normalizer.split_verse_id(self.map(vid, source, target))
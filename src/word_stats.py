@@ -0,0 +1,142 @@
+import numpy as np
+
+# Word features to try, per kind of statistic, across N1904 / LXX / BHSA
+FEATURE_CANDIDATES = {
+    'lemma': ['lemma', 'lex_utf8', 'lex'],
+    'surface': ['normalized', 'g_word_utf8', 'word', 'text'],
+}
+
+
+def ensure_feature(api, candidates):
+    """
+    Name of the first candidate feature available on the corpus,
+    loading it on demand (e.g. LXX is loaded with its default features only).
+    """
+    for name in candidates:
+        if hasattr(api.F, name):
+            return name
+    for name in candidates:
+        try:
+            api.TF.load(name, add=True, silent=True)
+        except Exception:
+            continue
+        if hasattr(api.F, name):
+            return name
+    return None
+
+
+def encode_slot_feature(api, feature):
+    """
+    Integer-code a word feature over every slot.
+    Returns (codes, vocabulary): codes[slot - 1] indexes vocabulary, -1 if the
+    word has no value.
+    """
+    max_slot = api.F.otype.maxSlot
+    data = getattr(api.F, feature).data
+    vocabulary = {}
+
+    def code_of(slot):
+        value = data.get(slot)
+        if value is None:
+            return -1
+        return vocabulary.setdefault(value, len(vocabulary))
+
+    codes = np.fromiter((code_of(s) for s in range(1, max_slot + 1)), dtype=np.int64, count=max_slot)
+    return codes, list(vocabulary)
+
+
+def section_of_slots(api, otype):
+    """
+    Section number of every slot for the sections of the given type (book or
+    chapter), -1 outside any section. Returns (per-slot array, section nodes).
+    """
+    max_slot = api.F.otype.maxSlot
+    sections = list(api.F.otype.s(otype))
+    seg = np.full(max_slot, -1, dtype=np.int64)
+    for i, node in enumerate(sections):
+        slots = api.E.oslots.s(node)
+        if len(slots):
+            # Sections cover contiguous slot ranges
+            seg[slots[0] - 1:slots[-1]] = i
+    return seg, sections
+
+
+def frequency_tables(codes, seg, n_sections, vocab_size, top=10):
+    """
+    Per-section token counts, type counts and top-n (code, count) lists,
+    computed with bincount over the (section, code) pairs.
+    """
+    mask = (seg >= 0) & (codes >= 0)
+    seg = seg[mask]
+    codes = codes[mask]
+
+    tokens = np.bincount(seg, minlength=n_sections)
+    size = max(vocab_size, 1)
+    pairs, counts = np.unique(seg * size + codes, return_counts=True)
+    pair_sections = pairs // size
+    pair_codes = pairs % size
+    types = np.bincount(pair_sections, minlength=n_sections)
+
+    # pairs are sorted by section: slice each section's block
+    bounds = np.searchsorted(pair_sections, np.arange(n_sections + 1))
+    tops = []
+    for i in range(n_sections):
+        block_counts = counts[bounds[i]:bounds[i + 1]]
+        block_codes = pair_codes[bounds[i]:bounds[i + 1]]
+        order = np.lexsort((block_codes, -block_counts))[:top]
+        tops.append(list(zip(block_codes[order].tolist(), block_counts[order].tolist())))
+    return tokens, types, tops
+
+
+class WordStats:
+    def __init__(self, api, normalizer):
+        self.api = api
+        self.normalizer = normalizer
+
+    def compute(self, by='chapter', kind='lemma', top=10, book_code=None):
+        """
+        Rows of (section_node, tokens, types, [(word, count), ...]) for every
+        book or chapter of the corpus, optionally restricted to one book.
+        """
+        feature = ensure_feature(self.api, FEATURE_CANDIDATES[kind])
+        if not feature:
+            return None
+
+        codes, vocabulary = encode_slot_feature(self.api, feature)
+        seg, sections = section_of_slots(self.api, by)
+        tokens, types, tops = frequency_tables(codes, seg, len(sections), len(vocabulary), top)
+
+        rows = []
+        for i, node in enumerate(sections):
+            if book_code and self._book_code(node) != book_code:
+                continue
+            words = [(vocabulary[c], n) for c, n in tops[i]]
+            rows.append((node, int(tokens[i]), int(types[i]), words))
+        return rows
+
+    def _book_code(self, node):
+        return self.normalizer.code_from_label(self.api.T.sectionFromNode(node)[0])
+
+    def section_label(self, node):
+        section = self.api.T.sectionFromNode(node)
+        book = self.normalizer.book(section[0])
+        name = (book.fr_abbr if book else None) or section[0]
+        return " ".join([name] + [str(s) for s in section[1:]])
+
+    def print_stats(self, by='chapter', kind='lemma', top=10, book_code=None):
+        rows = self.compute(by=by, kind=kind, top=top, book_code=book_code)
+        if rows is None:
+            print(f"Error: No {kind} feature available in this corpus.")
+            return
+        if not rows:
+            print("No matching sections.")
+            return
+
+        total_tokens = 0
+        for node, n_tokens, n_types, words in rows:
+            total_tokens += n_tokens
+            ttr = n_types / n_tokens if n_tokens else 0.0
+            freq = ", ".join(f"{w} {n}" for w, n in words)
+            print(f"{self.section_label(node):<12} tokens {n_tokens:>6}  types {n_types:>5}  TTR {ttr:.3f}  {freq}")
+
+        print(f"\n{len(rows)} section(s), {total_tokens} tokens.")
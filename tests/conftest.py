@@ -42,3 +42,30 @@ def mock_printer():
     printer.print_verse = MagicMock()
     printer.get_french_text.return_value = "Mock French Text"
     return printer
+
+@pytest.fixture
+def corpus_api():
+    """
+    Factory of mock Text-Fabric apis laid out like the French versions:
+    corpus_api({book label: {chapter: {verse: text}}}).
+    Nodes are tuples (book[, chapter[, verse]]); a verse text is the 'text'
+    feature of its verse node (TOB), and its words are the word nodes (BJ).
+    """
+    def make(books):
+        api = MagicMock()
+        api.F.otype.s.return_value = list(books)
+        api.F.book.v.side_effect = lambda node: node
+
+        def children(node, otype):
+            if otype == 'chapter':
+                return [(node, c) for c in books[node]]
+            if otype == 'verse':
+                return [node + (v,) for v in books[node[0]][node[1]]]
+            return books[node[0]][node[1]][node[2]].split()
+
+        api.L.d.side_effect = children
+        api.F.chapter.v.side_effect = lambda node: node[1]
+        api.F.verse.v.side_effect = lambda node: node[2]
+        api.F.text.v.side_effect = lambda node: books[node[0]][node[1]][node[2]] if isinstance(node, tuple) else node
+        return api
+    return make
@@ -1,6 +1,9 @@
 import pytest
 import sys
 import os
+import json
+import shutil
+from unittest.mock import patch
 
 # Ensure src is in path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
@@ -59,3 +62,134 @@ def test_lxx_abbreviations_lookup(normalizer):
         res = normalizer.normalize_reference(f"{abbr} 1:1")
         assert res is not None, f"Failed to normalize {abbr}"
         assert res[0] == expected_code, f"Expected {expected_code} for {abbr}, got {res[0]}"
+
+def test_parser_handles_compact_forms(normalizer):
+    cases = {
+        "1Co13:4": ("1CO", 13, 4),
+        "1 Co 13:4": ("1CO", 13, 4),
+        "Mc1,1": ("MRK", 1, 1),
+        "Gen.1.1": ("GEN", 1, 1),
+        "MRK.1.1": ("MRK", 1, 1),
+        "genese 1:1": ("GEN", 1, 1),
+        "Exod 3:14": ("EXO", 3, 14),
+        "Mc 4": ("MRK", 4, 0),
+        "Mc": ("MRK", 0, 0),
+    }
+    for ref_str, expected in cases.items():
+        ref = normalizer.parse_reference(ref_str)
+        assert ref is not None, f"Failed to parse {ref_str}"
+        assert (ref.book_code, ref.chapter, ref.verse) == expected, ref_str
+
+    assert normalizer.parse_reference("Mc 1:1 extra") is None
+    assert normalizer.parse_reference("Mcx 1:1") is None
+    # Whole books are parsed but are not valid normalized references
+    assert normalizer.normalize_reference("Mc") is None
+
+def test_parser_is_memoized_and_passes_parsed_through(normalizer):
+    first = normalizer.parse_reference("Jn 3:16")
+    assert normalizer.parse_reference("Jn 3:16") is first
+    assert normalizer.parse_reference(first) is first
+    assert first.with_verse(17).std == "JHN.3.17"
+
+def test_parse_passage_compiles_to_verse_id_spans(normalizer):
+    END = normalizer.VERSE_END
+
+    def spans(passage):
+        return [(normalizer.split_verse_id(s.start), normalizer.split_verse_id(s.end))
+                for s in normalizer.parse_passage(passage)]
+
+    assert spans("Mc 1:1-8; Lc 3:1-6") == [(("MRK", 1, 1), ("MRK", 1, 8)), (("LUK", 3, 1), ("LUK", 3, 6))]
+    assert spans("Mc 1:40-2:12") == [(("MRK", 1, 40), ("MRK", 2, 12))]
+    assert spans("Mc 1:1-8; 3:1-6") == [(("MRK", 1, 1), ("MRK", 1, 8)), (("MRK", 3, 1), ("MRK", 3, 6))]
+    assert spans("Mc 1-3") == [(("MRK", 1, 1), ("MRK", 3, END))]
+    assert spans("Mc 4") == [(("MRK", 4, 1), ("MRK", 4, END))]
+    assert spans("Mc") == [(("MRK", 1, 1), ("MRK", END, END))]
+    assert spans("Jn 3:16") == [(("JHN", 3, 16), ("JHN", 3, 16))]
+
+    # Reversed ranges, leading items without a book and garbage are rejected
+    assert normalizer.parse_passage("Mc 2:1-1:3") is None
+    assert normalizer.parse_passage("3:1-6; Mc 1") is None
+    assert normalizer.parse_passage("Mc 1:1-x") is None
+
+    # Chapters and verses stay below VERSE_END: packed ids must not overflow
+    assert normalizer.parse_passage("Mc 1:1-1005") is None
+    assert normalizer.parse_passage("Ps 1000") is None
+    assert normalizer.parse_passage("Ps 1:1-1000:1") is None
+    assert normalizer.parse_passage(f"Mc 1:{END}") is None
+    assert normalizer.parse_reference("Ps 1000") is None
+    assert normalizer.parse_reference("Mc 1:1005") is None
+    assert spans("Ps 119:176") == [(("PSA", 119, 176), ("PSA", 119, 176))]
+
+    # A parsed reference maps to the same span as its string form
+    assert normalizer.parse_passage(normalizer.parse_reference("Mc 4")) == normalizer.parse_passage("Mc 4")
+
+def test_book_registry_indexes_every_alias(normalizer):
+    genesis = normalizer.books["GEN"]
+    assert (genesis.en_label, genesis.fr_label, genesis.bj_label) == ("Genesis", "Genèse", "La Genèse")
+    for alias in ("GEN", "Gen", "Gn", "Genesis", "Genèse", "La Genèse"):
+        assert normalizer.book(alias) is genesis, alias
+
+    samuel = normalizer.book("I_Samuel")
+    assert samuel.code == "1SA"
+    assert normalizer.book("I Samuel") is samuel
+    assert normalizer.book(samuel.bhsa_label) is samuel
+    assert samuel.en_name == "I Samuel"
+    assert normalizer.book("Klingon") is None
+
+    with pytest.raises(AttributeError):
+        genesis.fr_label = "Genesis"
+    with pytest.raises(AttributeError):
+        genesis.extra = 1
+
+def test_snapshot_restores_tables_and_follows_json_changes(data_dir, tmp_path):
+    books_dir = tmp_path / "data"
+    books_dir.mkdir()
+    shutil.copy(os.path.join(data_dir, "bible_books.json"), books_dir / "bible_books.json")
+    cache_dir = str(tmp_path / "cache")
+
+    built = BookNormalizer(str(books_dir), cache_dir)
+    restored = BookNormalizer(str(books_dir), cache_dir)
+    assert restored.abbreviations == built.abbreviations
+    assert [b.fields() for b in restored.books.values()] == [b.fields() for b in built.books.values()]
+    assert restored.book("Genèse") is restored.books["GEN"]
+    assert restored.parse_reference("1Co13:4") == built.parse_reference("1Co13:4")
+
+    # Editing the JSON invalidates the snapshot
+    with open(books_dir / "bible_books.json") as f:
+        books = json.load(f)
+    books["books"]["MRK"]["fr"]["abbreviations"].append("Marcus")
+    with open(books_dir / "bible_books.json", "w") as f:
+        json.dump(books, f)
+    assert BookNormalizer(str(books_dir), cache_dir).parse_reference("Marcus 1:1").book_code == "MRK"
+
+def test_startup_from_fresh_snapshot_skips_the_build(data_dir, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    BookNormalizer(data_dir, cache_dir)
+
+    with patch.object(BookNormalizer, '_load_mappings') as load_mappings, \
+         patch.object(BookNormalizer, '_index_aliases') as index_aliases:
+        restored = BookNormalizer(data_dir, cache_dir)
+    load_mappings.assert_not_called()
+    index_aliases.assert_not_called()
+
+    # Same tables as a build from the JSON
+    built = BookNormalizer(data_dir)
+    for table in ('abbreviations', 'n1904_to_code', 'book_order', 'book_codes', 'alias_codes'):
+        assert getattr(restored, table) == getattr(built, table)
+    assert [b.fields() for b in restored.books.values()] == [b.fields() for b in built.books.values()]
+    assert restored.parser.trie == built.parser.trie
+
+def test_packed_verse_ids(normalizer):
+    vid = normalizer.verse_id("MRK", 1, 2)
+    assert normalizer.split_verse_id(vid) == ("MRK", 1, 2)
+    assert normalizer.verse_id_from_key("MRK.1.2") == vid
+    assert normalizer.verse_key(vid) == "MRK.1.2"
+    assert normalizer.verse_id_from_key("XXX.1.2") is None
+    assert normalizer.verse_id_from_key("MRK.1") is None
+    assert normalizer.verse_id_from_key("MRK.1.1005") is None
+
+    # Ids sort in canonical order and a book is one contiguous range
+    assert normalizer.verse_id("GEN", 50, 26) < normalizer.verse_id("EXO", 1, 1) < normalizer.verse_id("MRK", 1, 1)
+    lo, hi = normalizer.book_id_range("MRK")
+    assert lo <= vid < hi
+    assert not lo <= normalizer.verse_id("LUK", 1, 1) < hi
@@ -0,0 +1,62 @@
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Ensure src is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from canon_metadata import CanonMetadata, build_table
+from book_normalizer import BookNormalizer
+from reference_handler import ReferenceHandler
+
+@pytest.fixture
+def normalizer():
+    return BookNormalizer(os.path.join(os.path.dirname(__file__), '..', 'data'))
+
+# Marc (chapters 1 and 2, 3 and 2 verses) and Jean (chapter 1, 1 verse)
+STRUCTURE = {"Marc": {1: {1: "", 2: "", 3: ""}, 2: {1: "", 2: ""}}, "Jean": {1: {1: ""}}}
+
+def test_build_table_counts_verses_per_chapter(normalizer, corpus_api):
+    table = build_table(corpus_api(STRUCTURE), normalizer.code_from_label)
+    assert table == {"MRK": [3, 2], "JHN": [1]}
+
+def test_record_saves_once_and_reloads(normalizer, tmp_path, corpus_api):
+    # Kept in the cache directory, created on the first save
+    path = str(tmp_path / ".cache" / "canon_metadata.json")
+    metadata = CanonMetadata(path)
+    assert metadata.chapter_count('tob', "MRK") is None
+
+    metadata.record('tob', corpus_api(STRUCTURE), normalizer.code_from_label)
+    api = MagicMock()
+    metadata.record('tob', api, normalizer.code_from_label)
+    api.F.otype.s.assert_not_called()
+
+    reloaded = CanonMetadata(path)
+    assert reloaded.books('tob') == ["MRK", "JHN"]
+    assert reloaded.chapter_count('tob', "MRK") == 2
+    assert reloaded.chapter_count('tob', "GEN") == 0
+    assert reloaded.verse_count('tob', "MRK", 1) == 3
+    assert reloaded.verse_count('tob', "MRK", 3) == 0
+    assert reloaded.verse_counts('tob', "MRK") == {1: 3, 2: 2}
+    assert reloaded.max_verse_count("MRK", 2) == 2
+    assert reloaded.max_verse_count("GEN", 1) is None
+
+def test_handler_answers_structure_without_loading(normalizer, tmp_path, corpus_api):
+    metadata = CanonMetadata(str(tmp_path / "canon_metadata.json"))
+    metadata.record('tob', corpus_api(STRUCTURE), normalizer.code_from_label)
+    n1904_provider = MagicMock()
+    printer = MagicMock()
+    handler = ReferenceHandler(n1904_provider, MagicMock(), MagicMock(), normalizer, printer, metadata=metadata)
+
+    # Out of the canon: rejected before any corpus is loaded
+    handler.handle_reference("Mc 3:1")
+    handler.handle_reference("Mc 1:4")
+    n1904_provider.assert_not_called()
+
+    # Driver without the book: the French fallback prints known verses without probing
+    n1904_provider.return_value.api.T.nodeFromSection.return_value = None
+    handler.handle_reference("Mc")
+    printer.get_french_text.assert_not_called()
+    verses = [(c[1]['chapter'], c[1]['verse']) for c in printer.print_verse.call_args_list]
+    assert verses == [(1, 1), (1, 2), (1, 3), (2, 1), (2, 2)]
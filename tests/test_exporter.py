@@ -0,0 +1,80 @@
+import pytest
+import sys
+import os
+import zipfile
+from unittest.mock import MagicMock
+
+# Ensure src is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from exporter import Exporter, render_chapter
+from book_normalizer import BookNormalizer
+
+@pytest.fixture
+def normalizer():
+    return BookNormalizer(os.path.join(os.path.dirname(__file__), '..', 'data'))
+
+def _handler(normalizer, chapters=3, verses=2):
+    # Mark 1-3, two verses each; Mark 1:1 points to Mark 2:1 and to Matthew 3:1
+    def records(ref_str, **display):
+        for c in range(1, chapters + 1):
+            for v in range(1, verses + 1):
+                record = {"id": normalizer.verse_id("MRK", c, v), "ref": f"MRK.{c}.{v}", "book": "MRK",
+                          "chapter": c, "verse": v, "greek": f"λόγος {c}:{v}", "french": f"Parole <{c}:{v}>"}
+                if (c, v) == (1, 1):
+                    record["notes"] = ["Commencement"]
+                    record["relations"] = {"parallel": [
+                        {"target": "MRK.2.1", "label": "Mc 2:1", "note": ""},
+                        {"target": "MAT.3.1-MAT.3.6", "label": "Mt 3:1-6", "note": ""}]}
+                yield record
+    handler = MagicMock()
+    handler.iter_records.side_effect = records
+    return handler
+
+def test_html_streams_chapters_with_links(normalizer, tmp_path):
+    handler = _handler(normalizer)
+    path = tmp_path / "marc.html"
+    count = Exporter(handler, normalizer, workers=1).export("Mc", 'html', str(path), show_greek=True)
+
+    assert count == 3
+    text = path.read_text(encoding='utf-8')
+    assert "<title>Marc</title>" in text
+    assert text.index('<section id="MRK-1">') < text.index('<section id="MRK-3">')
+    assert '<p class="verse" id="MRK-1-1"><sup>1</sup> <span lang="grc">λόγος 1:1</span><br/>\n<span lang="fr">Parole &lt;1:1&gt;</span></p>' in text
+    assert '<ul class="notes"><li>Commencement</li></ul>' in text
+    # Targets inside the export are links, the others plain labels
+    assert '<em>Parallel:</em> <a href="#MRK-2-1">Mc 2:1</a>, Mt 3:1-6</p>' in text
+    assert text.endswith("</html>\n")
+    assert handler.iter_records.call_args[1]['show_crossref'] is True
+
+def test_chapters_render_in_worker_processes(normalizer, tmp_path):
+    sequential = tmp_path / "a.md"
+    parallel = tmp_path / "b.md"
+    Exporter(_handler(normalizer, chapters=12), normalizer, workers=1).export("Mc", 'md', str(sequential))
+    Exporter(_handler(normalizer, chapters=12), normalizer, workers=2).export("Mc", 'md', str(parallel))
+
+    text = parallel.read_text(encoding='utf-8')
+    assert text == sequential.read_text(encoding='utf-8')
+    assert text.startswith("# Marc\n\n## Marc 1\n\n")
+    assert '*Parallel:* [Mc 2:1](#MRK-2-1), Mt 3:1-6' in text
+    assert text.index("## Marc 11") < text.index("## Marc 12")
+
+def test_epub_package(normalizer, tmp_path):
+    path = tmp_path / "marc.epub"
+    assert Exporter(_handler(normalizer), normalizer, workers=1).export("Mc 1-2", 'epub', str(path)) == 3
+
+    with zipfile.ZipFile(path) as zf:
+        names = zf.namelist()
+        assert names[0] == "mimetype"
+        assert zf.getinfo("mimetype").compress_type == zipfile.ZIP_STORED
+        assert zf.read("mimetype") == b"application/epub+zip"
+        assert {"META-INF/container.xml", "OEBPS/content.opf", "OEBPS/nav.xhtml", "OEBPS/MRK-1.xhtml"} <= set(names)
+        opf = zf.read("OEBPS/content.opf").decode('utf-8')
+        assert opf.index('idref="c-MRK-1"') < opf.index('idref="c-MRK-2"')
+        # Links across chapter files
+        assert '<a href="MRK-2.xhtml#MRK-2-1">Mc 2:1</a>' in zf.read("OEBPS/MRK-1.xhtml").decode('utf-8')
+
+def test_several_french_versions_are_exported():
+    chapter = {"id": "MRK-1", "title": "Marc 1", "verses": [
+        {"ref": "MRK.1.1", "verse": 1, "french": "TOB", "translations": {"tob": "TOB", "bj": "BJ"}}]}
+    assert "**1** TOB  \nBJ" in render_chapter('md', chapter)
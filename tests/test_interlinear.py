@@ -0,0 +1,89 @@
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+# Ensure src is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from interlinear import Interlinear, format_interlinear
+from verse_printer import VersePrinter
+from book_normalizer import BookNormalizer
+
+class Feature:
+    """Text-Fabric node feature: a data dict and v()."""
+    def __init__(self, data):
+        self.data = data
+        self.calls = 0
+
+    def v(self, n):
+        self.calls += 1
+        return self.data.get(n)
+
+def _n1904_api():
+    # Jn 1:1a: verse node 10 over slots 1-3
+    F = SimpleNamespace(
+        otype=SimpleNamespace(maxSlot=3),
+        text=Feature({1: "Ἐν", 2: "ἀρχῇ", 3: "ἦν"}),
+        lemma=Feature({1: "ἐν", 2: "ἀρχή", 3: "εἰμί"}),
+        morph=Feature({1: "PREP", 2: "N-DSF", 3: "V-IAI-3S"}),
+        trans=Feature({1: "In", 2: "", 3: "was"}),
+        gloss=Feature({2: "beginning", 3: "be"}),
+    )
+    E = SimpleNamespace(oslots=SimpleNamespace(s=lambda n: (1, 2, 3)))
+    return SimpleNamespace(F=F, E=E)
+
+def test_words_are_sliced_from_cached_arrays():
+    api = _n1904_api()
+    interlinear = Interlinear()
+    words = interlinear.words(api, 10, 'n1904')
+    assert words == [
+        {"surface": "Ἐν", "lemma": "ἐν", "morph": "PREP", "gloss": "In"},
+        {"surface": "ἀρχῇ", "lemma": "ἀρχή", "morph": "N-DSF", "gloss": "beginning"},
+        {"surface": "ἦν", "lemma": "εἰμί", "morph": "V-IAI-3S", "gloss": "was"},
+    ]
+    # The data dicts are read once, no per-word lookups
+    interlinear.words(api, 10, 'n1904')
+    assert api.F.lemma.calls == 0 and api.F.trans.calls == 0
+    assert len(interlinear._arrays) == 5
+
+def test_bhsa_morphology_and_lexeme_glosses():
+    # Gn 1:1a: בְּ רֵאשִׁית, lexemes 100 and 101
+    F = SimpleNamespace(
+        otype=SimpleNamespace(maxSlot=2, s=lambda otype: [100, 101]),
+        g_word_utf8=Feature({1: "בְּ", 2: "רֵאשִׁית"}),
+        lex_utf8=Feature({1: "ב", 2: "ראשׁית"}),
+        sp=Feature({1: "prep", 2: "subs"}), vs=Feature({1: "NA", 2: "NA"}), vt=Feature({1: "NA", 2: "NA"}),
+        ps=Feature({1: "NA", 2: "unknown"}), gn=Feature({1: "NA", 2: "f"}), nu=Feature({1: "NA", 2: "sg"}),
+        gloss=Feature({100: "in", 101: "beginning"}),
+    )
+    api = SimpleNamespace(F=F, E=SimpleNamespace(oslots=SimpleNamespace(s=lambda n: (1, 2))),
+                          L=SimpleNamespace(d=lambda lex, otype: [lex - 99]))
+    words = Interlinear().words(api, 20, 'bhsa')
+    assert [w["morph"] for w in words] == ["prep", "subs.f.sg"]
+    assert [w["gloss"] for w in words] == ["in", "beginning"]
+
+def test_format_aligns_columns_and_wraps():
+    words = Interlinear().words(_n1904_api(), 10, 'n1904')
+    lines = format_interlinear(words, width=80)
+    assert lines == [
+        "Ἐν    ἀρχῇ       ἦν",
+        "ἐν    ἀρχή       εἰμί",
+        "PREP  N-DSF      V-IAI-3S",
+        "In    beginning  was",
+    ]
+    wrapped = format_interlinear(words, width=20)
+    assert len(wrapped) == 9 and wrapped[4] == ""
+    assert wrapped[5] == "ἦν"
+
+def test_printer_records_the_interlinear_of_the_driving_verse():
+    normalizer = BookNormalizer(os.path.join(os.path.dirname(__file__), '..', 'data'))
+    app = SimpleNamespace(api=_n1904_api())
+    app.api.T = SimpleNamespace(sectionFromNode=lambda n: ("John", 1, 1), text=lambda n: "Ἐν ἀρχῇ ἦν")
+    app.api.L = SimpleNamespace(d=lambda n, otype: (1, 2, 3))
+    printer = VersePrinter(None, MagicMock(return_value=app), normalizer, MagicMock())
+
+    record = printer.verse_record(node=10, show_french=False, show_english=True, show_interlinear=True)
+    assert record["english"] == "In beginning was"
+    assert record["interlinear"]["corpus"] == "n1904"
+    assert [w["lemma"] for w in record["interlinear"]["words"]] == ["ἐν", "ἀρχή", "εἰμί"]
@@ -0,0 +1,79 @@
+import pytest
+import sys
+import os
+import json
+from unittest.mock import patch
+
+# Ensure src is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from book_normalizer import BookNormalizer
+from references_db import ReferenceDatabase
+from notes_index import NotesIndex
+
+REAL_DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+def _write_collection(path, entries):
+    with open(path, "w") as f:
+        json.dump({"version": "1.0", "cross_references": entries}, f, ensure_ascii=False)
+
+@pytest.fixture
+def data_dir(tmp_path):
+    d = tmp_path / "data"
+    d.mkdir()
+    _write_collection(d / "references_nt_tob.json", [
+        {"source": "MRK.1.4", "notes": "Le baptême de conversion", "relations": [
+            {"target": "ACT.2.38", "type": "parallel", "note": ""}
+        ]},
+    ])
+    _write_collection(d / "references_nt_personal.json", [
+        {"source": "MRK.1.8", "relations": [
+            {"target": "ACT.1.5", "type": "allusion", "note": "Baptême dans l'Esprit"}
+        ]},
+    ])
+    return str(d)
+
+@pytest.fixture
+def notes_index(data_dir, tmp_path):
+    ref_db = ReferenceDatabase(data_dir, BookNormalizer(REAL_DATA_DIR))
+    return NotesIndex(ref_db, str(tmp_path / "cache"))
+
+def test_search_covers_notes_and_relation_notes(notes_index):
+    notes_index.refresh()
+    hits = notes_index.search("bapteme")
+    assert ("references_nt_tob.json", "MRK.1.4", None, None, "Le baptême de conversion") in hits
+    assert ("references_nt_personal.json", "MRK.1.8", "allusion", "ACT.1.5", "Baptême dans l'Esprit") in hits
+    assert len(notes_index.search("baptême esprit")) == 1
+
+def test_search_filters_collections(notes_index):
+    notes_index.refresh()
+    hits = notes_index.search("baptême", {"references_nt_tob.json"})
+    assert [h[1] for h in hits] == ["MRK.1.4"]
+
+def test_refresh_reindexes_only_changed_files(notes_index, data_dir):
+    notes_index.refresh()
+
+    # A fresh instance reads the cache and indexes nothing
+    fresh = NotesIndex(notes_index.ref_db, os.path.dirname(notes_index.cache_path))
+    with patch.object(NotesIndex, "index_file", wraps=NotesIndex.index_file) as spy:
+        fresh.refresh()
+        spy.assert_not_called()
+    assert len(fresh.search("baptême")) == 2
+
+    # Changing one collection re-indexes that file only
+    path = os.path.join(data_dir, "references_nt_personal.json")
+    _write_collection(path, [{"source": "MRK.1.9", "notes": "Baptême de Jésus au Jourdain"}])
+    with patch.object(NotesIndex, "index_file", wraps=NotesIndex.index_file) as spy:
+        fresh.refresh()
+        assert spy.call_count == 1
+        assert spy.call_args[0][0] == path
+    assert [h[1] for h in fresh.search("jourdain")] == ["MRK.1.9"]
+
+def test_reference_database_keys_on_verse_ids(notes_index):
+    ref_db = notes_index.ref_db
+    ref_db.load_all()
+    normalizer = ref_db.normalizer
+    mrk_1_4 = normalizer.verse_id("MRK", 1, 4)
+    assert ref_db.in_memory_refs[mrk_1_4]["notes"] == ["Le baptême de conversion"]
+    assert set(ref_db.get_references("MRK")) == {mrk_1_4, normalizer.verse_id("MRK", 1, 8)}
+    assert ref_db.get_references("LUK") == {}
@@ -0,0 +1,112 @@
+import pytest
+import sys
+import os
+import io
+from unittest.mock import MagicMock
+
+# Ensure src is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from output_writer import OutputWriter
+from reference_handler import ReferenceHandler
+from verse_printer import VersePrinter
+from book_normalizer import BookNormalizer
+
+VERSES = 45  # Mc 1
+
+@pytest.fixture
+def normalizer():
+    return BookNormalizer(os.path.join(os.path.dirname(__file__), '..', 'data'))
+
+class CountingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+def test_writer_buffers_until_flush():
+    stream = CountingStream()
+    out = OutputWriter(stream)
+    out.line("Marc 1")
+    out.line()
+    out.write("v1. ")
+    assert stream.writes == 0
+    out.flush()
+    out.flush()
+    assert stream.writes == 1
+    assert stream.getvalue() == "Marc 1\n\nv1. "
+
+def test_writer_flushes_when_the_buffer_is_full():
+    stream = CountingStream()
+    with OutputWriter(stream, buffer_size=10) as out:
+        out.line("12345")
+        assert stream.writes == 0
+        out.line("67890")
+        assert stream.writes == 1
+        out.line("x")
+    assert stream.getvalue() == "12345\n67890\nx\n"
+    assert stream.writes == 2
+
+def _mark_setup(normalizer, writer):
+    """'tob Mc 1 -f' on synthetic data: N1904 driver, TOB text, a note and relations per verse."""
+    app = MagicMock()
+    app.api.T.nodeFromSection.side_effect = lambda section: 1000 if len(section) == 2 else section[-1] if len(section) == 3 else 2000
+    app.api.L.d.side_effect = lambda node, otype: tuple(range(1, VERSES + 1))
+    app.api.T.sectionFromNode.side_effect = lambda n: ("Mark", 1, n)
+    app.api.T.text.side_effect = lambda n: f"κείμενον {n}"
+
+    tob = MagicMock()
+    tob.F.otype.s.return_value = [100]
+    tob.F.book.v.return_value = "Marc"
+    tob.L.d.side_effect = lambda n, otype: [200] if otype == 'chapter' else [300 + v for v in range(1, VERSES + 1)]
+    tob.F.chapter.v.return_value = 1
+    tob.F.verse.v.side_effect = lambda n: n - 300
+    tob.F.text.v.side_effect = lambda n: f"texte du verset {n - 300}"
+
+    ref_db = MagicMock()
+    ref_db.in_memory_refs = {
+        normalizer.verse_id("MRK", 1, v): {
+            "notes": [f"Note du verset {v}"],
+            "relations": [{"target": "MAT.3.1", "type": "parallel"}, {"target": "LUK.3.2", "type": "parallel"},
+                          {"target": "ISA.40.3", "type": "quotation"}],
+        }
+        for v in range(1, VERSES + 1)
+    }
+    printer = VersePrinter(MagicMock(return_value=tob), MagicMock(return_value=app), normalizer, ref_db, writer=writer)
+    return ReferenceHandler(MagicMock(return_value=app), MagicMock(), MagicMock(), normalizer, printer, writer=writer)
+
+def test_rendering_writes_once_per_chunk(normalizer):
+    # Baseline: a zero-size buffer writes every line, like print()
+    unbuffered = CountingStream()
+    _mark_setup(normalizer, OutputWriter(unbuffered, buffer_size=0)).handle_reference("Mc 1", show_crossref=True)
+    buffered = CountingStream()
+    _mark_setup(normalizer, OutputWriter(buffered)).handle_reference("Mc 1", show_crossref=True)
+
+    assert buffered.getvalue() == unbuffered.getvalue()
+    assert "Marc 1" in buffered.getvalue() and "Note du verset 45" in buffered.getvalue()
+    assert unbuffered.writes > 10 * VERSES
+    # The first verse at once, then the rest of the chapter
+    assert buffered.writes == 2
+
+def test_chapter_lines_cost_one_write_instead_of_two_per_print(normalizer):
+    # tob Mc 1 -f: the rendered lines written with print() vs the writer
+    rendered = CountingStream()
+    _mark_setup(normalizer, OutputWriter(rendered)).handle_reference("Mc 1", show_crossref=True)
+    lines = rendered.getvalue().split("\n")
+
+    printed = CountingStream()
+    for line in lines:
+        print(line, file=printed)
+    written = CountingStream()
+    out = OutputWriter(written)
+    for line in lines:
+        out.line(line)
+    out.flush()
+
+    assert written.getvalue() == printed.getvalue()
+    # print() writes the text and the newline separately
+    assert printed.writes == 2 * len(lines)
+    assert written.writes == 1
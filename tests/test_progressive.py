@@ -0,0 +1,105 @@
+import pytest
+import sys
+import os
+import io
+import threading
+import time
+from unittest.mock import MagicMock
+
+# Ensure src is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from progressive import ProgressiveRenderer, serialized
+from output_writer import OutputWriter, display_width
+from book_normalizer import BookNormalizer
+
+@pytest.fixture
+def normalizer():
+    return BookNormalizer(os.path.join(os.path.dirname(__file__), '..', 'data'))
+
+def _handler(normalizer):
+    handler = MagicMock()
+    handler.normalizer = normalizer
+    handler.out = OutputWriter(io.StringIO())
+    handler.output_format = 'text'
+    handler._get_node_and_app.return_value = (1, MagicMock())
+    handler.printer.get_hebrew_text.return_value = "בְּרֵאשִׁית"
+    handler.printer.get_french_text.return_value = "Au commencement"
+    handler.printer.verse_record.return_value = {"greek": "Ἐν ἀρχῇ"}
+    return handler
+
+def test_serialized_provider_loads_once():
+    loads = []
+    def provider():
+        # Lazy provider as in main.py: the instance is set once loaded
+        if loads:
+            return loads[0]
+        time.sleep(0.05)
+        loads.append(object())
+        return loads[0]
+    provider = serialized(provider)
+    threads = [threading.Thread(target=provider) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # The later callers waited for the first load instead of loading again
+    assert len(loads) == 1
+
+def test_display_width_ignores_combining_marks():
+    assert display_width("בְּרֵאשִׁית") == 6
+    assert display_width("Ἐν ἀρχῇ") == 7
+
+def test_fast_corpora_are_previewed_first_in_a_stable_order(normalizer):
+    handler = _handler(normalizer)
+    stream = handler.out.stream
+
+    def slow_bhsa():
+        # Loaded only once the French row has been drawn
+        deadline = time.time() + 5
+        while "Au commencement" not in stream.getvalue() and time.time() < deadline:
+            time.sleep(0.01)
+    providers = {'bhsa': slow_bhsa, 'lxx': MagicMock(), 'tob': MagicMock()}
+
+    ProgressiveRenderer(handler, providers, interactive=True).render("Gn 1:1")
+
+    out = stream.getvalue()
+    frames = out.split("\x1b[J")
+    # A frame shows TOB while BHSA is still loading, rows keep their order
+    assert any("... (bhsa)\nἘν ἀρχῇ\nAu commencement" in f or "... (bhsa)\n... (lxx)\nAu commencement" in f for f in frames)
+    assert "\nGenèse 1:1\nבְּרֵאשִׁית\nἘν ἀρχῇ\nAu commencement\n" in frames[-2]
+    # The preview is then replaced by the regular rendering
+    assert out.endswith("\x1b[J")
+    handler.handle_reference.assert_called_once()
+
+def test_non_interactive_output_only_overlaps_the_loads(normalizer):
+    handler = _handler(normalizer)
+    providers = {name: MagicMock() for name in ('n1904', 'lxx', 'bhsa', 'tob', 'bj')}
+
+    ProgressiveRenderer(handler, providers, interactive=False).render("Mc 1", french_version='bj')
+
+    assert handler.out.stream.getvalue() == ""
+    for name in ('n1904', 'bj'):
+        providers[name].assert_called_once()
+    for name in ('lxx', 'bhsa', 'tob'):
+        providers[name].assert_not_called()
+    handler.handle_reference.assert_called_once()
+
+def test_every_french_version_is_loaded_concurrently(normalizer):
+    handler = _handler(normalizer)
+    started = []
+    barrier = threading.Barrier(2, timeout=5)
+    def provider(name):
+        def load():
+            # Both French corpora load at the same time: neither waits for the other
+            started.append(name)
+            barrier.wait()
+        return load
+    providers = {'n1904': MagicMock(), 'tob': provider('tob'), 'bj': provider('bj')}
+
+    renderer = ProgressiveRenderer(handler, providers, interactive=False)
+    assert renderer.corpora_for("MRK", False, True, True, ('tob', 'bj')) == {'greek': 'n1904', 'french:tob': 'tob', 'french:bj': 'bj'}
+    renderer.render("Mc 1:1", french_version=('tob', 'bj'))
+
+    assert sorted(started) == ['bj', 'tob']
+    assert handler.handle_reference.call_args[1]['french_version'] == ('tob', 'bj')
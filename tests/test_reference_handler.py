@@ -8,6 +8,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from reference_handler import ReferenceHandler
 from book_normalizer import BookNormalizer
+from canon_metadata import CanonMetadata
 
 @pytest.fixture
 def data_dir():
@@ -114,3 +115,118 @@ def test_handle_ref_bj_version(handler, mock_app, mock_printer):
     handler.handle_reference("John 1:1", french_version='bj')
     args_bj = mock_printer.print_verse.call_args[1]
     assert args_bj.get('french_version') == 'bj'
+
+def _mark_app():
+    # Mark 1 has verses 1-45 (nodes 1-45), Mark 2 has verses 1-28 (nodes 46-73)
+    first = {1: 1, 2: 46}
+    last = {1: 45, 2: 73}
+    app = MagicMock()
+
+    def node_from_section(section):
+        if len(section) == 1:
+            return 1000
+        if len(section) == 2:
+            return 100 + section[1] if section[1] in first else None
+        return first[section[1]] + section[2] - 1 if section[2] <= last[section[1]] - first[section[1]] + 1 else None
+
+    def verses(node, otype):
+        if node == 1000:
+            return tuple(range(1, 74))
+        return tuple(range(first[node - 100], last[node - 100] + 1))
+
+    app.api.T.nodeFromSection.side_effect = node_from_section
+    app.api.L.d.side_effect = verses
+    app.api.T.sectionFromNode.side_effect = lambda n: ("Mark", 1 if n <= 45 else 2, n if n <= 45 else n - 45)
+    return app
+
+def test_passage_list_and_cross_chapter_ranges(normalizer, mock_printer):
+    app = _mark_app()
+    handler = ReferenceHandler(MagicMock(return_value=app), MagicMock(), MagicMock(), normalizer, mock_printer)
+
+    handler.handle_reference("Mc 1:40-2:2; 1:3")
+
+    nodes = [c[1]['node'] for c in mock_printer.print_verse.call_args_list]
+    assert nodes == [40, 41, 42, 43, 44, 45, 46, 47, 3]
+
+def test_ranges_resolve_endpoints_once(normalizer, mock_printer, capsys):
+    app = _mark_app()
+    handler = ReferenceHandler(MagicMock(return_value=app), MagicMock(), MagicMock(), normalizer, mock_printer)
+
+    # Whole book: one lookup for the first verse, one for the book, then node arithmetic
+    handler.handle_reference("Mc")
+    assert mock_printer.print_verse.call_count == 73
+    assert app.api.T.nodeFromSection.call_count == 2
+    out = capsys.readouterr().out
+    assert "Marc 1" in out and "Marc 2" in out
+
+    # Verse range past the end of the chapter is clamped to its last verse
+    mock_printer.print_verse.reset_mock()
+    handler.handle_reference("Mc 2:27-40")
+    assert [c[1]['node'] for c in mock_printer.print_verse.call_args_list] == [72, 73]
+
+def test_structured_formats_keep_headers_and_errors_out_of_the_records(normalizer, mock_printer, capsys):
+    app = _mark_app()
+    handler = ReferenceHandler(MagicMock(return_value=app), MagicMock(), MagicMock(), normalizer, mock_printer, output_format='jsonl')
+
+    handler.handle_reference("Mc 1-2")
+    handler.handle_reference("Xyz 1:1")
+    assert mock_printer.print_verse.call_count == 73
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "Could not find reference: Xyz 1:1" in captured.err
+
+def test_records_are_generated_lazily(normalizer, mock_printer):
+    app = _mark_app()
+    mock_printer.verse_record.side_effect = lambda node=None, **kwargs: {"node": node}
+    handler = ReferenceHandler(MagicMock(return_value=app), MagicMock(), MagicMock(), normalizer, mock_printer)
+
+    records = handler.iter_records("Mc")
+    assert mock_printer.verse_record.call_count == 0
+    assert next(records) == {"node": 1}
+    assert mock_printer.verse_record.call_count == 1
+    assert [r["node"] for r in records] == list(range(2, 74))
+    assert list(handler.iter_records("Xyz 1")) == []
+
+def test_open_ends_come_from_the_metadata(normalizer, mock_printer, tmp_path):
+    app = _mark_app()
+    metadata = CanonMetadata(str(tmp_path / "canon_metadata.json"))
+    metadata.corpora = {'n1904': {"MRK": [45, 28]}}
+    handler = ReferenceHandler(MagicMock(return_value=app), MagicMock(), MagicMock(), normalizer, mock_printer, metadata=metadata)
+
+    handler.handle_reference("Mc")
+    assert mock_printer.print_verse.call_count == 73
+    # No verse list of the book or chapter is built
+    app.api.L.d.assert_not_called()
+
+def test_context_crosses_chapters_by_node_arithmetic(normalizer, mock_printer, capsys):
+    app = _mark_app()
+    app.api.F.otype.v.side_effect = lambda n: 'verse' if 1 <= n <= 73 else 'chapter'
+    handler = ReferenceHandler(MagicMock(return_value=app), MagicMock(), MagicMock(), normalizer, mock_printer)
+
+    handler.handle_reference("Mc 1:44", context=3, compact_mode=1)
+    calls = [c[1] for c in mock_printer.print_verse.call_args_list]
+    assert [c['node'] for c in calls] == [41, 42, 43, 44, 45, 46, 47]
+    assert [c['node'] for c in calls if c['highlight']] == [44]
+    assert all(c['compact_mode'] == 1 for c in calls)
+    # One lookup for the target, none for the neighbours
+    assert app.api.T.nodeFromSection.call_count == 1
+    out = capsys.readouterr().out
+    assert out.index("Marc 1") < out.index("Marc 2")
+
+    # Clipped at the start of the book
+    mock_printer.print_verse.reset_mock()
+    handler.handle_reference("Mc 1:2", context=3)
+    assert [c[1]['node'] for c in mock_printer.print_verse.call_args_list] == [1, 2, 3, 4, 5]
+
+def test_context_of_a_french_only_verse_comes_from_the_metadata(normalizer, mock_printer, tmp_path):
+    app = _mark_app()
+    app.api.T.nodeFromSection.side_effect = None
+    app.api.T.nodeFromSection.return_value = None
+    metadata = CanonMetadata(str(tmp_path / "canon_metadata.json"))
+    metadata.corpora = {'tob': {"MRK": [45, 28]}}
+    handler = ReferenceHandler(MagicMock(return_value=app), MagicMock(), MagicMock(), normalizer, mock_printer, metadata=metadata)
+
+    handler.handle_reference("Mc 2:1", context=2)
+    calls = [c[1] for c in mock_printer.print_verse.call_args_list]
+    assert [(c['chapter'], c['verse'], c['highlight']) for c in calls] == [
+        (1, 44, False), (1, 45, False), (2, 1, True), (2, 2, False), (2, 3, False)]
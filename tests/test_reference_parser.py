@@ -0,0 +1,30 @@
+import pytest
+import sys
+import os
+
+# Ensure src is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from reference_parser import ParsedReference
+from book_normalizer import BookNormalizer
+
+@pytest.fixture
+def parser():
+    return BookNormalizer(os.path.join(os.path.dirname(__file__), '..', 'data')).parser
+
+def test_chapters_and_verses_start_at_one(parser):
+    # Verse 0 is an invalid reference, not a whole chapter or an open start
+    assert parser.parse("Mc 1:0") is None
+    assert parser.parse("Mc 0:1") is None
+    assert parser.parse_passage("Mc 1:0") is None
+    assert parser.parse_passage("Mc 1:0-5") is None
+    assert parser.parse_passage("Mc 0:1") is None
+    assert parser.parse_passage("Mc 1:1-2:0") is None
+    assert parser.parse_passage("Mc 1:1-0") is None
+
+def test_valid_references_still_parse(parser):
+    assert parser.parse("Mc 1:1") == ParsedReference.of("MRK", 1, 1)
+    assert parser.parse("Mc 1") == ParsedReference.of("MRK", 1)
+    vid = parser.verse_id
+    assert parser.parse_passage("Mc 1:1-5") == ((vid("MRK", 1, 1), vid("MRK", 1, 5)),)
+    assert parser.parse_passage("Mc 1-2:3") == ((vid("MRK", 1, 1), vid("MRK", 2, 3)),)
@@ -0,0 +1,169 @@
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Ensure src is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from search_index import SearchIndex, tokenize, top_k, merge_scores, kwic
+from search_handler import SearchHandler
+from search_cache import SearchCache
+from book_normalizer import BookNormalizer
+
+@pytest.fixture
+def data_dir():
+    return os.path.join(os.path.dirname(__file__), '..', 'data')
+
+@pytest.fixture
+def normalizer(data_dir):
+    return BookNormalizer(data_dir)
+
+@pytest.fixture
+def index():
+    idx = SearchIndex()
+    idx.add_document(("MRK", 1, 4), "Jean le Baptiste parut dans le désert, proclamant un baptême de conversion")
+    idx.add_document(("MRK", 1, 8), "Moi, je vous ai baptisés d'eau, lui vous baptisera d'Esprit Saint.")
+    idx.add_document(("MRK", 10, 38), "Pouvez-vous être baptisés du baptême dont je vais être baptisé? baptême")
+    idx.add_document(("GEN", 1, 2), "le souffle de Dieu planait à la surface des eaux")
+    return idx
+
+def test_tokenize_folds_accents_and_case():
+    assert tokenize("Baptême de l'Esprit") == ["bapteme", "de", "l", "esprit"]
+    # Greek: breathings and accents dropped, final sigma folded
+    assert tokenize("Λόγος") == ["λογοσ"]
+
+def test_match_all_requires_every_term(index):
+    assert index.match_all("baptême") == {("MRK", 1, 4), ("MRK", 10, 38)}
+    assert index.match_all("baptême conversion") == {("MRK", 1, 4)}
+    assert index.match_all("baptême souffle") == set()
+    assert index.match_all("") == set()
+
+def test_bm25_prefers_higher_term_frequency(index):
+    scores = index.scores("baptême")
+    assert set(scores) == {("MRK", 1, 4), ("MRK", 10, 38)}
+    assert scores[("MRK", 10, 38)] > scores[("MRK", 1, 4)]
+
+def test_top_k_is_bounded_and_sorted():
+    scores = {("A", 1, i): float(i) for i in range(1, 50)}
+    best = top_k(scores, 3)
+    assert [key for _, key in best] == [("A", 1, 49), ("A", 1, 48), ("A", 1, 47)]
+    assert top_k(scores, 0) == []
+    assert len(top_k({("A", 1, 1): 1.0}, 5)) == 1
+
+def test_merge_scores_sums_per_verse():
+    merged = merge_scores({("A", 1, 1): 1.0}, {("A", 1, 1): 2.0, ("A", 1, 2): 0.5})
+    assert merged == {("A", 1, 1): 3.0, ("A", 1, 2): 0.5}
+
+# One book (Marc), one chapter, two verses
+MARC = {"Marc": {1: {1: "Commencement de l'Evangile", 2: "baptême de conversion"}}}
+
+def test_search_handler_ranks_and_prints_through_reference_handler(normalizer, capsys, corpus_api):
+    ref_handler = MagicMock()
+    corpora = {'tob': (lambda: corpus_api(MARC), lambda api, n: api.F.text.v(n))}
+    searcher = SearchHandler(corpora, normalizer, ref_handler)
+
+    searcher.handle_search("bapteme", langs=['fr'], ranked=True, top=5, compact_mode=1)
+
+    ref_handler.handle_reference.assert_called_once()
+    args, kwargs = ref_handler.handle_reference.call_args
+    assert args[0] == ("MRK", 1, 2, "MRK.1.2")
+    assert kwargs['compact_mode'] == 1
+    assert kwargs['french_version'] == 'tob'
+    out = capsys.readouterr().out
+    assert "Mc 1:2" in out
+    assert "1 verse(s) found." in out
+
+def test_indexes_are_persisted_and_reloaded(normalizer, tmp_path, corpus_api):
+    source = tmp_path / "tob"
+    source.mkdir()
+    (source / "text.tf").write_text("v1")
+    cache = SearchCache(str(tmp_path / "cache"), {'tob': ("1.0", str(source))})
+
+    def searcher():
+        provider = MagicMock(side_effect=lambda: corpus_api(MARC))
+        text_of = lambda api, n: api.F.text.v(n)
+        return SearchHandler({'tob': (provider, text_of)}, normalizer, MagicMock(), cache=cache), provider
+
+    mrk_1_2 = normalizer.verse_id("MRK", 1, 2)
+    first, provider = searcher()
+    assert first.search("bapteme", ['tob']) == [mrk_1_2]
+    provider.assert_called_once()
+
+    # Second run: the index comes from the cache, the corpus is not loaded
+    second, provider = searcher()
+    assert second.search("bapteme", ['tob']) == [mrk_1_2]
+    provider.assert_not_called()
+    # ... until the concordance needs its texts
+    assert [line[2] for line in second.concordance("bapteme", ['tob'])] == ["baptême"]
+    provider.assert_called_once()
+
+    # Changed source files invalidate the cached index
+    (source / "text.tf").write_text("v2, edited")
+    third, provider = searcher()
+    assert third.search("bapteme", ['tob']) == [mrk_1_2]
+    provider.assert_called_once()
+
+def test_structured_search_prints_the_records_only(normalizer, capsys, corpus_api):
+    ref_handler = MagicMock(output_format='json')
+    corpora = {'tob': (lambda: corpus_api(MARC), lambda api, n: api.F.text.v(n))}
+    searcher = SearchHandler(corpora, normalizer, ref_handler)
+
+    searcher.handle_search("bapteme", langs=['fr'], ranked=True, top=5)
+
+    ref_handler.handle_reference.assert_called_once()
+    captured = capsys.readouterr()
+    # Hit headers dropped, the count on stderr: stdout is left to the verse records
+    assert captured.out == ""
+    assert "1 verse(s) found." in captured.err
+
+def test_align_intersects_corpora_on_verse_ids(normalizer):
+    gen_1_2 = normalizer.verse_id("GEN", 1, 2)
+    jhn_3_8 = normalizer.verse_id("JHN", 3, 8)
+    greek = SearchIndex()
+    greek.add_document(jhn_3_8, "τὸ πνεῦμα ὅπου θέλει πνεῖ")
+    greek.add_document(gen_1_2, "πνεῦμα θεοῦ")
+    french = SearchIndex()
+    french.add_document(gen_1_2, "le souffle de Dieu")
+    french.add_document(jhn_3_8, "Le vent souffle où il veut")
+    french.add_document(normalizer.verse_id("JHN", 20, 22), "il souffla sur eux")
+
+    searcher = SearchHandler({'n1904.lemma': None, 'tob': None}, normalizer, MagicMock())
+    searcher._indexes = {'n1904.lemma': greek, 'lxx.lemma': None, 'tob': french}
+
+    clauses = [searcher.parse_clause("lemma:πνεῦμα"), searcher.parse_clause("fr:souffle")]
+    assert searcher.align(clauses) == [gen_1_2, jhn_3_8]
+
+    clauses = [searcher.parse_clause("n1904.lemma:πνεῖ"), searcher.parse_clause("tob:vent")]
+    assert searcher.align(clauses) == [jhn_3_8]
+
+def test_parse_clause_rejects_unknown_sources(normalizer):
+    searcher = SearchHandler({'tob': None}, normalizer, MagicMock())
+    assert searcher.parse_clause("fr:souffle") == (['fr'], "souffle")
+    assert searcher.parse_clause("klingon:qapla") is None
+    assert searcher.parse_clause("souffle") is None
+
+def test_kwic_yields_every_occurrence_with_context():
+    lines = list(kwic("Le vent souffle, le Souffle de Dieu", {"souffle"}, width=8))
+    assert lines == [("Le vent ", "souffle", ", le Sou"), ("fle, le ", "Souffle", " de Dieu")]
+
+def test_concordance_streams_in_book_order(normalizer):
+    texts = {1: "le souffle de Dieu", 2: "le vent souffle", 3: "rien"}
+    jhn_3_8, gen_1_2, gen_1_3 = (normalizer.verse_id(*key) for key in (("JHN", 3, 8), ("GEN", 1, 2), ("GEN", 1, 3)))
+    index = SearchIndex()
+    index.add_document(jhn_3_8, texts[2])
+    index.add_document(gen_1_2, texts[1])
+    index.add_document(gen_1_3, texts[3])
+
+    text_of = MagicMock(side_effect=lambda api, n: texts[n])
+    searcher = SearchHandler({'tob': (None, text_of)}, normalizer, MagicMock())
+    searcher._indexes = {'tob': index}
+    searcher._sources = {'tob': (None, {jhn_3_8: 2, gen_1_2: 1, gen_1_3: 3})}
+
+    lines = searcher.concordance("souffle", ['tob'], width=10)
+    # Lazy: nothing fetched before the first line is consumed
+    text_of.assert_not_called()
+    first = next(lines)
+    assert first[0] == gen_1_2
+    assert text_of.call_count == 1
+    assert [line[0] for line in lines] == [jhn_3_8]
@@ -0,0 +1,120 @@
+import pytest
+import sys
+import os
+import io
+import json
+import contextlib
+import threading
+from unittest.mock import MagicMock
+
+# Ensure src is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from synopsis import SynopsisHandler
+from verse_printer import VersePrinter
+from output_writer import OutputWriter
+from book_normalizer import BookNormalizer
+
+@pytest.fixture
+def normalizer():
+    return BookNormalizer(os.path.join(os.path.dirname(__file__), '..', 'data'))
+
+def _gospels(corpus_api):
+    # Marc 1 (4 verses), Matthieu 3 (3 verses), Luc 3 (2 verses), texts "Luc 3.2"
+    structure = {"Marc": (1, 4), "Matthieu": (3, 3), "Luc": (3, 2)}
+    return corpus_api({book: {c: {v: f"{book} {c}.{v}" for v in range(1, n + 1)}} for book, (c, n) in structure.items()})
+
+def _synopsis(normalizer, corpus_api, output_format='text'):
+    vid = normalizer.verse_id
+    ref_db = MagicMock()
+    ref_db.in_memory_refs = {
+        vid("MRK", 1, 2): {"notes": [], "relations": [
+            {"target": "MAL.3.1", "type": "parallel", "note": ""},
+            {"target": "MAT.3.3", "type": "quotation", "note": ""},
+        ]},
+        vid("MRK", 1, 3): {"notes": [], "relations": [
+            {"target": "MAT.3.1-MAT.3.3", "type": "parallel", "note": ""},
+            {"target": "LUK.3.1-2", "type": "parallel", "note": ""},
+        ]},
+        vid("MRK", 1, 4): {"notes": [], "relations": [{"target": "MRK.1.1", "type": "parallel", "note": ""}]},
+    }
+    api = _gospels(corpus_api)
+    printer = VersePrinter(lambda: api, None, normalizer, ref_db, writer=OutputWriter(io.StringIO()), output_format=output_format)
+    metadata = MagicMock()
+    metadata.max_verse_count.return_value = 4
+    return SynopsisHandler(normalizer, ref_db, printer, metadata=metadata), api
+
+def test_columns_and_rows_follow_parallel_relations(normalizer, corpus_api):
+    handler, _ = _synopsis(normalizer, corpus_api)
+    synopsis, texts = handler.build("Mc 1:2-4")
+
+    # Malachi is not a Gospel, same-book parallels are skipped, quotations ignored
+    assert [c["book"] for c in synopsis["columns"]] == ["MRK", "MAT", "LUK"]
+    assert [c["label"] for c in synopsis["columns"]] == ["Mc 1:2-4", "Mt 3:1-3", "Lc 3:1-2"]
+
+    vid = normalizer.verse_id
+    mt = [vid("MAT", 3, v) for v in (1, 2, 3)]
+    lk = [vid("LUK", 3, v) for v in (1, 2)]
+    assert synopsis["rows"] == [
+        [[vid("MRK", 1, 2)], [], []],
+        [[vid("MRK", 1, 3)], mt, lk],
+        [[vid("MRK", 1, 4)], [], []],
+    ]
+    assert texts[vid("LUK", 3, 2)] == {'tob': "Luc 3.2"}
+
+def test_verse_texts_resolve_each_book_and_chapter_once(normalizer, corpus_api):
+    handler, api = _synopsis(normalizer, corpus_api)
+    vid = normalizer.verse_id
+    texts = handler.printer.verse_texts([vid("MAT", 3, 1), vid("MAT", 3, 3), vid("MRK", 1, 1), vid("MAT", 4, 1)])
+
+    assert texts == {vid("MAT", 3, 1): "Matthieu 3.1", vid("MAT", 3, 3): "Matthieu 3.3", vid("MRK", 1, 1): "Marc 1.1"}
+    # One scan of the book nodes for the whole batch
+    assert api.F.otype.s.call_count == 1
+    chapter_lookups = [c for c in api.L.d.call_args_list if c[1]['otype'] == 'chapter']
+    assert len(chapter_lookups) == 2
+
+def test_terminal_columns_are_aligned(normalizer, corpus_api):
+    handler, _ = _synopsis(normalizer, corpus_api)
+    handler.handle_synopsis("Mc 1:2-4", width=66)
+    lines = handler.out.stream.getvalue().splitlines()
+
+    assert lines[0].split(" | ")[0].rstrip() == "Mc 1:2-4"
+    assert "Mt 3:1-3" in lines[0] and "Lc 3:1-2" in lines[0]
+    row = next(line for line in lines if line.startswith("1:3 "))
+    assert row.index("3:1 Matthieu") == 20 + 3
+    assert row.index("3:1 Luc") == 2 * (20 + 3)
+
+def test_json_output(normalizer, corpus_api):
+    handler, _ = _synopsis(normalizer, corpus_api, output_format='json')
+    handler.handle_synopsis("Mc 1:3")
+    data = json.loads(handler.out.stream.getvalue())
+
+    assert [c["book"] for c in data["columns"]] == ["MRK", "MAT", "LUK"]
+    assert data["texts"]["MAT.3.2"] == {'tob': "Matthieu 3.2"}
+
+def test_overlapping_corpus_loads_leave_stdout_usable(normalizer, corpus_api):
+    a_in, b_in, a_out = threading.Event(), threading.Event(), threading.Event()
+
+    def load(api, enter_after, entered, exit_after, exited):
+        # As in main.py: each load silences stdout with its own devnull redirect.
+        # TOB enters first and leaves first, so BJ restores TOB's closed devnull.
+        def provider():
+            if enter_after:
+                enter_after.wait(5)
+            with open(os.devnull, 'w') as f, contextlib.redirect_stdout(f):
+                entered.set()
+                exit_after.wait(5)
+            if exited:
+                exited.set()
+            return api
+        return provider
+
+    handler, api = _synopsis(normalizer, corpus_api)
+    stdout = sys.stdout
+    handler.printer.tob_provider = load(api, None, a_in, b_in, a_out)
+    handler.printer.bj_provider = load(api, a_in, b_in, a_out, None)
+    synopsis, texts = handler.build("Mc 1:3", corpora=('tob', 'bj'))
+
+    assert sys.stdout is stdout
+    assert texts[normalizer.verse_id("MAT", 3, 1)]['tob'] == "Matthieu 3.1"
+    handler.handle_synopsis("Mc 1:3", corpora=('tob', 'bj'), width=66)
@@ -0,0 +1,63 @@
+import pytest
+import sys
+import os
+import io
+import json
+from unittest.mock import MagicMock
+
+# Ensure src is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from translation_diff import TranslationDiff, diff_words, format_diff
+from verse_printer import VersePrinter
+from output_writer import OutputWriter
+from book_normalizer import BookNormalizer
+
+@pytest.fixture
+def normalizer():
+    return BookNormalizer(os.path.join(os.path.dirname(__file__), '..', 'data'))
+
+def _differ(normalizer, corpus_api, output_format='text', **kwargs):
+    tob = corpus_api({"Marc": {1: {1: "Commencement de l'Évangile de Jésus Christ", 2: "Selon ce qui est écrit"}, 2: {1: "Quelques jours après"}}})
+    bj = corpus_api({"MRK": {1: {1: "Commencement de l'Évangile de Jésus Christ, Fils de Dieu.", 2: "Ainsi qu'il est écrit"}, 2: {1: "Quelques jours après"}}})
+    printer = VersePrinter(lambda: tob, None, normalizer, MagicMock(), bj_provider=lambda: bj, writer=OutputWriter(io.StringIO()), output_format=output_format)
+    return TranslationDiff(normalizer, printer, **kwargs), tob, bj
+
+def test_diff_words_marks_insertions_and_deletions():
+    assert diff_words(("le souffle de Dieu", "l'Esprit de Dieu planait")) == [
+        ['-', "le souffle"], ['+', "l'Esprit"], ['=', "de Dieu"], ['+', "planait"]]
+    assert diff_words(("même texte", "même texte")) == [['=', "même texte"]]
+    assert diff_words((None, "seul")) == [['+', "seul"]]
+    assert format_diff([['-', "a"], ['=', "b"], ['+', "c"]]) == "[-a-] b {+c+}"
+    assert format_diff([['-', "a"]], color=True) == "\x1b[31m[-a-]\x1b[0m"
+
+def test_each_version_is_walked_once_over_the_passage(normalizer, corpus_api):
+    differ, tob, bj = _differ(normalizer, corpus_api)
+    results = differ.diffs("Mc")
+
+    vid = normalizer.verse_id
+    assert [r[0] for r in results] == [vid("MRK", 1, 1), vid("MRK", 1, 2), vid("MRK", 2, 1)]
+    assert results[0][3][-1] == ['+', "Christ, Fils de Dieu."]
+    assert results[2][3] == [['=', "Quelques jours après"]]
+    # One scan of the book nodes and of the chapters of each version
+    for api in (tob, bj):
+        assert api.F.otype.s.call_count == 1
+        assert len([c for c in api.L.d.call_args_list if c[1]['otype'] == 'chapter']) == 1
+
+def test_long_spans_are_diffed_in_worker_processes(normalizer, corpus_api):
+    differ, _, _ = _differ(normalizer, corpus_api, workers=2, min_parallel=1)
+    sequential, _, _ = _differ(normalizer, corpus_api)
+    assert differ.diffs("Mc 1") == sequential.diffs("Mc 1")
+
+def test_text_and_json_output(normalizer, corpus_api):
+    differ, _, _ = _differ(normalizer, corpus_api)
+    differ.handle_diff("Mc 1:2")
+    assert differ.out.stream.getvalue() == (
+        "--- TOB\n+++ BJ\n\nMarc 1\nv2. [-Selon ce qui-] {+Ainsi qu'il+} est écrit\n\n1 of 1 verse(s) differ.\n")
+
+    differ, _, _ = _differ(normalizer, corpus_api, output_format='json')
+    differ.handle_diff("Mc 2")
+    records = json.loads(differ.out.stream.getvalue())
+    assert records == [{"id": normalizer.verse_id("MRK", 2, 1), "ref": "MRK.2.1", "versions": ["tob", "bj"],
+                        "texts": {"tob": "Quelques jours après", "bj": "Quelques jours après"},
+                        "diff": [["=", "Quelques jours après"]]}]
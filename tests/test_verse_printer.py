@@ -1,13 +1,17 @@
 import pytest
 import sys
 import os
+import io
+import json
 from unittest.mock import MagicMock
 
 # Ensure src is in path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from verse_printer import VersePrinter
+from verse_printer import VersePrinter, french_versions
 from book_normalizer import BookNormalizer
+from reference_parser import ParsedReference
+from output_writer import OutputWriter
 
 @pytest.fixture
 def data_dir():
@@ -132,7 +136,8 @@ def test_get_hebrew_text(printer):
     text = printer.get_hebrew_text("Genesis", 1, 1)
     
     assert text == "Word1 Word2"
-    mock_bhsa_app.nodeFromSectionStr.assert_called_with("Genesis 1:1")
+    # The printer passes a parsed reference, not a string to re-parse
+    mock_bhsa_app.nodeFromSectionStr.assert_called_with(ParsedReference("GEN", 1, 1, "GEN.1.1"))
 
 def test_print_verse_calls_hebrew(printer, mock_tob_api, mock_lxx_app):
     # Verify that passing show_hebrew=True calls get_hebrew_text logic OR prints if node is driving
@@ -178,3 +183,91 @@ def test_print_verse_calls_bj(printer, mock_bj_api, mock_tob_api):
     # Verify TOB API was NOT used for text fetching (though it might be checked for existence/loading)
     # Actually, printer logic: if show_french: if french_version == 'bj': ... else: ...
     mock_tob_api.F.text.v.assert_not_called()
+
+def test_french_versions_parses_lists_and_all():
+    assert french_versions(None) == ('tob',)
+    assert french_versions('BJ') == ('bj',)
+    assert french_versions('all') == ('tob', 'bj')
+    assert french_versions('bj, tob,bj') == ('bj', 'tob')
+    assert french_versions(['tob']) == ('tob',)
+
+def test_several_french_versions_in_one_record(printer, normalizer, mock_tob_api, mock_bj_api):
+    printer.out = OutputWriter(io.StringIO())
+    record = printer.verse_record(book_en="Genesis", chapter=1, verse=1, show_greek=False, french_version=('tob', 'bj'))
+
+    assert record["translations"] == {'tob': "Au commencement...", 'bj': "Au commencement (BJ)..."}
+    # The first version keeps the single-version fields
+    assert record["french"] == "Au commencement..."
+    assert record["french_version"] == 'tob'
+    # The book is resolved once, each corpus scanned once
+    assert mock_tob_api.F.otype.s.call_count == 1
+    assert mock_bj_api.F.otype.s.call_count == 1
+
+    printer.emit(record, compact_mode=1)
+    printer.out.flush()
+    assert printer.out.stream.getvalue() == "v1. [TOB] Au commencement...\n    [BJ] Au commencement (BJ)...\n"
+
+def _crossref_printer(printer, normalizer, output_format):
+    printer.ref_db.in_memory_refs = {normalizer.verse_id("GEN", 1, 1): {
+        "notes": ["Création"],
+        "relations": [{"target": "JHN.1.1", "type": "parallel", "note": "Logos"},
+                      {"target": "HEB.11.3", "type": "allusion"},
+                      {"target": "PSA.33.6", "type": "parallel"}],
+    }}
+    printer.out = OutputWriter(io.StringIO())
+    printer.output_format = output_format
+    return printer
+
+def test_verse_record_is_shared_by_every_format(printer, normalizer):
+    printer = _crossref_printer(printer, normalizer, 'jsonl')
+    for verse in (1, 1):
+        printer.print_verse(book_en="Genesis", chapter=1, verse=verse, show_greek=False, show_crossref=True)
+    printer.finish()
+    printer.out.flush()
+    lines = printer.out.stream.getvalue().splitlines()
+    assert len(lines) == 2
+    record = json.loads(lines[0])
+    assert record["id"] == normalizer.verse_id("GEN", 1, 1)
+    assert record["ref"] == "GEN.1.1"
+    assert record["header"] == "Genèse 1:1"
+    assert record["french"] == "Au commencement..."
+    assert "hebrew" not in record and "greek" not in record
+    assert record["notes"] == ["Création"]
+    assert list(record["relations"]) == ["parallel", "allusion"]
+    assert [r["label"] for r in record["relations"]["parallel"]] == ["Jn 1:1", "Ps 33:6"]
+
+    # The text formatter renders the same record
+    printer = _crossref_printer(printer, normalizer, 'text')
+    printer.emit(record)
+    printer.out.flush()
+    text = printer.out.stream.getvalue()
+    assert text.startswith("\nGenèse 1:1\nAu commencement...\n")
+    assert "    Parallel: \n        Jn 1:1\n        Ps 33:6\n    Allusion: \n        He 11:3\n" in text
+
+def test_json_format_streams_one_array(printer, normalizer):
+    printer = _crossref_printer(printer, normalizer, 'json')
+    for verse in (1, 2):
+        printer.print_verse(book_en="Genesis", chapter=1, verse=verse, show_greek=False)
+    printer.finish()
+    printer.out.flush()
+    records = json.loads(printer.out.stream.getvalue())
+    assert [r["verse"] for r in records] == [1, 2]
+    assert "notes" not in records[0]
+
+    # No verse: still a valid document
+    printer = _crossref_printer(printer, normalizer, 'json')
+    printer.finish()
+    printer.out.flush()
+    assert json.loads(printer.out.stream.getvalue()) == []
+
+def test_context_target_is_highlighted_in_every_display(printer, normalizer):
+    printer.out = OutputWriter(io.StringIO())
+    record = printer.verse_record(book_en="Genesis", chapter=1, verse=1, show_greek=False, highlight=True)
+    assert record["highlight"] is True
+    for compact_mode in (0, 1, 2):
+        printer.emit(record, compact_mode=compact_mode)
+    printer.out.flush()
+    assert printer.out.stream.getvalue() == (
+        "\n▶ Genèse 1:1\nAu commencement...\n"
+        "▶ v1. Au commencement...\n"
+        "▶ Au commencement...\n")
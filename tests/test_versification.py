@@ -0,0 +1,112 @@
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Ensure src is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from versification import Versification
+from verse_printer import VersePrinter
+from reference_handler import ReferenceHandler
+from book_normalizer import BookNormalizer
+from reference_parser import ParsedReference
+
+@pytest.fixture
+def data_dir():
+    return os.path.join(os.path.dirname(__file__), '..', 'data')
+
+@pytest.fixture
+def normalizer(data_dir):
+    return BookNormalizer(data_dir)
+
+@pytest.fixture
+def versification(data_dir, normalizer):
+    return Versification(os.path.join(data_dir, "versification.json"), normalizer)
+
+def test_psalms_follow_the_greek_and_hebrew_numbering(versification):
+    def to_tob(c, v):
+        return versification.map_reference("PSA", c, v, 'lxx', 'tob')[1:]
+    assert to_tob(8, 2) == (8, 2)
+    assert to_tob(9, 21) == (9, 21)
+    assert to_tob(9, 22) == (10, 1)
+    assert to_tob(22, 1) == (23, 1)
+    assert to_tob(113, 9) == (115, 1)
+    assert to_tob(115, 10) == (116, 19)
+    assert to_tob(146, 11) == (147, 11)
+    assert to_tob(147, 1) == (147, 12)
+    assert to_tob(150, 6) == (150, 6)
+    # Verses unknown to the rules keep their number
+    assert to_tob(151, 1) == (151, 1)
+
+def test_maps_are_reversible_and_identity_within_a_scheme(versification, normalizer):
+    for c, v in [(9, 30), (50, 3), (113, 26), (114, 9), (147, 9)]:
+        vid = normalizer.verse_id("PSA", c, v)
+        hebrew = versification.map(vid, 'lxx', 'bhsa')
+        assert hebrew != vid
+        assert versification.map(hebrew, 'bj', 'lxx') == vid
+    assert versification.map_reference("MAL", 3, 24, 'lxx', 'bhsa') == ("MAL", 3, 22)
+    assert versification.map_reference("MAL", 3, 22, 'tob', 'lxx') == ("MAL", 3, 24)
+    assert versification.map_reference("PSA", 22, 1, 'tob', 'bhsa') == ("PSA", 22, 1)
+    assert versification.map_reference("PSA", 22, 1, None, 'tob') == ("PSA", 22, 1)
+
+def test_invalid_rules_are_rejected(tmp_path, normalizer):
+    path = tmp_path / "versification.json"
+    path.write_text('{"version": 1, "maps": {"greek>hebrew": [["PSA 9:22-39", "PSA 10:1-17"]]}}')
+    with pytest.raises(ValueError):
+        Versification(str(path), normalizer)
+
+def test_printer_fetches_the_parallel_verse(versification, normalizer):
+    tob_api = MagicMock()
+    tob_api.F.otype.s.return_value = [100]
+    tob_api.F.book.v.return_value = "Psaumes"
+    tob_api.L.d.side_effect = lambda n, otype: [200 + c for c in (22, 23)] if otype == 'chapter' else [n * 1000 + 1]
+    tob_api.F.chapter.v.side_effect = lambda n: n - 200
+    tob_api.F.verse.v.return_value = 1
+    tob_api.F.text.v.side_effect = lambda n: f"Ps {n // 1000 - 200}"
+    bhsa_app = MagicMock()
+    printer = VersePrinter(MagicMock(return_value=tob_api), MagicMock(), normalizer, MagicMock(),
+                           MagicMock(return_value=bhsa_app), versification=versification)
+
+    # LXX Ps 22:1 is TOB / BHSA Ps 23:1
+    assert printer.get_french_text("PSA", 22, 1, 'lxx') == "Ps 23"
+    printer.get_hebrew_text("PSA", 22, 1, 'lxx')
+    bhsa_app.nodeFromSectionStr.assert_called_with(ParsedReference.of("PSA", 23, 1))
+    # Numbers of the corpus itself, or of an unknown source, are used as is
+    assert printer.get_french_text("PSA", 22, 1, 'tob') == "Ps 22"
+    assert printer.get_french_text("PSA", 22, 1) == "Ps 22"
+
+def _lxx_app(chapters):
+    # Psalms of the LXX, {chapter: verse count}, with consecutive verse nodes
+    nodes = {}
+    for c, count in chapters.items():
+        for v in range(1, count + 1):
+            nodes[(c, v)] = len(nodes) + 1
+    sections = {node: ("Psalmi", c, v) for (c, v), node in nodes.items()}
+    app = MagicMock(corpus='lxx')
+    app.nodeFromSectionStr.side_effect = lambda ref: nodes.get((ref.chapter, ref.verse)) if ref.verse else ('chapter', ref.chapter) if ref.chapter in chapters else None
+    app.api.L.d.side_effect = lambda container, otype: [nodes[(container[1], v)] for v in range(1, chapters[container[1]] + 1)]
+    app.api.T.sectionFromNode.side_effect = sections.get
+    app.api.T.text.side_effect = lambda node: "LXX %d:%d" % sections[node][1:]
+    return app
+
+def test_references_are_read_in_the_numbering_of_the_french_version(versification, normalizer, corpus_api):
+    lxx = _lxx_app({9: 39, 10: 7, 22: 32})
+    tob = corpus_api({"Psaumes": {c: {v: f"TOB {c}:{v}" for v in range(1, n + 1)} for c, n in {9: 21, 10: 18, 23: 6}.items()}})
+    printer = VersePrinter(MagicMock(return_value=tob), MagicMock(), normalizer, MagicMock(), versification=versification)
+    handler = ReferenceHandler(MagicMock(), MagicMock(return_value=lxx), None, normalizer, printer, versification=versification)
+
+    def records(ref):
+        return [(r["ref"], r["header"], r["greek"], r["french"]) for r in handler.iter_records(ref)]
+
+    # TOB Ps 23:1 is LXX Ps 22:1: only the Greek text comes from the LXX numbering
+    assert records("Ps 23:1") == [("PSA.23.1", "Psaumes 23:1", "LXX 22:1", "TOB 23:1")]
+    # LXX Ps 9 holds TOB Ps 9 and 10
+    ps9 = records("Ps 9")
+    assert [r[0] for r in ps9] == [f"PSA.9.{v}" for v in range(1, 22)]
+    assert ps9[-1] == ("PSA.9.21", "Psaumes 9:21", "LXX 9:21", "TOB 9:21")
+    ps10 = records("Ps 10")
+    assert [r[0] for r in ps10] == [f"PSA.10.{v}" for v in range(1, 19)]
+    assert ps10[0] == ("PSA.10.1", "Psaumes 10:1", "LXX 9:22", "TOB 10:1")
+    # LXX Ps 9:22 is TOB Ps 10:1: TOB Ps 9:22 has no Greek counterpart
+    assert records("Ps 9:22")[0][2] is None
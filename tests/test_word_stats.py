@@ -0,0 +1,59 @@
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Ensure src is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from word_stats import WordStats, encode_slot_feature, section_of_slots, frequency_tables
+from book_normalizer import BookNormalizer
+
+@pytest.fixture
+def data_dir():
+    return os.path.join(os.path.dirname(__file__), '..', 'data')
+
+@pytest.fixture
+def normalizer(data_dir):
+    return BookNormalizer(data_dir)
+
+@pytest.fixture
+def api():
+    # 8 slots, two chapters of Mark: slots 1-5 and 6-8
+    lemmas = ["καί", "ὁ", "καί", "λόγος", None, "καί", "θεός", "θεός"]
+    mock = MagicMock()
+    mock.F = MagicMock(spec=['otype', 'lemma'])
+    mock.F.otype.maxSlot = len(lemmas)
+    mock.F.lemma.data = {i + 1: v for i, v in enumerate(lemmas) if v is not None}
+    mock.F.otype.s.side_effect = lambda otype: [101, 102] if otype == 'chapter' else [100]
+    mock.E.oslots.s.side_effect = lambda n: {100: (1, 2, 3, 4, 5, 6, 7, 8), 101: (1, 2, 3, 4, 5), 102: (6, 7, 8)}[n]
+    mock.T.sectionFromNode.side_effect = lambda n: {100: ("Mark",), 101: ("Mark", 1), 102: ("Mark", 2)}[n]
+    return mock
+
+def test_encode_slot_feature(api):
+    codes, vocabulary = encode_slot_feature(api, 'lemma')
+    assert vocabulary == ["καί", "ὁ", "λόγος", "θεός"]
+    assert codes.tolist() == [0, 1, 0, 2, -1, 0, 3, 3]
+
+def test_frequency_tables_per_chapter(api):
+    codes, vocabulary = encode_slot_feature(api, 'lemma')
+    seg, sections = section_of_slots(api, 'chapter')
+    assert seg.tolist() == [0, 0, 0, 0, 0, 1, 1, 1]
+
+    tokens, types, tops = frequency_tables(codes, seg, len(sections), len(vocabulary), top=2)
+    assert tokens.tolist() == [4, 3]
+    assert types.tolist() == [3, 2]
+    assert tops[0] == [(0, 2), (1, 1)]
+    assert tops[1] == [(3, 2), (0, 1)]
+
+def test_word_stats_rows_and_output(api, normalizer, capsys):
+    stats = WordStats(api, normalizer)
+    rows = stats.compute(by='chapter', kind='lemma', top=1)
+    assert [(r[1], r[2], r[3]) for r in rows] == [(4, 3, [("καί", 2)]), (3, 2, [("θεός", 2)])]
+
+    assert stats.compute(by='book', book_code='GEN') == []
+
+    stats.print_stats(by='chapter', top=1)
+    out = capsys.readouterr().out
+    assert "Mc 1" in out and "TTR 0.750" in out
+    assert "2 section(s), 7 tokens." in out
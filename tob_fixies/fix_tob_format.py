@@ -1,8 +1,15 @@
 import re
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from canon_metadata import CanonMetadata
+
+METADATA_PATH = os.path.join(os.path.dirname(__file__), '..', '.cache', 'canon_metadata.json')
 
 # Max verses per chapter in Mark (for heuristic parsing of source verses)
-MARK_VERSES_COUNT = {
+# Read from the canon metadata (.cache/canon_metadata.json) once it has been generated.
+MARK_VERSES_COUNT = CanonMetadata(METADATA_PATH).verse_counts('tob', "MRK") or {
     1: 45, 2: 28, 3: 35, 4: 41, 5: 43, 6: 56, 7: 37, 8: 38,
     9: 50, 10: 52, 11: 33, 12: 44, 13: 37, 14: 72, 15: 47, 16: 20
 }
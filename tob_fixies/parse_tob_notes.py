@@ -1,5 +1,12 @@
 import re
 import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from canon_metadata import CanonMetadata
+
+METADATA_PATH = os.path.join(os.path.dirname(__file__), '..', '.cache', 'canon_metadata.json')
 
 # Mapping of French/TOB abbreviations to standard Book Codes used in the project
 BOOK_MAP = {
@@ -26,7 +33,8 @@ BOOK_MAP = {
 CURRENT_BOOK_CODE = "MRK" # We are parsing Mark
 
 # Max verses per chapter in Mark (for heuristic parsing of source verses)
-MARK_VERSES_COUNT = {
+# Read from the canon metadata (.cache/canon_metadata.json) once it has been generated.
+MARK_VERSES_COUNT = CanonMetadata(METADATA_PATH).verse_counts('tob', CURRENT_BOOK_CODE) or {
     1: 45, 2: 28, 3: 35, 4: 41, 5: 43, 6: 56, 7: 37, 8: 38,
     9: 50, 10: 52, 11: 33, 12: 44, 13: 37, 14: 72, 15: 47, 16: 20
 }